@@ -0,0 +1,181 @@
+# admin_registry.py
+import heapq
+import threading
+from datetime import datetime
+
+from flush import document
+
+OWNER_ID = 5373577888
+
+ADMINS_FILE = "admins.json"
+NOTIFIED_FILE = "expiry_notified.json"
+
+# ============================================================
+# ADMIN REGISTRY
+# ============================================================
+#
+# One in-process copy of admins.json:
+#   - admin ids in a set, so is_admin() is an O(1) lookup
+#   - expiry times in a min-heap, so checking for expired admins is a peek
+#     at the earliest deadline instead of a scan + rewrite of both files
+#
+# admins.json is only written when the admin set actually changes.
+# Both the legacy list format and {"admins": [...], "expiry": {...}} load.
+
+
+class AdminRegistry:
+    def __init__(self, path=ADMINS_FILE, notified_path=NOTIFIED_FILE, owner_id=OWNER_ID):
+        self.owner_id = owner_id
+        # admin changes are rare: write them through at once, atomically
+        self._doc = document(path, {"admins": [owner_id], "expiry": {}}, indent=4, delay_ms=0)
+        self._notified = document(notified_path, {}, indent=4)
+        self._lock = threading.RLock()
+        self._admins = None
+        self._expiry = {}
+        self._heap = []
+
+    # ---------------- loading / saving ----------------
+
+    def _ensure_loaded(self):
+        if self._admins is not None:
+            return
+        with self._lock:
+            if self._admins is not None:
+                return
+            data = self._doc.snapshot()
+            if isinstance(data, list):
+                data = {"admins": data, "expiry": {}}
+            elif not isinstance(data, dict):
+                data = {}
+
+            admins = set()
+            for uid in data.get("admins", [self.owner_id]):
+                try:
+                    admins.add(int(uid))
+                except (TypeError, ValueError):
+                    continue
+
+            expiry = {}
+            for uid, timestamp in data.get("expiry", {}).items():
+                try:
+                    expiry[int(uid)] = datetime.fromisoformat(timestamp)
+                except (TypeError, ValueError):
+                    continue
+
+            self._expiry = expiry
+            self._heap = [(exp, uid) for uid, exp in expiry.items()]
+            heapq.heapify(self._heap)
+            self._admins = admins
+
+    def reload(self):
+        """Forget the in-memory copy and read admins.json again."""
+        with self._lock:
+            self._doc.reload()
+            self._admins = None
+            self._ensure_loaded()
+
+    def _save(self):
+        self._doc.set({
+            "admins": sorted(self._admins),
+            "expiry": {str(uid): exp.isoformat() for uid, exp in self._expiry.items()}
+        })
+
+    # ---------------- queries ----------------
+
+    def is_admin(self, user_id):
+        if user_id == self.owner_id:
+            return True
+        self.cleanup_expired()
+        return user_id in self._admins
+
+    def admin_ids(self):
+        self.cleanup_expired()
+        return sorted(self._admins)
+
+    def get_expiry(self, user_id):
+        self._ensure_loaded()
+        return self._expiry.get(user_id)
+
+    def expiries(self):
+        self._ensure_loaded()
+        return dict(self._expiry)
+
+    def as_dict(self):
+        """admins.json-shaped snapshot for code that still wants the raw data."""
+        self.cleanup_expired()
+        with self._lock:
+            return {
+                "admins": sorted(self._admins),
+                "expiry": {str(uid): exp.isoformat() for uid, exp in self._expiry.items()}
+            }
+
+    # ---------------- changes ----------------
+
+    def add(self, user_id, expires_at=None):
+        """Add or re-promote an admin. expires_at=None makes it permanent."""
+        self._ensure_loaded()
+        with self._lock:
+            self._admins.add(user_id)
+            if expires_at:
+                self._expiry[user_id] = expires_at
+                heapq.heappush(self._heap, (expires_at, user_id))
+            else:
+                # stale heap entries are skipped in cleanup_expired()
+                self._expiry.pop(user_id, None)
+            self._save()
+
+    def remove(self, user_id):
+        """Remove an admin. Returns False if they were not one."""
+        self._ensure_loaded()
+        with self._lock:
+            if user_id not in self._admins and user_id not in self._expiry:
+                return False
+            self._admins.discard(user_id)
+            self._expiry.pop(user_id, None)
+            self._save()
+            return True
+
+    def replace(self, data):
+        """Overwrite everything from an admins.json-shaped dict."""
+        with self._lock:
+            self._doc.set(data)
+            self._admins = None
+            self._ensure_loaded()
+
+    def cleanup_expired(self, now=None):
+        """Drop admins whose expiry has passed. Returns the expired ids."""
+        self._ensure_loaded()
+        if not self._heap:
+            return []
+
+        now = now or datetime.utcnow()
+        if self._heap[0][0] > now:
+            return []
+
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                exp, uid = heapq.heappop(self._heap)
+                # skip entries superseded by a later promote or a removal
+                if self._expiry.get(uid) != exp:
+                    continue
+                self._expiry.pop(uid, None)
+                self._admins.discard(uid)
+                expired.append(uid)
+
+            if expired:
+                self._save()
+                with self._notified.lock:
+                    notified = self._notified.get()
+                    for uid in expired:
+                        notified.pop(str(uid), None)
+                    self._notified.mark_dirty()
+
+        return expired
+
+
+admin_registry = AdminRegistry()
+
+
+def is_admin(user_id):
+    return admin_registry.is_admin(user_id)
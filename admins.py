@@ -2,24 +2,17 @@
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from telegram.helpers import escape_markdown
-from shared_functions import load_admins
+from admin_registry import admin_registry, is_admin
 
 OWNER_ID = 5373577888  # Your owner ID
 
 async def admins_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show all bot admins including owner."""
     user_id = update.effective_user.id
-    admins_data = load_admins()  # can be list or dict
-    
-    # Support both list & dict formats
-    if isinstance(admins_data, dict):
-        admins = admins_data.get("admins", [])
-    else:
-        admins = admins_data
 
     # Authorization check
-    if user_id not in admins and user_id != OWNER_ID:
-        await update.message.reply_text("🚫 You are not authorized to use this command.")
+    if not is_admin(user_id):
+        await update.effective_message.reply_text("🚫 You are not authorized to use this command.")
         return
 
     admin_list = []
@@ -34,10 +27,8 @@ async def admins_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         admin_list.append(f"👑 *Owner:* Private User \\(ID: `{OWNER_ID}`\\)")
 
     # Add other admins
+    admins = [admin_id for admin_id in admin_registry.admin_ids() if admin_id != OWNER_ID]
     for admin_id in admins:
-        if admin_id == OWNER_ID:
-            continue
-
         try:
             admin_user = await context.bot.get_chat(admin_id)
             admin_name = escape_markdown(admin_user.first_name or "Private User", version=2)
@@ -51,10 +42,11 @@ async def admins_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message_text = (
         f"🛡️ *Administrators*\n\n"
         f"{admin_text}\n\n"
-        f"📊 *Total Admins:* `{len(admins)}`"
+        f"📊 *Total Admins:* `{len(admins) + 1}`"  # owner + admins
     )
 
-    await update.message.reply_text(
+    # effective_message: the Refresh button calls this with a callback update
+    await update.effective_message.reply_text(
         message_text,
         reply_markup=InlineKeyboardMarkup([
             [InlineKeyboardButton("🔄 Refresh", callback_data="admins_refresh")],
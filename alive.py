@@ -5,6 +5,7 @@ from telegram import Update, InputMediaPhoto
 from telegram.ext import ContextTypes, CommandHandler
 
 from settings import load_settings
+from media_cache import send_cached_photo
 from stats import BOT_START, format_uptime
 
 
@@ -38,9 +39,10 @@ async def alive_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     alive_image = settings.get("alive_image", "")
     uptime = format_uptime(time.time() - BOT_START)
 
+    uptime_text = uptime.replace(',', '\\,')
     caption = (
     "> ɪ'ᴍ ᴀʟɪᴠᴇ ʙᴀʙʏ\!\!\n"
-    f"ᴜᴘᴛɪᴍᴇ\: {uptime.replace(',', '\\,')}\n"
+    f"ᴜᴘᴛɪᴍᴇ\: {uptime_text}\n"
     f"ʀᴇsᴘᴏɴsᴇ\: {internal_ping} ᴍs\n"
     f"sᴛᴀᴛᴜs\: {status}"
     )
@@ -52,13 +54,13 @@ async def alive_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if prep_time < 1.2:
         try:
             if alive_image and os.path.exists(alive_image):
-                await waiting_msg.edit_media(
+                await send_cached_photo(alive_image, lambda photo: waiting_msg.edit_media(
                     InputMediaPhoto(
-                        media=open(alive_image, "rb"),
+                        media=photo,
                         caption=caption,
                         parse_mode="MarkdownV2"
                     )
-                )
+                ))
                 return
         except:
             pass
@@ -80,13 +82,13 @@ async def alive_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # final output
     try:
         if alive_image and os.path.exists(alive_image):
-            await waiting_msg.edit_media(
+            await send_cached_photo(alive_image, lambda photo: waiting_msg.edit_media(
                 InputMediaPhoto(
-                    media=open(alive_image, "rb"),
+                    media=photo,
                     caption=caption,
                     parse_mode="MarkdownV2"
                 )
-            )
+            ))
             return
     except:
         pass
@@ -0,0 +1,105 @@
+# async_storage.py
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import shared_functions
+import settings_store
+from link_codec import decode_link
+
+# ============================================================
+# ASYNC STORAGE FACADE
+# ============================================================
+#
+# Handlers run on the event loop with concurrent_updates enabled, so a slow
+# disk read or SQLite write there stalls every in-flight update. Everything
+# in here runs the blocking call on a small dedicated thread pool instead.
+#
+# Usage:
+#     from async_storage import resolve_link, put_link
+#     link_data = await resolve_link(encoded_id)
+
+STORAGE_IO_WORKERS = int(os.getenv("STORAGE_IO_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=STORAGE_IO_WORKERS,
+    thread_name_prefix="storage-io"
+)
+
+
+async def run_io(func, *args, **kwargs):
+    """Run a blocking storage call on the storage executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_io():
+    _executor.shutdown(wait=True)
+
+
+# ---------------- links ----------------
+
+async def get_link(encoded_id):
+    return await run_io(shared_functions.get_link, encoded_id)
+
+
+async def put_link(encoded_id, link_data):
+    return await run_io(shared_functions.put_link, encoded_id, link_data)
+
+
+async def resolve_link(encoded_id):
+    """Link data for a /start payload. Signed payloads never touch storage."""
+    link_data = decode_link(encoded_id)
+    if link_data is not None:
+        return link_data
+    # links created before the codec: base64 text, record lives in storage
+    return await get_link(encoded_id)
+
+
+# ---------------- users ----------------
+
+async def auto_add_user(user_id, username, first_name, last_name=None):
+    """Register a new user / reactivate an inactive one.
+
+    Known, reachable users are a set lookup on the event loop; only an
+    actual storage write goes to the executor.
+    """
+    if shared_functions.needs_registration(user_id):
+        await run_io(shared_functions.auto_add_user, user_id, username, first_name, last_name)
+
+
+async def touch_user(user_id, opened_link=False):
+    """Record activity, at most one storage write per user and day."""
+    if shared_functions.touch_due(user_id, opened_link):
+        await run_io(shared_functions.touch_user, user_id, opened_link)
+
+
+# ---------------- settings ----------------
+
+async def load_settings():
+    return await run_io(settings_store.load_settings)
+
+
+# ---------------- force sub ----------------
+
+async def load_force_sub():
+    return await run_io(shared_functions.load_force_sub)
+
+
+async def save_force_sub(channels):
+    return await run_io(shared_functions.save_force_sub, channels)
+
+
+# ---------------- join requests ----------------
+
+async def add_join_request(user_id, chat_id):
+    return await run_io(shared_functions.add_join_request, user_id, chat_id)
+
+
+async def remove_join_request(user_id, chat_id):
+    return await run_io(shared_functions.remove_join_request, user_id, chat_id)
+
+
+async def join_request_chats(user_id):
+    return await run_io(shared_functions.join_request_chats, user_id)
@@ -0,0 +1,183 @@
+# auto_delete.py
+import time
+import asyncio
+
+from flush import document
+from delivery import delete_message_ids
+from timing_wheel import TimingWheel
+
+AUTO_DELETE_FILE = "auto_delete.json"
+
+# ============================================================
+# DURABLE AUTO-DELETE SCHEDULER
+# ============================================================
+#
+# Delivered files are deleted again after auto_delete_time minutes. Instead
+# of one sleeping task per delivery (lost on /restart, /update or a crash),
+# every pending deletion is an entry in auto_delete.json:
+#
+#   "<chat_id>:<first message id>": [chat_id, [message ids], due, kind, encoded_id]
+#
+# `due` is a unix timestamp, `kind` picks the retrieval message sent after
+# the deletion ("file" or "batch"). The file is reloaded at startup and one
+# timer loop works through the entries; anything that fell due while the
+# bot was down is handled right away.
+#
+# In memory each pending deletion is one (due_tick, chat_id, message_id)
+# tuple in a hierarchical timing wheel (timing_wheel.py): inserting is O(1)
+# and every tick only looks at one slot. Everything that falls due in the
+# same tick for the same chat is deleted with one delete_messages call.
+
+TICK_SECONDS = 1
+
+
+class AutoDeleteScheduler:
+    def __init__(self, path=AUTO_DELETE_FILE):
+        self._doc = document(path, {})
+        self._wheel = TimingWheel(self._now_tick())
+        self._ready = []
+        self._bot = None
+        self._task = None
+        self._wake = None
+        # asyncio only keeps weak references to tasks; hold the _fire ones
+        self._fires = set()
+
+    @staticmethod
+    def _now_tick():
+        return int(time.time() // TICK_SECONDS)
+
+    @staticmethod
+    def _due_tick(due):
+        # round up so nothing is deleted before its time
+        return -int(-due // TICK_SECONDS)
+
+    # ---------------- lifecycle ----------------
+
+    def start(self, bot):
+        """Load pending deletions and start the timer loop. Call from post_init."""
+        self._bot = bot
+        self._wake = asyncio.Event()
+        self._wheel = TimingWheel(self._now_tick())
+        self._ready = []
+        with self._doc.lock:
+            entries = list(self._doc.get().values())
+        for entry in entries:
+            self._track(entry[0], entry[1][0], entry[2])
+        if entries:
+            print(f"🗑️ Restored {len(entries)} pending auto-deletes")
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---------------- scheduling ----------------
+
+    def _track(self, chat_id, message_id, due):
+        item = (self._due_tick(due), chat_id, message_id)
+        if not self._wheel.count:
+            # an empty wheel is not turned while _run waits; catch it up
+            # first, or advance() would step through every idle tick
+            self._wheel.current = max(self._wheel.current, self._now_tick())
+        if not self._wheel.add(item):
+            self._ready.append(item)
+
+    def schedule(self, chat_id, message_ids, delay_seconds, kind="file", encoded_id=None):
+        """Delete message_ids in chat_id after delay_seconds, then send the retrieval message."""
+        message_ids = [m for m in message_ids if m]
+        if not message_ids:
+            return None
+
+        key = f"{chat_id}:{message_ids[0]}"
+        due = time.time() + delay_seconds
+        with self._doc.lock:
+            self._doc.get()[key] = [chat_id, message_ids, due, kind, encoded_id]
+            self._doc.mark_dirty()
+
+        self._track(chat_id, message_ids[0], due)
+        if self._wake is not None:
+            self._wake.set()
+        return key
+
+    def pending(self):
+        with self._doc.lock:
+            return len(self._doc.get())
+
+    # ---------------- timer loop ----------------
+
+    async def _run(self):
+        while True:
+            if not self._wheel.count and not self._ready:
+                await self._wake.wait()
+                self._wake.clear()
+
+            due = self._ready + self._wheel.advance(self._now_tick())
+            self._ready = []
+            if due:
+                self._dispatch(due)
+
+            if self._wheel.count and not self._ready:
+                # sleep to the next tick boundary, or until schedule() wakes us
+                delay = TICK_SECONDS - (time.time() % TICK_SECONDS)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    def _dispatch(self, items):
+        """Group the due entries by chat and hand each chat to one task."""
+        by_chat = {}
+        with self._doc.lock:
+            entries = self._doc.get()
+            for due_tick, chat_id, message_id in items:
+                key = f"{chat_id}:{message_id}"
+                entry = entries.get(key)
+                # already handled, or superseded by a later schedule() of the same key
+                if entry is None or self._due_tick(entry[2]) != due_tick:
+                    continue
+                by_chat.setdefault(chat_id, []).append((key, entry))
+
+        loop = asyncio.get_running_loop()
+        for chat_id, chat_entries in by_chat.items():
+            task = loop.create_task(self._fire(chat_id, chat_entries))
+            self._fires.add(task)
+            task.add_done_callback(self._fires.discard)
+
+    async def _fire(self, chat_id, chat_entries):
+        message_ids = [m for _, entry in chat_entries for m in entry[1]]
+        try:
+            # one delete_messages call (per 100 ids) for everything due in this chat
+            await delete_message_ids(self._bot, chat_id, message_ids)
+            for key, entry in chat_entries:
+                if entry[4]:
+                    try:
+                        await send_retrieval_message(self._bot, chat_id, entry[3], entry[4])
+                    except Exception as e:
+                        print(f"Error sending retrieval message for {key}: {e}")
+        except Exception as e:
+            print(f"❌ Auto-delete failed for chat {chat_id}: {e}")
+        finally:
+            # removed only once handled, so a crash mid-way retries it on restart
+            with self._doc.lock:
+                entries = self._doc.get()
+                for key, _ in chat_entries:
+                    entries.pop(key, None)
+                self._doc.mark_dirty()
+
+
+async def send_retrieval_message(bot, chat_id, kind, encoded_id):
+    if kind == "batch":
+        from batch_link import send_batch_retrieval_message
+        await send_batch_retrieval_message(bot, chat_id, encoded_id)
+    else:
+        from links import send_file_retrieval_message
+        await send_file_retrieval_message(bot, chat_id, encoded_id)
+
+
+auto_delete = AutoDeleteScheduler()
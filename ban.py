@@ -2,9 +2,11 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler
 
-from shared_functions import load_admins, load_users, save_users, load_banned_users, save_banned_users, auto_add_user, is_user_banned
+from shared_functions import get_user, ban_user, unban_user, is_user_banned
+from admin_registry import is_admin
+from async_storage import run_io
 
-from middleware import check_ban_and_register
+from middleware import check_ban_and_register, BAN_MESSAGE
 
 from datetime import datetime, timedelta
 async def is_banned(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -15,21 +17,16 @@ async def is_banned(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     
     if is_user_banned(user_id):
-        await update.message.reply_text(
-            "🚫 **You have been banned from using this bot!**\n\n"
-            "If you think this is a mistake, please contact the administrator.",
-            parse_mode="Markdown"
-        )
+        await update.message.reply_text(BAN_MESSAGE, parse_mode="Markdown")
         return True  # User is banned
     return False  # User is not banned
 
 @check_ban_and_register
 async def ban_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    admins = load_admins()
     
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         await update.message.reply_text("You are not authorized to use this command!")
         return
     
@@ -56,24 +53,17 @@ async def ban_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Check if target is admin
-        if target_user_id in admins:
+        if is_admin(target_user_id):
             await update.message.reply_text("❌ You cannot ban an admin!")
             return
         
-        banned_users = load_banned_users()
-        users = load_users()
-        
         # Check if user already banned
-        if any(user['id'] == target_user_id for user in banned_users):
+        if is_user_banned(target_user_id):
             await update.message.reply_text("❌ User is already banned!")
             return
         
         # Find user info
-        user_info = None
-        for user in users:
-            if user['id'] == target_user_id:
-                user_info = user
-                break
+        user_info = await run_io(get_user, target_user_id)
         
         if user_info:
             username = user_info.get('username', 'N/A')
@@ -90,14 +80,13 @@ async def ban_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 first_name = 'Unknown User'
         
         # Add to banned users
-        banned_users.append({
+        await run_io(ban_user, {
             "id": target_user_id,
             "username": username,
             "first_name": first_name,
             "banned_by": user_id,
             "banned_at": datetime.utcnow().isoformat()
         })
-        save_banned_users(banned_users)
         
         await update.message.reply_text(
             f"✅ User banned successfully!\n\n"
@@ -121,10 +110,9 @@ async def ban_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 @check_ban_and_register
 async def unban_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    admins = load_admins()
     
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         await update.message.reply_text("You are not authorized to use this command!")
         return
     
@@ -140,23 +128,13 @@ async def unban_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         target_user_id = int(context.args[0])
         
-        banned_users = load_banned_users()
-        
-        # Check if user is banned
-        user_found = None
-        for user in banned_users:
-            if user['id'] == target_user_id:
-                user_found = user
-                break
+        # Remove from banned users
+        user_found = await run_io(unban_user, target_user_id)
         
         if not user_found:
             await update.message.reply_text("❌ User is not banned!")
             return
         
-        # Remove from banned users
-        banned_users = [user for user in banned_users if user['id'] != target_user_id]
-        save_banned_users(banned_users)
-        
         await update.message.reply_text(
             f"✅ User unbanned successfully!\n\n"
             f"👤 User: {user_found.get('first_name', 'Unknown')}\n"
@@ -6,7 +6,11 @@ from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters
 from permission import CheckBotAdmin
 
 # Import shared functions
-from shared_functions import load_admins, load_settings, load_links, save_links, encode_file_id, decode_file_id
+from async_storage import load_settings, put_link, resolve_link
+from shared_functions import begin_conversation
+from link_codec import encode_batch_link
+from delivery import copy_message_range, DeliveryInterrupted
+from auto_delete import auto_delete
 
 @CheckBotAdmin()
 async def batchlink_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -17,7 +21,7 @@ async def batchlink_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "ᴏʀ sʜᴀʀᴇ ᴛʜᴇ ʟɪɴᴋ ᴏғ ᴛʜᴇ ғɪʀsᴛ ᴍᴇssᴀɢᴇ ғʀᴏᴍ ʏᴏᴜʀ ʙᴀᴛᴄʜ ᴄʜᴀɴɴᴇʟ."
     )
     
-    context.user_data['batch_state'] = 'waiting_first_message'
+    begin_conversation(context.user_data, 'batch_state', 'waiting_first_message')
 
 @CheckBotAdmin()
 async def batch_message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -160,16 +164,14 @@ async def check_bot_admin(context, chat_id):
         
 async def generate_batch_links(update: Update, context: ContextTypes.DEFAULT_TYPE, chat_id, first_msg_id, last_msg_id, channel_title):
     try:
-        settings = load_settings()
+        settings = await load_settings()
         auto_delete_time = settings.get("auto_delete_time", 10)
         
         # Create batch data
-        batch_id = f"batch_{chat_id}_{first_msg_id}_{last_msg_id}"
-        encoded_batch_id = encode_file_id(batch_id)
+        encoded_batch_id = encode_batch_link(chat_id, first_msg_id, last_msg_id)
         
-        # Store batch information
-        links = load_links()
-        links[encoded_batch_id] = {
+        # Keep a record of the batch (the link itself resolves without it)
+        await put_link(encoded_batch_id, {
             "type": "batch",
             "chat_id": chat_id,
             "first_message_id": first_msg_id,
@@ -178,8 +180,7 @@ async def generate_batch_links(update: Update, context: ContextTypes.DEFAULT_TYP
             "channel_title": channel_title,
             "created_at": datetime.utcnow().isoformat(),
             "created_by": update.effective_user.id
-        }
-        save_links(links)
+        })
         
         # Generate batch link
         bot_username = context.bot.username
@@ -208,10 +209,8 @@ async def batch_button_handler(update: Update, context: ContextTypes.DEFAULT_TYP
     data = query.data
     
     if data.startswith("copy_batch_"):
-        encoded_id = data.split("_")[2]
-        links = load_links()
-        
-        if encoded_id in links:
+        encoded_id = data[len("copy_batch_"):]
+        if await resolve_link(encoded_id):
             bot_username = context.bot.username
             batch_link = f"https://t.me/{bot_username}?start={encoded_id}"
             
@@ -219,14 +218,14 @@ async def batch_button_handler(update: Update, context: ContextTypes.DEFAULT_TYP
             await asyncio.sleep(0.07)
             await query.message.reply_text(f"🔗 **Batch Link:**\n`{batch_link}`", parse_mode="Markdown")
 
-async def handle_batch_start(update: Update, context: ContextTypes.DEFAULT_TYPE, encoded_id):
-    links = load_links()
+async def handle_batch_start(update: Update, context: ContextTypes.DEFAULT_TYPE, encoded_id, batch_data=None):
+    if batch_data is None:
+        batch_data = await resolve_link(encoded_id)
 
-    if encoded_id not in links:
+    if not batch_data:
         await update.message.reply_text("❌ Batch link expired or not found!")
         return False
 
-    batch_data = links[encoded_id]
 
     if batch_data.get("type") != "batch":
         return False
@@ -236,53 +235,51 @@ async def handle_batch_start(update: Update, context: ContextTypes.DEFAULT_TYPE,
     last_msg_id = batch_data["last_message_id"]
     channel_title = batch_data.get("channel_title", "Unknown Channel")
 
-    settings = load_settings()
+    settings = await load_settings()
     protect_content = settings.get("protect_content", False)
     auto_delete_time = settings.get("auto_delete_time", 10)
 
     # Notify user that batch is starting
 
-    sent_messages = []  # Store sent file message IDs
-    success_count = 0
-
-    # --- Send all files in range ---
-    for msg_id in range(first_msg_id, last_msg_id + 1):
-        try:
-            forwarded_msg = await context.bot.copy_message(
-                chat_id=update.effective_chat.id,
-                from_chat_id=chat_id,
-                message_id=msg_id,
-                protect_content=protect_content
-            )
-            sent_messages.append(forwarded_msg.message_id)
-            success_count += 1
-
-        except Exception as e:
-            print(f"Error copying message {msg_id}: {e}")
-            continue
+    # --- Send all files in range, up to 100 per copy_messages call ---
+    try:
+        sent_messages = await copy_message_range(
+            context.bot,
+            update.effective_chat.id,
+            chat_id,
+            first_msg_id,
+            last_msg_id,
+            protect_content=protect_content
+        )
+    except DeliveryInterrupted as e:
+        print(f"Error copying batch {first_msg_id}-{last_msg_id}: {e}")
+        # what already arrived still has to be deleted on time
+        sent_messages = e.sent
+    success_count = len(sent_messages)
 
     # --- After all files sent, show completion summary ---
     if success_count > 0:
         
 
         # --- Send warning message at the END ---
-        warning_msg = await update.message.reply_text(
-            f"> *⚠️ ɪᴍᴘᴏʀᴛᴀɴᴛ\\:*\n\n"
-            f"> *ᴛʜᴇsᴇ ғɪʟᴇs ᴡɪʟʟ ʙᴇ ᴅᴇʟᴇᴛᴇᴅ ɪɴ {auto_delete_time} ᴍɪɴᴜᴛᴇs\\. "
-            f"ᴘʟᴇᴀsᴇ sᴀᴠᴇ ᴏʀ ғᴏʀᴡᴀʀᴅ ᴛʜᴇᴍ ᴛᴏ ʏᴏᴜʀ sᴀᴠᴇᴅ ᴍᴇssᴀɢᴇs ʙᴇғᴏʀᴇ ᴛʜᴇʏ ɢᴇᴛ ʀᴇᴍᴏᴠᴇᴅ\\.*",
-            parse_mode="MarkdownV2"
-        )
-
-        # --- Schedule deletion after sending warning ---
-        asyncio.create_task(
-            delete_batch_messages(
-                context,
-                update.effective_chat.id,
-                sent_messages,
-                warning_msg.message_id if warning_msg else None,
-                auto_delete_time,
-                encoded_id,
+        try:
+            warning_msg = await update.message.reply_text(
+                f"> *⚠️ ɪᴍᴘᴏʀᴛᴀɴᴛ\\:*\n\n"
+                f"> *ᴛʜᴇsᴇ ғɪʟᴇs ᴡɪʟʟ ʙᴇ ᴅᴇʟᴇᴛᴇᴅ ɪɴ {auto_delete_time} ᴍɪɴᴜᴛᴇs\\. "
+                f"ᴘʟᴇᴀsᴇ sᴀᴠᴇ ᴏʀ ғᴏʀᴡᴀʀᴅ ᴛʜᴇᴍ ᴛᴏ ʏᴏᴜʀ sᴀᴠᴇᴅ ᴍᴇssᴀɢᴇs ʙᴇғᴏʀᴇ ᴛʜᴇʏ ɢᴇᴛ ʀᴇᴍᴏᴠᴇᴅ\\.*",
+                parse_mode="MarkdownV2"
             )
+        except Exception as e:
+            print(f"Error sending batch warning: {e}")
+            warning_msg = None
+
+        # --- Schedule deletion after sending warning (persisted) ---
+        auto_delete.schedule(
+            update.effective_chat.id,
+            sent_messages + [warning_msg.message_id if warning_msg else None],
+            auto_delete_time * 60,
+            kind="batch",
+            encoded_id=encoded_id
         )
     else:
         await update.message.reply_text("❌ No files could be sent from this batch!")
@@ -295,39 +292,7 @@ async def handle_batch_start(update: Update, context: ContextTypes.DEFAULT_TYPE,
     
     return True
 
-async def delete_batch_messages(context, chat_id, sent_message_ids, warning_msg_id, delay_minutes, encoded_id):
-    """Delete all batch messages after delay"""
-    print(f"🕒 Batch deletion scheduled for {delay_minutes} minutes from now")
-    
-    # Wait for the specified time
-    await asyncio.sleep(delay_minutes * 60)
-    
-    print(f"🗑️ Deleting {len(sent_message_ids)} batch messages...")
-    
-    # Delete all sent file messages
-    deleted_count = 0
-    for msg_id in sent_message_ids:
-        try:
-            await context.bot.delete_message(chat_id, msg_id)
-            deleted_count += 1
-            print(f"✅ Deleted file message {msg_id}")
-        except Exception as e:
-            print(f"❌ Error deleting file message {msg_id}: {e}")
-    
-    # Delete warning message
-    if warning_msg_id:
-        try:
-            await context.bot.delete_message(chat_id, warning_msg_id)
-            print(f"✅ Deleted warning message {warning_msg_id}")
-        except Exception as e:
-            print(f"❌ Error deleting warning message {warning_msg_id}: {e}")
-    
-    print(f"✅ Batch deletion completed. Deleted {deleted_count} files.")
-    
-    # Send retrieval message
-    await send_batch_retrieval_message(context, chat_id, encoded_id)
-
-async def send_batch_retrieval_message(context, chat_id, encoded_id):
+async def send_batch_retrieval_message(bot, chat_id, encoded_id):
     completion_text = (
         "*✅ ʏᴏᴜʀ ʙᴀᴛᴄʜ ғɪʟᴇs ʜᴀᴠᴇ ʙᴇᴇɴ sᴜᴄᴄᴇssғᴜʟʟʏ ᴅᴇʟᴇᴛᴇᴅ\\!*\n\n"
         "> *ɪғ ʏᴏᴜ ᴡᴀɴᴛ ᴛᴏ ʀᴇᴛʀɪᴇᴠᴇ ᴛʜᴇᴍ ᴀɢᴀɪɴ, ᴄʟɪᴄᴋ ᴛʜᴇ \"♻️ ᴄʟɪᴄᴋ ʜᴇʀᴇ\" ʙᴜᴛᴛᴏɴ\\. ɪғ ɴᴏᴛ, sɪᴍᴘʟʏ ᴄʟᴏsᴇ ᴛʜɪs ᴍᴇssᴀɢᴇ\\.*"
@@ -335,13 +300,13 @@ async def send_batch_retrieval_message(context, chat_id, encoded_id):
     
     keyboard = InlineKeyboardMarkup([
         [
-            InlineKeyboardButton("♻️ ᴄʟɪᴄᴋ ʜᴇʀᴇ", url=f"https://t.me/{context.bot.username}?start={encoded_id}"),
+            InlineKeyboardButton("♻️ ᴄʟɪᴄᴋ ʜᴇʀᴇ", url=f"https://t.me/{bot.username}?start={encoded_id}"),
             InlineKeyboardButton("✖︎ ᴄʟᴏsᴇ", callback_data=f"link_close")
         ]
     ])
     
     try:
-        retrieval_msg = await context.bot.send_message(
+        retrieval_msg = await bot.send_message(
             chat_id=chat_id,
             text=completion_text,
             reply_markup=keyboard,
@@ -357,10 +322,8 @@ async def batch_button_handler(update: Update, context: ContextTypes.DEFAULT_TYP
     data = query.data
     
     if data.startswith("copy_batch_"):
-        encoded_id = data.split("_")[2]
-        links = load_links()
-        
-        if encoded_id in links:
+        encoded_id = data[len("copy_batch_"):]
+        if await resolve_link(encoded_id):
             bot_username = context.bot.username
             batch_link = f"https://t.me/{bot_username}?start={encoded_id}"
 
@@ -1,11 +1,23 @@
 # broadcast.py
+import os
+import time
 import asyncio
+from collections import deque
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from shared_functions import load_users, load_admins
+from shared_functions import find_user_ids, mark_users_inactive
 from middleware import check_ban_and_register
+from async_storage import run_io
+from broadcast_engine import broadcast_engine, OK, BLOCKED, DEACTIVATED, FAILURE_CLASSES
+from broadcast_job import BroadcastJob
+
+# The status message is edited by a ticker, at most once per interval and
+# only if something changed; the ETA uses the send rate over the last
+# BROADCAST_RATE_WINDOW seconds instead of the average since the start.
+BROADCAST_PROGRESS_SECONDS = float(os.getenv("BROADCAST_PROGRESS_SECONDS", "5"))
+BROADCAST_RATE_WINDOW = 30
 
 # Global variable to track broadcast status
 broadcast_status = {
@@ -14,8 +26,10 @@ broadcast_status = {
     'total_users': 0,
     'success_count': 0,
     'failed_count': 0,
+    'failures': {},
     'start_time': None,
-    'message': None,
+    'source': None,
+    'job': None,
     'task': None
 }
 
@@ -37,31 +51,39 @@ async def broadcast_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
+    # Parse the target segment
+    try:
+        filters, target = parse_broadcast_segment(context.args or [])
+    except ValueError as e:
+        await update.message.reply_text(f"⚠️ {e}\n\n{BROADCAST_USAGE}", parse_mode="Markdown")
+        return
+    
     # Check if message is replied
     if not update.message.reply_to_message:
-        await update.message.reply_text(
-            "❌ **Usage:** /broadcast (reply to a message)\n\n"
-            "Please reply to the message you want to broadcast.",
-            parse_mode="Markdown"
-        )
+        await update.message.reply_text(BROADCAST_USAGE, parse_mode="Markdown")
         return
     
-    users = load_users()
-    total_users = len(users)
+    # users a previous broadcast could not reach and banned users are
+    # skipped unless asked for; the store answers from its indexes
+    user_ids = await run_io(find_user_ids, **filters)
+    total_users = len(user_ids)
     
     if total_users == 0:
-        await update.message.reply_text("❌ No users found in the database!")
+        await update.message.reply_text(f"❌ No users found for: {target}")
         return
     
     # Store the message to broadcast
+    source = update.message.reply_to_message
     broadcast_status.update({
         'is_running': True,
         'current_index': 0,
         'total_users': total_users,
         'success_count': 0,
         'failed_count': 0,
+        'failures': dict.fromkeys(FAILURE_CLASSES, 0),
         'start_time': datetime.utcnow(),
-        'message': update.message.reply_to_message,
+        'source': (source.chat_id, source.message_id),
+        'job': None,
         'task': None
     })
     
@@ -69,6 +91,7 @@ async def broadcast_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     confirmation_msg = await update.message.reply_text(
         f"📢 **Broadcast Started**\n\n"
         f"📊 **Total Users:** `{total_users}`\n"
+        f"🎯 **Target:** `{target}`\n"
         f"⏰ **Started:** `{broadcast_status['start_time'].strftime('%Y-%m-%d %H:%M:%S')}`\n\n"
         f"🔄 **Preparing to send...**\n"
         f"📤 **Progress:** `0%` (0/{total_users})\n"
@@ -83,48 +106,165 @@ async def broadcast_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         parse_mode="Markdown"
     )
     
+    # Checkpoint the job on disk so it survives restarts (broadcast_job.py)
+    broadcast_status['job'] = await run_io(
+        BroadcastJob.create,
+        broadcast_status['source'],
+        (update.effective_chat.id, confirmation_msg.message_id),
+        user_ids,
+        broadcast_status['start_time'].isoformat(),
+        FAILURE_CLASSES
+    )
+
     # Start the broadcast task
     broadcast_status['task'] = asyncio.create_task(
-        send_broadcast_messages(context, confirmation_msg.message_id, update.effective_chat.id)
+        send_broadcast_messages(context.bot, broadcast_status['job'])
     )
 
-async def send_broadcast_messages(context, status_message_id, chat_id):
+BROADCAST_USAGE = (
+    "❌ **Usage:** /broadcast [filters] (reply to a message)\n\n"
+    "Please reply to the message you want to broadcast.\n\n"
+    "**Filters** (combine freely):\n"
+    "`after:2025-01-31` - joined on or after a date\n"
+    "`before:2025-01-31` - joined before a date\n"
+    "`active:7` - used the bot in the last 7 days\n"
+    "`opened:yes` / `opened:no` - has / has not opened a file link\n"
+    "`all` - include users who blocked the bot\n"
+    "`banned` - include banned users"
+)
+
+def parse_broadcast_segment(args):
+    """/broadcast arguments -> (find_user_ids filters, readable description)."""
+    filters = {}
+    described = []
+    for arg in args:
+        key, _, value = arg.lower().replace("=", ":").partition(":")
+        if key == "all" and not value:
+            filters['include_inactive'] = True
+            described.append("incl. inactive")
+        elif key == "banned" and not value:
+            filters['exclude_banned'] = False
+            described.append("incl. banned")
+        elif key in ("after", "before"):
+            try:
+                day = datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+            except ValueError:
+                raise ValueError(f"Invalid date in `{arg}`, use YYYY-MM-DD")
+            filters['joined_after' if key == "after" else 'joined_before'] = day
+            described.append(f"joined {key} {day}")
+        elif key == "active":
+            if not value.isdigit():
+                raise ValueError(f"Invalid day count in `{arg}`")
+            since = (datetime.utcnow() - timedelta(days=int(value))).date().isoformat()
+            filters['seen_since'] = since
+            described.append(f"active {value}d")
+        elif key == "opened" and value in ("yes", "no"):
+            filters['opened_link'] = value == "yes"
+            described.append("opened a link" if value == "yes" else "never opened a link")
+        else:
+            raise ValueError(f"Unknown filter: `{arg}`")
+    return filters, ", ".join(described) or "all active users"
+
+async def resume_broadcast(bot):
+    """Continue a broadcast that was interrupted by a restart. Call from post_init."""
+    job = await run_io(BroadcastJob.load)
+    if job is None:
+        return
+
+    data = job.data
+    broadcast_status.update({
+        'is_running': True,
+        'current_index': job.processed,
+        'total_users': data['total'],
+        'success_count': data['success'],
+        'failed_count': data['failed'],
+        'failures': dict(data['failures']),
+        'start_time': datetime.fromisoformat(data['started_at']),
+        'source': tuple(data['source']),
+        'job': job,
+        'task': None
+    })
+    print(f"📢 Resuming broadcast at {job.processed}/{data['total']}")
+    broadcast_status['task'] = asyncio.create_task(send_broadcast_messages(bot, job))
+
+async def send_broadcast_messages(bot, job):
     """Send broadcast messages to all users with progress updates"""
-    users = load_users()
-    
-    for index, user in enumerate(users):
-        # Check if broadcast was cancelled
-        if not broadcast_status['is_running']:
-            break
-        
-        user_id = user['id']
-        broadcast_status['current_index'] = index + 1
-        
-        try:
-            # Forward the message to user
-            await context.bot.copy_message(
-                chat_id=user_id,
-                from_chat_id=broadcast_status['message'].chat_id,
-                message_id=broadcast_status['message'].message_id
-            )
+    from_chat_id, message_id = broadcast_status['source']
+    chat_id, status_message_id = job.data['status']
+
+    async def on_result(index, user_id, outcome):
+        broadcast_status['current_index'] += 1
+        if outcome == OK:
             broadcast_status['success_count'] += 1
-            
-        except Exception as e:
-            print(f"Failed to send to user {user_id}: {e}")
+        else:
             broadcast_status['failed_count'] += 1
-        
-        # Update progress every 10 messages or for the last message
-        if (index + 1) % 10 == 0 or (index + 1) == len(users):
-            await update_broadcast_progress(context, status_message_id, chat_id)
-        
-        # Small delay to avoid hitting rate limits
-        await asyncio.sleep(0.1)
+            broadcast_status['failures'][outcome] += 1
+        # blocked / deactivated: collected in the job, marked inactive in batches
+        job.record(index, outcome, outcome == OK, unreachable=outcome in (BLOCKED, DEACTIVATED))
+
+    ticker = asyncio.create_task(broadcast_progress_ticker(bot, job, status_message_id, chat_id))
+    try:
+        # concurrent senders under a shared rate budget (broadcast_engine.py)
+        await broadcast_engine.run(bot, job.remaining(), from_chat_id, message_id, on_result)
+    finally:
+        ticker.cancel()
     
     # Broadcast completed
-    await finalize_broadcast(context, status_message_id, chat_id)
+    await finalize_broadcast(bot, status_message_id, chat_id)
+
+class SendRate:
+    """Recipients per second over a sliding window of (time, processed) samples."""
+
+    def __init__(self, window=BROADCAST_RATE_WINDOW):
+        self.window = window
+        self.samples = deque()
+
+    def add(self, now, processed):
+        self.samples.append((now, processed))
+        # keep one sample older than the window as the starting point
+        while len(self.samples) > 2 and now - self.samples[1][0] >= self.window:
+            self.samples.popleft()
 
-async def update_broadcast_progress(context, status_message_id, chat_id):
-    """Update the broadcast progress message"""
+    def per_second(self):
+        if len(self.samples) < 2:
+            return None
+        (t0, p0), (t1, p1) = self.samples[0], self.samples[-1]
+        if t1 <= t0:
+            return None
+        return (p1 - p0) / (t1 - t0)
+
+async def mark_unreachable(job):
+    """Leave users the broadcast found blocked / deactivated out of future ones."""
+    for reason, user_ids in job.take_unreachable().items():
+        try:
+            await run_io(mark_users_inactive, user_ids, reason)
+        except Exception as e:
+            print(f"Error marking {len(user_ids)} users inactive: {e}")
+
+async def broadcast_progress_ticker(bot, job, status_message_id, chat_id):
+    """Edit the status message every BROADCAST_PROGRESS_SECONDS while it changes."""
+    rate = SendRate()
+    rate.add(time.monotonic(), broadcast_status['current_index'])
+    last_shown = None
+
+    while broadcast_status['is_running']:
+        await asyncio.sleep(BROADCAST_PROGRESS_SECONDS)
+        await mark_unreachable(job)
+        current = broadcast_status['current_index']
+        rate.add(time.monotonic(), current)
+        if current == last_shown:
+            continue
+        last_shown = current
+        await update_broadcast_progress(bot, status_message_id, chat_id, rate.per_second())
+
+def format_failures(failures):
+    """Non-zero failure classes, e.g. "🚫 blocked 3 · 💀 deactivated 1"."""
+    icons = {"blocked": "🚫", "deactivated": "💀", "flood": "🌊", "other": "⚠️"}
+    parts = [f"{icons[name]} {name} {count}" for name, count in failures.items() if count]
+    return " · ".join(parts) if parts else "none"
+
+async def update_broadcast_progress(bot, status_message_id, chat_id, rate=None):
+    """Update the broadcast progress message (rate: recent recipients per second)"""
     if not broadcast_status['is_running']:
         return
     
@@ -134,13 +274,10 @@ async def update_broadcast_progress(context, status_message_id, chat_id):
     failed = broadcast_status['failed_count']
     percentage = (current / total) * 100 if total > 0 else 0
     
-    # Calculate ETA
-    if current > 0:
-        elapsed_time = (datetime.utcnow() - broadcast_status['start_time']).total_seconds()
-        time_per_user = elapsed_time / current
-        remaining_users = total - current
-        eta_seconds = remaining_users * time_per_user
-        eta_str = f"{int(eta_seconds // 60)}m {int(eta_seconds % 60)}s"
+    # Calculate ETA from the recent send rate
+    if rate:
+        eta_seconds = (total - current) / rate
+        eta_str = f"{int(eta_seconds // 60)}m {int(eta_seconds % 60)}s ({rate:.1f} msg/s)"
     else:
         eta_str = "Calculating..."
     
@@ -158,11 +295,12 @@ async def update_broadcast_progress(context, status_message_id, chat_id):
         f"📤 **Progress:** `{percentage:.1f}%` ({current}/{total})\n"
         f"✅ **Successful:** `{success}`\n"
         f"❌ **Failed:** `{failed}`\n"
+        f"   {format_failures(broadcast_status['failures'])}\n"
         f"⏳ **Remaining:** `{total - current}`"
     )
     
     try:
-        await context.bot.edit_message_text(
+        await bot.edit_message_text(
             chat_id=chat_id,
             message_id=status_message_id,
             text=status_text,
@@ -177,7 +315,7 @@ async def update_broadcast_progress(context, status_message_id, chat_id):
     except Exception as e:
         print(f"Error updating progress: {e}")
 
-async def finalize_broadcast(context, status_message_id, chat_id):
+async def finalize_broadcast(bot, status_message_id, chat_id):
     """Send final broadcast summary"""
     total = broadcast_status['total_users']
     success = broadcast_status['success_count']
@@ -200,12 +338,13 @@ async def finalize_broadcast(context, status_message_id, chat_id):
         f"📈 **Success Rate:** `{percentage:.1f}%`\n\n"
         f"✅ **Successful:** `{success}`\n"
         f"❌ **Failed:** `{failed}`\n"
+        f"   {format_failures(broadcast_status['failures'])}\n"
         f"📤 **Sent:** `{broadcast_status['current_index']}`\n"
         f"⏳ **Skipped:** `{total - broadcast_status['current_index']}`"
     )
     
     try:
-        await context.bot.edit_message_text(
+        await bot.edit_message_text(
             chat_id=chat_id,
             message_id=status_message_id,
             text=summary_text,
@@ -220,6 +359,11 @@ async def finalize_broadcast(context, status_message_id, chat_id):
     except Exception as e:
         print(f"Error sending final summary: {e}")
     
+    # Job is done, nothing left to resume
+    if broadcast_status['job']:
+        await mark_unreachable(broadcast_status['job'])
+        await run_io(broadcast_status['job'].finish)
+
     # Reset broadcast status
     broadcast_status.update({
         'is_running': False,
@@ -227,11 +371,31 @@ async def finalize_broadcast(context, status_message_id, chat_id):
         'total_users': 0,
         'success_count': 0,
         'failed_count': 0,
+        'failures': {},
         'start_time': None,
-        'message': None,
+        'source': None,
+        'job': None,
         'task': None
     })
 
+async def cancel_broadcast(bot):
+    """Stop the running broadcast and finalize it once its workers are gone."""
+    task, job = broadcast_status['task'], broadcast_status['job']
+    broadcast_status['is_running'] = False
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Broadcast task failed: {e}")
+
+    # the task may have finished and finalized on its own meanwhile
+    if job is not None and broadcast_status['job'] is job:
+        chat_id, status_message_id = job.data['status']
+        await finalize_broadcast(bot, status_message_id, chat_id)
+
 async def broadcast_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle broadcast button clicks"""
     query = update.callback_query
@@ -241,22 +405,8 @@ async def broadcast_button_handler(update: Update, context: ContextTypes.DEFAULT
     
     if data == "broadcast_cancel":
         if broadcast_status['is_running']:
-            # Cancel the broadcast
-            broadcast_status['is_running'] = False
-            if broadcast_status['task']:
-                broadcast_status['task'].cancel()
-            
-            await query.edit_message_text(
-                "🚫 **Broadcast Cancelled**\n\n"
-                "The broadcast has been stopped. Some users may have already received the message.",
-                reply_markup=InlineKeyboardMarkup([
-                [
-                  InlineKeyboardButton("▪︎ ɴᴇᴡ", callback_data="broadcast_new"),
-                  InlineKeyboardButton("✖ ᴄʟᴏsᴇ", callback_data="broadcast_close")
-                ]
-            ]),
-                parse_mode="Markdown"
-            )
+            # Cancel the broadcast; the summary shows it as cancelled
+            await cancel_broadcast(context.bot)
         else:
             await query.answer("No broadcast is currently running!", show_alert=True)
     
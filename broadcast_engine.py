@@ -0,0 +1,109 @@
+# broadcast_engine.py
+import os
+import asyncio
+
+from telegram.error import Forbidden, BadRequest, RetryAfter, NetworkError
+
+from rate_limiter import TokenBucket, retry_after_seconds
+
+# ============================================================
+# BROADCAST ENGINE
+# ============================================================
+#
+# BROADCAST_WORKERS senders pull user ids from one shared iterator and copy
+# the broadcast message to each. All of them draw from one token bucket
+# (BROADCAST_RATE msg/s), which stays a little under the global limit in
+# rate_limiter.py so file deliveries keep some headroom during a broadcast.
+#
+# Timeouts, network errors and 429s that outlast the rate limiter's own
+# retries are retried here with exponential backoff. What still fails is
+# classified:
+#
+#   blocked      - the user blocked the bot
+#   deactivated  - the account is deleted / the chat no longer exists
+#   flood        - still rate limited after every retry
+#   other        - anything else
+
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "20"))
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+BROADCAST_BACKOFF = 1.0
+
+OK = "ok"
+BLOCKED = "blocked"
+DEACTIVATED = "deactivated"
+FLOOD = "flood"
+OTHER = "other"
+FAILURE_CLASSES = (BLOCKED, DEACTIVATED, FLOOD, OTHER)
+
+
+def classify_error(error):
+    """Failure class of an exception raised while sending to one user."""
+    text = str(error).lower()
+    if isinstance(error, Forbidden):
+        if "deactivated" in text:
+            return DEACTIVATED
+        return BLOCKED
+    if isinstance(error, BadRequest) and ("chat not found" in text or "user not found" in text):
+        return DEACTIVATED
+    if isinstance(error, RetryAfter):
+        return FLOOD
+    return OTHER
+
+
+def is_transient(error):
+    # TimedOut is a NetworkError; BadRequest/Forbidden are not
+    return isinstance(error, (RetryAfter, NetworkError)) and not isinstance(error, (BadRequest, Forbidden))
+
+
+class BroadcastEngine:
+    def __init__(self, workers=BROADCAST_WORKERS, rate=BROADCAST_RATE, max_retries=BROADCAST_MAX_RETRIES):
+        self.workers = workers
+        self.bucket = TokenBucket(rate)
+        self.max_retries = max_retries
+
+    async def send_one(self, bot, user_id, from_chat_id, message_id):
+        """Copy the message to user_id. Returns OK or a failure class."""
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            try:
+                await bot.copy_message(
+                    chat_id=user_id,
+                    from_chat_id=from_chat_id,
+                    message_id=message_id
+                )
+                return OK
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_retries:
+                    outcome = classify_error(e)
+                    if outcome in (OTHER, FLOOD):
+                        print(f"Failed to send to user {user_id}: {e}")
+                    return outcome
+
+                if isinstance(e, RetryAfter):
+                    delay = retry_after_seconds(e)
+                    # everyone is over the limit, not just this worker
+                    self.bucket.pause(delay)
+                else:
+                    delay = BROADCAST_BACKOFF * (2 ** attempt)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def run(self, bot, recipients, from_chat_id, message_id, on_result):
+        """Send to every (key, user_id) in recipients with the worker pool.
+
+        on_result(key, user_id, outcome) is called after each user.
+        Cancelling the awaiting task stops all workers.
+        """
+        pending = iter(recipients)
+
+        async def worker():
+            for key, user_id in pending:
+                outcome = await self.send_one(bot, user_id, from_chat_id, message_id)
+                await on_result(key, user_id, outcome)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, self.workers))))
+
+
+broadcast_engine = BroadcastEngine()
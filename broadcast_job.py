@@ -0,0 +1,130 @@
+# broadcast_job.py
+import os
+
+from flush import document
+
+BROADCAST_JOB_FILE = "broadcast_job.json"
+BROADCAST_TARGETS_FILE = "broadcast_targets.json"
+BROADCAST_CHECKPOINT_MS = int(os.getenv("BROADCAST_CHECKPOINT_MS", "2000"))
+
+# ============================================================
+# RESUMABLE BROADCAST JOBS
+# ============================================================
+#
+# A running broadcast is checkpointed to disk so /restart, /update or a
+# crash does not lose it. On startup it continues with the users who have
+# not been handled yet, instead of starting over and messaging everyone twice.
+#
+# broadcast_targets.json - the recipient list, written once when the job starts
+# broadcast_job.json     - small, rewritten at most every BROADCAST_CHECKPOINT_MS:
+#
+#   {"source": [chat_id, message_id], "status": [chat_id, message_id],
+#    "started_at": iso, "total": n, "cursor": i, "done_ahead": [...],
+#    "success": n, "failed": n, "failures": {class: n},
+#    "unreachable": {class: [user_id, ...]}}
+#
+# `unreachable` holds blocked / deactivated users not yet marked inactive in
+# storage; the broadcast takes them in batches (take_unreachable).
+#
+# Workers finish slightly out of order, so the position is `cursor` (every
+# index below it is handled) plus `done_ahead`, the few handled indexes
+# past it. Only messages sent within the last checkpoint interval before
+# a crash can go out twice; a clean shutdown flushes the checkpoint first.
+
+
+class BroadcastJob:
+    def __init__(self, data, user_ids):
+        self.data = data
+        self.user_ids = user_ids
+        self._done_ahead = set(data.get("done_ahead", []))
+        data.setdefault("unreachable", {})
+        self._doc = document(BROADCAST_JOB_FILE, {}, delay_ms=BROADCAST_CHECKPOINT_MS)
+
+    # ---------------- lifecycle ----------------
+
+    @classmethod
+    def create(cls, source, status, user_ids, started_at, failure_classes):
+        data = {
+            "source": list(source),
+            "status": list(status),
+            "started_at": started_at,
+            "total": len(user_ids),
+            "cursor": 0,
+            "done_ahead": [],
+            "success": 0,
+            "failed": 0,
+            "failures": dict.fromkeys(failure_classes, 0),
+            "unreachable": {}
+        }
+        # recipients first: a job file must never point at a missing list
+        document(BROADCAST_TARGETS_FILE, [], delay_ms=0).set(list(user_ids))
+        job = cls(data, list(user_ids))
+        job._doc.set(data)
+        job._doc.flush()
+        return job
+
+    @classmethod
+    def load(cls):
+        """The unfinished job left on disk, or None."""
+        data = document(BROADCAST_JOB_FILE, {}, delay_ms=BROADCAST_CHECKPOINT_MS).snapshot()
+        if not data or "source" not in data:
+            return None
+        user_ids = document(BROADCAST_TARGETS_FILE, [], delay_ms=0).snapshot()
+        if len(user_ids) != data.get("total"):
+            print("⚠️ Broadcast checkpoint does not match its recipient list, dropping it")
+            cls.discard()
+            return None
+        return cls(data, user_ids)
+
+    @staticmethod
+    def discard():
+        document(BROADCAST_JOB_FILE, {}, delay_ms=BROADCAST_CHECKPOINT_MS).set({})
+        document(BROADCAST_TARGETS_FILE, [], delay_ms=0).set([])
+
+    def finish(self):
+        self.discard()
+
+    # ---------------- progress ----------------
+
+    @property
+    def processed(self):
+        return self.data["cursor"] + len(self._done_ahead)
+
+    def remaining(self):
+        """(index, user_id) for every recipient not handled yet, in order."""
+        skip = set(self._done_ahead)
+        for index in range(self.data["cursor"], len(self.user_ids)):
+            if index not in skip:
+                yield index, self.user_ids[index]
+
+    def record(self, index, outcome, ok, unreachable=False):
+        # under the document lock: counters, cursor and done_ahead change
+        # together, and flush copies the checkpoint under the same lock
+        with self._doc.lock:
+            data = self.data
+            if ok:
+                data["success"] += 1
+            else:
+                data["failed"] += 1
+                data["failures"][outcome] = data["failures"].get(outcome, 0) + 1
+            if unreachable:
+                data["unreachable"].setdefault(outcome, []).append(self.user_ids[index])
+
+            self._done_ahead.add(index)
+            cursor = data["cursor"]
+            while cursor in self._done_ahead:
+                self._done_ahead.discard(cursor)
+                cursor += 1
+            data["cursor"] = cursor
+            data["done_ahead"] = sorted(self._done_ahead)
+            self._doc.set(data)
+
+    def take_unreachable(self):
+        """{class: [user_id, ...]} recorded since the last call, then forgotten."""
+        with self._doc.lock:
+            pending = self.data["unreachable"]
+            if not pending:
+                return {}
+            self.data["unreachable"] = {}
+            self._doc.set(self.data)
+            return pending
@@ -0,0 +1,69 @@
+# conversation_router.py
+from telegram import Update
+from telegram.ext import ContextTypes, MessageHandler, filters
+
+from force_sub import forwarded_channel_handler
+from settings import settings_message_handler
+from shortened import shortener_api_handler, shortlink_wait_handler
+from batch_link import batch_message_handler
+from links import genlink_next_message
+from mkadmin import feedback_text_handler
+
+# ============================================================
+# CONVERSATION STATE ROUTER
+# ============================================================
+#
+# Every multi-step command (/fsub add, /settings image/text, /shortener API
+# token, /batch, /genlink, /shortlink, feedback) parks a flag in user_data
+# and waits for the user's next message. They used to be seven catch-all
+# MessageHandlers in groups 0-4, so every ordinary message ran all of them.
+#
+# Now one handler looks at user_data once and calls the single handler
+# whose state is active. Messages from users in no state return right away.
+#
+# Flows start through begin_conversation (shared_functions.py), which
+# drops every other state, so an abandoned /batchlink cannot swallow the
+# reply to a later /genlink. Should two states still be set, the first one
+# listed wins. Each entry also keeps the filter its handler was registered
+# with, so e.g. a plain text message during /fsub add is ignored exactly
+# as before.
+
+CONVERSATION_STATES = (
+    # (user_data key, accepted messages, handler)
+    ("waiting_fsub", filters.FORWARDED, forwarded_channel_handler),
+    ("waiting_for", filters.PHOTO | filters.TEXT, settings_message_handler),
+    ("waiting_for_api", filters.TEXT, shortener_api_handler),
+    ("batch_state", filters.TEXT | filters.FORWARDED, batch_message_handler),
+    ("waiting_for_genlink", filters.ALL, genlink_next_message),
+    ("waiting_for_shortlink", filters.ALL, shortlink_wait_handler),
+    ("awaiting_feedback", filters.TEXT, feedback_text_handler),
+)
+
+
+def active_state(update: Update, user_data):
+    """(key, handler) of the conversation this message belongs to, or None."""
+    if not user_data:
+        return None
+    for key, accepted, handler in CONVERSATION_STATES:
+        if user_data.get(key) and accepted.check_update(update):
+            return key, handler
+    return None
+
+
+async def conversation_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not update.message or not update.effective_user:
+        return
+
+    state = active_state(update, context.user_data)
+    if state is None:
+        return
+
+    _, handler = state
+    return await handler(update, context)
+
+
+def register_conversation_router(application, group=0):
+    application.add_handler(
+        MessageHandler(~filters.COMMAND, conversation_router),
+        group=group
+    )
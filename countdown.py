@@ -0,0 +1,98 @@
+# countdown.py
+import time
+import asyncio
+
+# ============================================================
+# PROMPT COUNTDOWNS
+# ============================================================
+#
+# /genlink, /shortlink and /fsub add show "xx s remaining" while they wait
+# for the admin's next message. Editing that every second is 60 API calls
+# per prompt, all competing with file delivery for the same rate budget.
+#
+# Instead the prompt is only edited when the remaining time crosses one of
+# COUNTDOWN_MARKS (the first mark is what the prompt was sent with), then
+# once more on timeout: 4 edits instead of 61. All running countdowns are
+# driven by one task that ticks while any countdown is active, and
+# cancel() stops a countdown before its next edit.
+
+COUNTDOWN_MARKS = (60, 30, 10, 5)
+TICK_SECONDS = 1
+
+
+class Countdown:
+    __slots__ = ("deadline", "marks", "render", "on_timeout")
+
+    def __init__(self, deadline, marks, render, on_timeout):
+        self.deadline = deadline
+        self.marks = marks          # remaining-second marks not shown yet, descending
+        self.render = render        # async render(seconds_left)
+        self.on_timeout = on_timeout
+
+
+class CountdownService:
+    def __init__(self, marks=COUNTDOWN_MARKS, tick=TICK_SECONDS):
+        self.default_marks = marks
+        self.tick = tick
+        self._active = {}
+        self._task = None
+        # asyncio only keeps weak references to tasks; hold the pending calls
+        self._calls = set()
+        self.edits = 0
+
+    def start(self, key, seconds, render, on_timeout=None):
+        """Run a countdown of `seconds` under key (e.g. ("genlink", user_id)).
+
+        render(seconds_left) is awaited at each mark below `seconds`,
+        on_timeout() once the time is up unless cancel(key) came first.
+        Starting a key that is already running replaces it.
+        """
+        marks = [m for m in self.default_marks if m < seconds]
+        self._active[key] = Countdown(time.monotonic() + seconds, marks, render, on_timeout)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def cancel(self, key):
+        """Stop the countdown for key. Returns True if one was running."""
+        return self._active.pop(key, None) is not None
+
+    def active(self, key):
+        return key in self._active
+
+    def __len__(self):
+        return len(self._active)
+
+    async def _run(self):
+        while self._active:
+            await asyncio.sleep(self.tick)
+            now = time.monotonic()
+            for key, entry in list(self._active.items()):
+                left = entry.deadline - now
+                if left <= 0:
+                    del self._active[key]
+                    if entry.on_timeout:
+                        self._spawn(entry.on_timeout())
+                    continue
+
+                # skip straight to the lowest mark already reached
+                shown = None
+                while entry.marks and left <= entry.marks[0]:
+                    shown = entry.marks.pop(0)
+                if shown is not None:
+                    self.edits += 1
+                    self._spawn(entry.render(shown))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(self._call(coro))
+        self._calls.add(task)
+        task.add_done_callback(self._calls.discard)
+
+    @staticmethod
+    async def _call(coro):
+        try:
+            await coro
+        except Exception as e:
+            print(f"Countdown update failed: {e}")
+
+
+countdown = CountdownService()
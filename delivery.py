@@ -0,0 +1,112 @@
+# delivery.py
+from telegram.error import Forbidden
+
+# ============================================================
+# BULK DELIVERY
+# ============================================================
+#
+# Batches are sent and cleaned up with the plural Bot API methods
+# (copyMessages / deleteMessages), up to 100 ids per call, instead of one
+# request per message. If a chunk call fails as a whole, that chunk falls
+# back to the old one-call-per-message path so a single bad id never costs
+# the rest of the batch.
+
+BULK_CHUNK_SIZE = 100
+
+
+class DeliveryInterrupted(Exception):
+    """Delivery stopped part-way. `sent` holds the ids delivered before that."""
+
+    def __init__(self, sent, error):
+        super().__init__(str(error))
+        self.sent = sent
+        self.error = error
+
+
+def _chunks(ids, size=BULK_CHUNK_SIZE):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+async def copy_message_ids(bot, chat_id, from_chat_id, message_ids, protect_content=False):
+    """Copy messages in order. Returns the new message ids in chat_id.
+
+    Raises DeliveryInterrupted if it has to stop early (e.g. the user
+    blocked the bot), so the caller can still clean up what arrived.
+    """
+    # copyMessages wants strictly increasing ids
+    message_ids = sorted(set(message_ids))
+    sent = []
+    try:
+        for chunk in _chunks(message_ids):
+            await _copy_chunk(bot, chat_id, from_chat_id, chunk, protect_content, sent)
+    except Exception as e:
+        raise DeliveryInterrupted(sent, e) from e
+    return sent
+
+
+async def _copy_chunk(bot, chat_id, from_chat_id, chunk, protect_content, sent):
+    try:
+        result = await bot.copy_messages(
+            chat_id=chat_id,
+            from_chat_id=from_chat_id,
+            message_ids=chunk,
+            protect_content=protect_content
+        )
+        # ids that no longer exist are skipped by Telegram, not errors
+        sent.extend(m.message_id for m in result)
+        return
+    except Forbidden:
+        # user blocked the bot, nothing else will get through either
+        raise
+    except Exception as e:
+        print(f"⚠️ copy_messages failed for {chunk[0]}-{chunk[-1]}, copying one by one: {e}")
+
+    for msg_id in chunk:
+        try:
+            result = await bot.copy_message(
+                chat_id=chat_id,
+                from_chat_id=from_chat_id,
+                message_id=msg_id,
+                protect_content=protect_content
+            )
+            sent.append(result.message_id)
+        except Forbidden:
+            raise
+        except Exception as e:
+            print(f"Error copying message {msg_id}: {e}")
+
+
+async def copy_message_range(bot, chat_id, from_chat_id, first_msg_id, last_msg_id, protect_content=False):
+    """copy_message_ids for an inclusive id range."""
+    return await copy_message_ids(
+        bot, chat_id, from_chat_id, range(first_msg_id, last_msg_id + 1), protect_content
+    )
+
+
+async def delete_message_ids(bot, chat_id, message_ids):
+    """Delete messages in chat_id. Returns how many were deleted."""
+    message_ids = sorted(set(m for m in message_ids if m))
+    deleted = 0
+
+    for chunk in _chunks(message_ids):
+        try:
+            if await bot.delete_messages(chat_id=chat_id, message_ids=chunk):
+                deleted += len(chunk)
+                continue
+        except Forbidden:
+            return deleted
+        except Exception as e:
+            print(f"⚠️ delete_messages failed for {len(chunk)} messages, deleting one by one: {e}")
+
+        for msg_id in chunk:
+            try:
+                await bot.delete_message(chat_id, msg_id)
+                deleted += 1
+            except Forbidden:
+                return deleted
+            except Exception as e:
+                print(f"❌ Error deleting message {msg_id}: {e}")
+
+    return deleted
@@ -0,0 +1,242 @@
+# flush.py
+import os
+import json
+import copy
+import time
+import atexit
+import threading
+
+# ============================================================
+# WRITE-COALESCING FLUSH LAYER
+# ============================================================
+#
+# Each JSON state file is held in memory as a JsonDocument. Writers replace
+# or mutate the in-memory data and mark it dirty; a single background thread
+# writes dirty documents at most once per FLUSH_INTERVAL_MS. Every write goes
+# to a temp file first and is moved into place with os.replace, so a crash
+# never leaves a truncated file behind. Only a shallow copy is taken under
+# the document lock; large documents are written without indent and
+# serialised in slices, so the event loop keeps running during a flush.
+#
+# Documents created with delay=0 are written synchronously on every change
+# (still atomically) - used for small, rarely changed files that other code
+# may read straight from disk.
+
+FLUSH_INTERVAL_MS = int(os.getenv("FLUSH_INTERVAL_MS", "500"))
+DUMPS_CHUNK = 2000
+
+_MISSING = object()
+
+
+def atomic_write_json(path, data, indent=None):
+    """Serialise to a temp file next to path, fsync it and swap it in."""
+    payload = json.dumps(data, indent=indent)
+    _atomic_write_text(path, payload)
+
+
+def _atomic_write_text(path, payload):
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class JsonDocument:
+    """One JSON file cached in memory with debounced, atomic write-back."""
+
+    def __init__(self, path, default, indent=None, delay_ms=None):
+        self.path = path
+        self.default = default
+        self.indent = indent
+        self.delay = (FLUSH_INTERVAL_MS if delay_ms is None else delay_ms) / 1000
+        self.lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._data = _MISSING
+        self._dirty = False
+        self._version = 0
+        self._written_version = 0
+        self.writes = 0
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except:
+            return copy.deepcopy(self.default)
+
+    def get(self):
+        """The live in-memory object. Mutate it only while holding self.lock."""
+        with self.lock:
+            if self._data is _MISSING:
+                self._data = self._load()
+            return self._data
+
+    def snapshot(self):
+        """A deep copy that callers may freely modify."""
+        with self.lock:
+            return copy.deepcopy(self.get())
+
+    def set(self, data):
+        with self.lock:
+            self._data = data
+            self.mark_dirty()
+
+    def mark_dirty(self):
+        with self.lock:
+            if self.delay <= 0:
+                self._dirty = True
+                self.flush()
+                return
+            if not self._dirty:
+                self._dirty = True
+                _worker.schedule(self, time.monotonic() + self.delay)
+
+    def reload(self):
+        """Drop the cached copy; the next get() reads the file again."""
+        with self.lock:
+            if not self._dirty:
+                self._data = _MISSING
+
+    def flush(self):
+        # only a shallow copy is taken under the data lock; serialising a
+        # large document (users.json) happens outside it, so writers on the
+        # event loop never wait for json.dumps or the disk
+        with self.lock:
+            if not self._dirty:
+                return
+            data = _shallow_copy(self._data)
+            self._dirty = False
+            self._version += 1
+            version = self._version
+
+        with self._write_lock:
+            # a newer snapshot already landed, this one is stale
+            if version <= self._written_version:
+                return
+            try:
+                payload = _dumps(data, self.indent)
+                _atomic_write_text(self.path, payload)
+                self._written_version = version
+                self.writes += 1
+            except Exception as e:
+                # RuntimeError: an entry changed while it was being serialised
+                if not isinstance(e, RuntimeError):
+                    print(f"❌ Error writing {self.path}: {e}")
+                self._retry_later()
+
+    def _retry_later(self):
+        # keep the data dirty and retry on the next tick
+        with self.lock:
+            if not self._dirty:
+                self._dirty = True
+                _worker.schedule(self, time.monotonic() + max(self.delay, 1.0))
+
+
+def _dumps(data, indent=None):
+    """json.dumps, in slices for large unindented documents.
+
+    The C encoder holds the GIL for a whole call; encoding users.json in one
+    go would still freeze the event loop thread for that long.
+    """
+    if indent is not None or not isinstance(data, (list, dict)) or len(data) <= DUMPS_CHUNK:
+        return json.dumps(data, indent=indent)
+    if isinstance(data, list):
+        parts = [json.dumps(data[i:i + DUMPS_CHUNK])[1:-1] for i in range(0, len(data), DUMPS_CHUNK)]
+        return "[" + ", ".join(parts) + "]"
+    items = list(data.items())
+    parts = [json.dumps(dict(items[i:i + DUMPS_CHUNK]))[1:-1] for i in range(0, len(items), DUMPS_CHUNK)]
+    return "{" + ", ".join(parts) + "}"
+
+
+def _shallow_copy(data):
+    # entries are shared with the live data; writers mark the document dirty
+    # after changing one, so a write that raced a change is followed by another
+    if isinstance(data, list):
+        return list(data)
+    if isinstance(data, dict):
+        return dict(data)
+    return data
+
+
+class _FlushWorker:
+    """Background thread that writes dirty documents when their delay expires."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._due = {}
+        self._thread = None
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="json-flush", daemon=True)
+            self._thread.start()
+
+    def schedule(self, document, when):
+        with self._cond:
+            if document not in self._due or when < self._due[document]:
+                self._due[document] = when
+            self._ensure_thread()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due:
+                    self._cond.wait()
+                now = time.monotonic()
+                ready = [doc for doc, when in self._due.items() if when <= now]
+                if not ready:
+                    self._cond.wait(min(self._due.values()) - now)
+                    continue
+                for doc in ready:
+                    self._due.pop(doc, None)
+            for doc in ready:
+                doc.flush()
+
+    def flush_all(self):
+        with self._cond:
+            pending = list(self._due)
+            self._due.clear()
+        for doc in pending:
+            doc.flush()
+
+
+_worker = _FlushWorker()
+_documents = {}
+_documents_lock = threading.Lock()
+
+
+def document(path, default, indent=None, delay_ms=None):
+    """Return the shared JsonDocument for path, creating it on first use."""
+    with _documents_lock:
+        doc = _documents.get(path)
+        if doc is None:
+            doc = JsonDocument(path, default, indent=indent, delay_ms=delay_ms)
+            _documents[path] = doc
+            return doc
+        # the owning module declares the write policy; load_json() callers don't
+        if indent is not None:
+            doc.indent = indent
+        if delay_ms is not None:
+            doc.delay = delay_ms / 1000
+        return doc
+
+
+def load_json(path, default):
+    """Drop-in for the try/open/json.load pattern, served from memory."""
+    return document(path, default).snapshot()
+
+
+def flush_all():
+    """Write every pending document now. Call before exit or os.execl."""
+    _worker.flush_all()
+    with _documents_lock:
+        docs = list(_documents.values())
+    for doc in docs:
+        doc.flush()
+
+
+atexit.register(flush_all)
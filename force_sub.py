@@ -2,29 +2,35 @@ import os
 import asyncio
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from shared_functions import (
-    load_admins,
+from admin_registry import is_admin
+from shared_functions import begin_conversation
+from membership_cache import membership_cache
+from media_cache import send_cached_photo
+from countdown import countdown
+from async_storage import (
     load_settings,
     load_force_sub,
-    save_force_sub
+    save_force_sub,
+    add_join_request,
+    remove_join_request,
+    join_request_chats
 )
 
 OWNER_ID = 5373577888
 COUNTDOWN_SECONDS = 60
 
-# ─────────────────────────────────────────────
-# Utility
-# ─────────────────────────────────────────────
+# How many get_chat_member probes one force-sub check may run at once
+FSUB_CHECK_CONCURRENCY = int(os.getenv("FSUB_CHECK_CONCURRENCY", "8"))
 
-def is_admin(user_id: int) -> bool:
-    return user_id == OWNER_ID or user_id in load_admins()
+# Approve join requests to request-mode channels automatically
+FSUB_AUTO_APPROVE = os.getenv("FSUB_AUTO_APPROVE", "false").lower() in ("1", "true", "yes", "on")
 
 # ─────────────────────────────────────────────
 # UI Renderer
 # ─────────────────────────────────────────────
 
 async def render_fsub_menu(message, context):
-    channels = load_force_sub()
+    channels = await load_force_sub()
 
     keyboard = []
     for ch in channels:
@@ -66,22 +72,22 @@ async def force_sub_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # Countdown Timer
 # ─────────────────────────────────────────────
 
-async def fsub_countdown(message, context):
-    for i in range(COUNTDOWN_SECONDS, 0, -1):
-        if not context.user_data.get("waiting_fsub"):
-            return
-        try:
-            await message.edit_text(
-                f"📢 **Forward channel message**\n\n⏳ Time left: **{i}s**",
-                reply_markup=message.reply_markup,
-                parse_mode="Markdown"
-            )
-        except:
-            pass
-        await asyncio.sleep(1)
-
-    context.user_data.clear()
-    await message.edit_text("❌ Timeout! Please use /fsub again.")
+def start_fsub_countdown(message, context, user_id):
+    """Tick the "Forward channel message" prompt down (see countdown.py)."""
+    async def on_timeout():
+        context.user_data.clear()
+        await message.edit_text("❌ Timeout! Please use /fsub again.")
+
+    countdown.start(
+        ("fsub", user_id),
+        COUNTDOWN_SECONDS,
+        lambda i: message.edit_text(
+            f"📢 **Forward channel message**\n\n⏳ Time left: **{i}s**",
+            reply_markup=message.reply_markup,
+            parse_mode="Markdown"
+        ),
+        on_timeout
+    )
 
 # ─────────────────────────────────────────────
 # Button Handler
@@ -97,10 +103,10 @@ async def force_sub_button_handler(update: Update, context: ContextTypes.DEFAULT
     data = query.data
 
     if data == "fsub_add":
-        context.user_data["waiting_fsub"] = True
+        begin_conversation(context.user_data, "waiting_fsub")
 
-        await query.edit_message_text(
-            "📢 **Forward channel message**\n\n⏳ Time left: **60s**",
+        prompt = await query.edit_message_text(
+            f"📢 **Forward channel message**\n\n⏳ Time left: **{COUNTDOWN_SECONDS}s**",
             reply_markup=InlineKeyboardMarkup([
                 [
                     InlineKeyboardButton("🔙 Back", callback_data="fsub_back"),
@@ -110,20 +116,23 @@ async def force_sub_button_handler(update: Update, context: ContextTypes.DEFAULT
             parse_mode="Markdown"
         )
 
-        asyncio.create_task(fsub_countdown(query.message, context))
+        start_fsub_countdown(prompt, context, query.from_user.id)
 
     elif data == "fsub_back":
+        countdown.cancel(("fsub", query.from_user.id))
         context.user_data.clear()
         await render_fsub_menu(query.message, context)
 
     elif data == "fsub_close":
+        countdown.cancel(("fsub", query.from_user.id))
+        context.user_data.pop("waiting_fsub", None)
         await query.message.delete()
 
     elif data.startswith("fsub_delete_"):
         cid = int(data.split("_")[-1])
-        channels = load_force_sub()
+        channels = await load_force_sub()
         channels = [c for c in channels if c["id"] != cid]
-        save_force_sub(channels)
+        await save_force_sub(channels)
         await render_fsub_menu(query.message, context)
 
     elif data in ("fsub_mode_normal", "fsub_mode_request"):
@@ -147,7 +156,7 @@ async def force_sub_button_handler(update: Update, context: ContextTypes.DEFAULT
         ch["invite_link"] = invite.invite_link
         ch["mode"] = "request" if is_request_mode else "normal"
 
-        save_force_sub(load_force_sub() + [ch])
+        await save_force_sub(await load_force_sub() + [ch])
         context.user_data.clear()
 
         if is_request_mode:
@@ -195,11 +204,15 @@ async def forwarded_channel_handler(update: Update, context: ContextTypes.DEFAUL
     except Exception as e:
         return await message.reply_text("❌ Cannot verify bot permissions.")
 
-    channels = load_force_sub()
+    channels = await load_force_sub()
     if any(c["id"] == channel_id for c in channels):
         return await message.reply_text("❌ Channel already added.")
 
 
+    # Channel received: stop waiting, the mode buttons take it from here
+    context.user_data.pop("waiting_fsub", None)
+    countdown.cancel(("fsub", user_id))
+
     # SAVE CHANNEL
     context.user_data["pending_channel"] = {
         "id": channel_id,
@@ -223,59 +236,131 @@ async def forwarded_channel_handler(update: Update, context: ContextTypes.DEFAUL
         parse_mode="Markdown"
         )
     
+# ─────────────────────────────────────────────
+# Membership probes
+# ─────────────────────────────────────────────
+
+def is_subscribed(status, mode):
+    """Whether a chat member status satisfies a force-sub channel."""
+    # ❌ Always fail if left/kicked (or unknown)
+    if status is None or status in ("left", "kicked"):
+        return False
+    # ✅ Request mode → allow member / restricted
+    if mode == "request":
+        return status in ("member", "restricted", "administrator", "creator")
+    # ✅ Normal mode → must be member
+    return status in ("member", "administrator", "creator")
+
+
+def cached_memberships(channel_ids, user_id):
+    """{channel_id: status} from the membership cache, None where unknown."""
+    return {cid: membership_cache.get(user_id, cid) for cid in channel_ids}
+
+
+async def probe_memberships(bot, channel_ids, user_id):
+    """get_chat_member for every channel at once (bounded).
+
+    Returns {channel_id: status}, status None when the probe failed.
+    Results are stored in the membership cache.
+    """
+    semaphore = asyncio.Semaphore(FSUB_CHECK_CONCURRENCY)
+
+    async def probe(channel_id):
+        async with semaphore:
+            try:
+                member = await bot.get_chat_member(channel_id, user_id)
+                membership_cache.set(user_id, channel_id, member.status)
+                return member.status
+            except Exception:
+                return None
+
+    channel_ids = list(channel_ids)
+    statuses = await asyncio.gather(*(probe(cid) for cid in channel_ids))
+    return dict(zip(channel_ids, statuses))
+
+
+async def fsub_member_update_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """chat_member updates: keep the membership cache in step with joins/leaves/kicks."""
+    change = update.chat_member
+    if not change:
+        return
+
+    channel_ids = {ch["id"] for ch in await load_force_sub()}
+    if change.chat.id not in channel_ids:
+        return
+
+    user_id = change.new_chat_member.user.id
+    status = change.new_chat_member.status
+    membership_cache.set(user_id, change.chat.id, status)
+
+    # joined (request approved) or left/kicked: the request is no longer pending
+    if status != "restricted":
+        await remove_join_request(user_id, change.chat.id)
+
+
+async def fsub_join_request_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """chat_join_request updates: remember pending requests, optionally approve them."""
+    join_request = update.chat_join_request
+    if not join_request:
+        return
+
+    channels = {ch["id"]: ch for ch in await load_force_sub()}
+    channel = channels.get(join_request.chat.id)
+    if not channel or channel.get("mode") != "request":
+        return
+
+    user_id = join_request.from_user.id
+
+    if FSUB_AUTO_APPROVE:
+        try:
+            await join_request.approve()
+            membership_cache.set(user_id, join_request.chat.id, "member")
+            return
+        except Exception as e:
+            print(f"Error approving join request of {user_id} in {join_request.chat.id}: {e}")
+
+    await add_join_request(user_id, join_request.chat.id)
+
+
 # Force subscription check function
 async def check_force_subscription(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
     user_id: int
 ):
-    channels = load_force_sub()
+    channels = await load_force_sub()
     if not channels:
         return True
 
-    # Track request-mode channels already shown to this user
-    requested_channels = context.user_data.get("requested_channels", set())
+    # 🔒 REQUEST MODE → a pending join request counts as joined (local lookup)
+    if any(channel.get("mode") == "request" for channel in channels):
+        requested_channels = await join_request_chats(user_id)
+    else:
+        requested_channels = set()
+    to_check = [
+        channel for channel in channels
+        if not (channel.get("mode", "normal") == "request" and channel["id"] in requested_channels)
+    ]
+
+    # ⚡ Fast path: every channel answered by the membership cache
+    statuses = cached_memberships((ch["id"] for ch in to_check), user_id)
+    if all(is_subscribed(statuses[ch["id"]], ch.get("mode", "normal")) for ch in to_check):
+        return True
 
     temp_msg = await update.message.reply_text(
         "ᴄʜᴇᴄᴋɪɴɢ sᴜʙsᴄʀɪᴘᴛɪᴏɴ...."
     )
 
-    unsubscribed_channels = []
-
-    for channel in channels:
-        channel_id = channel["id"]
-        mode = channel.get("mode", "normal")
-
-        # 🔒 REQUEST MODE → show force-sub only once
-        if mode == "request" and channel_id in requested_channels:
-            continue
+    # Probe the rest concurrently: one round trip instead of one per channel
+    missing = [cid for cid, status in statuses.items() if status is None]
+    if missing:
+        statuses.update(await probe_memberships(context.bot, missing, user_id))
 
-        try:
-            member = await context.bot.get_chat_member(channel_id, user_id)
-            status = member.status
+    unsubscribed_channels = [
+        channel for channel in to_check
+        if not is_subscribed(statuses.get(channel["id"]), channel.get("mode", "normal"))
+    ]
 
-            # ❌ Always fail if left/kicked
-            if status in ("left", "kicked"):
-                unsubscribed_channels.append(channel)
-                continue
-
-            # ✅ Normal mode → must be member
-            if mode == "normal":
-                if status in ("member", "administrator", "creator"):
-                    continue
-                unsubscribed_channels.append(channel)
-                continue
-
-            # ✅ Request mode → allow member / restricted
-            if mode == "request":
-                if status in ("member", "restricted", "administrator", "creator"):
-                    continue
-                unsubscribed_channels.append(channel)
-                continue
-
-        except Exception:
-            unsubscribed_channels.append(channel)
-            continue 
     # ❌ Still not verified
     if unsubscribed_channels:
         await asyncio.sleep(0.5)
@@ -285,7 +370,7 @@ async def check_force_subscription(
         )
         await asyncio.sleep(0.4)
         await temp_msg.delete()
-        await send_force_sub_message(update, context, unsubscribed_channels)
+        await send_force_sub_message(update, context, unsubscribed_channels, statuses, requested_channels)
         return False
 
     # ✅ Verified
@@ -301,41 +386,46 @@ async def check_force_subscription(
 async def send_force_sub_message(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
-    channels
+    channels,
+    statuses=None,
+    requested_channels=None
 ):
-    settings = load_settings()
+    settings = await load_settings()
     force_sub_image = settings.get("force_sub_image", "")
 
     user_id = update.effective_user.id
 
-    # Track request-mode channels already shown
-    requested_channels = context.user_data.get("requested_channels", set())
+    # Request-mode channels the user already asked to join
+    if requested_channels is None:
+        requested_channels = await join_request_chats(user_id)
 
     # 🔥 FINAL FILTER (CRITICAL)
     filtered_channels = []
 
+    # Reuse the statuses from check_force_subscription as they are: a channel
+    # whose probe failed stays None instead of being probed a second time
+    if statuses is None:
+        statuses = cached_memberships((ch["id"] for ch in channels), user_id)
+        missing = [cid for cid, status in statuses.items() if status is None]
+        if missing:
+            statuses.update(await probe_memberships(context.bot, missing, user_id))
+
     for ch in channels:
         channel_id = ch["id"]
         mode = ch.get("mode", "normal")
 
-        # ❌ Skip request-mode channels already shown once
+        # ❌ Skip request-mode channels with a pending join request
         if mode == "request" and channel_id in requested_channels:
             continue
 
-        try:
-            member = await context.bot.get_chat_member(channel_id, user_id)
-            status = member.status
-            
-            # ❌ Skip already joined channels
-            if status in ("member", "administrator", "creator"):
-                continue
-
-        except Exception:
-            # Request-mode pending join → allow only once
-            if mode == "request":
-                pass
-            else:
+        status = statuses.get(channel_id)
+        if status is None:
+            # Request-mode: unknown status, still show the request link
+            if mode != "request":
                 continue
+        # ❌ Skip already joined channels
+        elif status in ("member", "administrator", "creator"):
+            continue
 
         filtered_channels.append(ch)
 
@@ -394,14 +484,13 @@ async def send_force_sub_message(
     # 🖼️ Send message
     if force_sub_image and os.path.exists(force_sub_image):
         try:
-            with open(force_sub_image, "rb") as photo:
-                await context.bot.send_photo(
-                    chat_id=update.effective_chat.id,
-                    photo=photo,
-                    caption=text,
-                    reply_markup=keyboard,
-                    parse_mode="Markdown"
-                )
+            await send_cached_photo(force_sub_image, lambda photo: context.bot.send_photo(
+                chat_id=update.effective_chat.id,
+                photo=photo,
+                caption=text,
+                reply_markup=keyboard,
+                parse_mode="Markdown"
+            ))
         except Exception as e:
             print(f"Error sending photo: {e}")
             await context.bot.send_message(
@@ -418,8 +507,3 @@ async def send_force_sub_message(
             parse_mode="Markdown"
         )
 
-    # ✅ Mark request-mode channels as shown (ONLY AFTER SENDING)
-    requested_channels.update(
-        ch["id"] for ch in filtered_channels if ch.get("mode") == "request"
-    )
-    context.user_data["requested_channels"] = requested_channels
@@ -1,26 +1,10 @@
-import json
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from permission import CheckBotAdmin
+from settings_store import load_settings
+from media_cache import send_cached_photo
 
-# Load admin data
-def load_admins():
-    try:
-        with open('admins.json', 'r') as f:
-            return json.load(f)
-    except:
-        return []
 
-# Load settings
-def load_settings():
-    try:
-        with open('settings.json', 'r') as f:
-            return json.load(f)
-    except:
-        return {
-            "help_image": "",
-            "help_text": "Available Commands:\\n\\n/start - Start the bot\\n/help - Show this help message\\n/genlink - Generate link\\n/batchlink - Generate batch links\\n/custombatch - Custom batch processing\\n/fsub - Force subscribe\\n/settings - Bot settings\\n/promote - Promote user to admin\\n/demote - Demote admin\\n/ban - Ban user\\n/unban - Unban user\\n/users - Show users\\n/admins - Show admins\\n/update - Update bot\\n/restart - Restart bot"
-        }
 @CheckBotAdmin()
 async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -43,13 +27,12 @@ async def help_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Send message with image if available
     if help_image:
         try:
-            with open(help_image, 'rb') as photo:
-                await context.bot.send_photo(
-                    chat_id=update.effective_chat.id,
-                    photo=photo,
-                    caption=help_text,
-                    reply_markup=reply_markup
-                )
+            await send_cached_photo(help_image, lambda photo: context.bot.send_photo(
+                chat_id=update.effective_chat.id,
+                photo=photo,
+                caption=help_text,
+                reply_markup=reply_markup
+            ))
         except FileNotFoundError:
             # If image not found, send text only
             await context.bot.send_message(
@@ -97,14 +80,13 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if query.message.photo:
             # Current message has photo, so we need to send new start message
             try:
-                with open(start_image, 'rb') as photo:
-                    await context.bot.send_photo(
-                        chat_id=update.effective_chat.id,
-                        photo=photo,
-                        caption=start_text,
-                        reply_markup=reply_markup,
-                        parse_mode='HTML'
-                    )
+                await send_cached_photo(start_image, lambda photo: context.bot.send_photo(
+                    chat_id=update.effective_chat.id,
+                    photo=photo,
+                    caption=start_text,
+                    reply_markup=reply_markup,
+                    parse_mode='HTML'
+                ))
                 await query.message.delete()
             except FileNotFoundError:
                 await context.bot.send_message(
@@ -118,15 +100,14 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Current message is text, edit it to show start menu
             try:
                 # Try to send photo if start image exists
-                with open(start_image, 'rb') as photo:
-                    await context.bot.send_photo(
-                        chat_id=update.effective_chat.id,
-                        photo=photo,
-                        caption=start_text,
-                        reply_markup=reply_markup,
-                        parse_mode='HTML'
-                    )
-                    await query.message.delete()
+                await send_cached_photo(start_image, lambda photo: context.bot.send_photo(
+                    chat_id=update.effective_chat.id,
+                    photo=photo,
+                    caption=start_text,
+                    reply_markup=reply_markup,
+                    parse_mode='HTML'
+                ))
+                await query.message.delete()
             except FileNotFoundError:
                 # If no image, edit current text message
                 await query.edit_message_text(
@@ -0,0 +1,158 @@
+# link_codec.py
+import os
+import hmac
+import base64
+import hashlib
+import secrets
+
+# ============================================================
+# STATELESS LINK CODEC
+# ============================================================
+#
+# A /start payload carries everything needed to serve it:
+#
+#   byte 0      header: (LINK_VERSION << 4) | kind  (0 = single, 1 = batch)
+#   varints     zigzag(chat_id), message_id             single
+#               zigzag(chat_id), first_id, last-first   batch
+#   6 bytes     truncated HMAC-SHA256 over everything above
+#
+# urlsafe-base64 without padding, e.g. 20 chars for a channel message
+# instead of 27 for the old base64("chat_id:message_id"). The bot checks
+# the tag and resolves the link without touching the link store.
+#
+# Old payloads are base64 of plain text, so their first byte is printable
+# ASCII and can never be mistaken for a header here; decode_link() returns
+# None for them and callers fall back to the stored record.
+#
+# The HMAC key comes from LINK_SECRET (recommended in production), or is
+# generated once into LINK_SECRET_FILE (default link_secret.key, readable by
+# the owner only and git-ignored). Anyone holding the key can forge links;
+# changing it invalidates every new-style link.
+
+LINK_VERSION = 1
+KIND_SINGLE = 0
+KIND_BATCH = 1
+
+TAG_SIZE = 6
+SECRET_FILE = os.getenv("LINK_SECRET_FILE", "link_secret.key")
+
+_secret = None
+
+
+def _get_secret():
+    global _secret
+    if _secret is not None:
+        return _secret
+
+    env_secret = os.getenv("LINK_SECRET")
+    if env_secret:
+        _secret = env_secret.encode()
+        return _secret
+
+    try:
+        with open(SECRET_FILE, "rb") as f:
+            _secret = f.read().strip()
+    except FileNotFoundError:
+        _secret = secrets.token_hex(32).encode()
+        # owner-only from the start, never world-readable in between
+        fd = os.open(SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(_secret)
+        print(f"🔑 Generated new link signing key in {SECRET_FILE}")
+    return _secret
+
+
+# ---------------- varints ----------------
+
+def _zigzag(n):
+    return (n << 1) ^ (n >> 63)
+
+
+def _unzigzag(n):
+    return (n >> 1) ^ -(n & 1)
+
+
+def _put_varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data) or shift > 63:
+            raise ValueError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+# ---------------- encode / decode ----------------
+
+def _sign(body):
+    return hmac.new(_get_secret(), bytes(body), hashlib.sha256).digest()[:TAG_SIZE]
+
+
+def _pack(kind, numbers):
+    body = bytearray([(LINK_VERSION << 4) | kind])
+    for n in numbers:
+        _put_varint(body, n)
+    body += _sign(body)
+    return base64.urlsafe_b64encode(bytes(body)).decode().rstrip("=")
+
+
+def encode_link(chat_id, message_id):
+    """Payload for a single stored message."""
+    return _pack(KIND_SINGLE, (_zigzag(chat_id), message_id))
+
+
+def encode_batch_link(chat_id, first_message_id, last_message_id):
+    """Payload for an inclusive range of messages in one chat."""
+    return _pack(KIND_BATCH, (_zigzag(chat_id), first_message_id, last_message_id - first_message_id))
+
+
+def decode_link(payload):
+    """Resolve a new-style payload to link data, or None if it isn't one (or the tag is wrong)."""
+    try:
+        padding = -len(payload) % 4
+        data = base64.urlsafe_b64decode(payload + "=" * padding)
+    except Exception:
+        return None
+
+    if len(data) < 1 + TAG_SIZE or data[0] >> 4 != LINK_VERSION:
+        return None
+
+    body, tag = data[:-TAG_SIZE], data[-TAG_SIZE:]
+    if not hmac.compare_digest(tag, _sign(body)):
+        return None
+
+    kind = data[0] & 0x0F
+    try:
+        chat_id, pos = _get_varint(body, 1)
+        chat_id = _unzigzag(chat_id)
+        if kind == KIND_SINGLE:
+            message_id, pos = _get_varint(body, pos)
+            if pos != len(body):
+                return None
+            return {"chat_id": chat_id, "message_id": message_id}
+        if kind == KIND_BATCH:
+            first_id, pos = _get_varint(body, pos)
+            span, pos = _get_varint(body, pos)
+            if pos != len(body):
+                return None
+            return {
+                "type": "batch",
+                "chat_id": chat_id,
+                "first_message_id": first_id,
+                "last_message_id": first_id + span,
+                "total_messages": span + 1
+            }
+    except ValueError:
+        return None
+    return None
@@ -1,6 +1,4 @@
 import os
-import json
-import base64
 import asyncio
 from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -10,105 +8,52 @@ from force_sub import check_force_subscription
 from middleware import check_ban_and_register
 from shortened import load_shortener, shorten_url
 from permission import CheckBotAdmin
+from async_storage import put_link, resolve_link, load_settings, touch_user
+from shared_functions import begin_conversation
+from link_codec import encode_link
+from auto_delete import auto_delete
+from countdown import countdown
 
-# Load settings
-def load_settings():
-    try:
-        with open('settings.json', 'r') as f:
-            return json.load(f)
-    except:
-        return {
-            "auto_delete_time": 10,
-            "protect_content": False
-        }
-
-# Load links data
-def load_links():
-    try:
-        with open('links.json', 'r') as f:
-            return json.load(f)
-    except:
-        return {}
-
-# Save links data
-def save_links(links):
-    with open('links.json', 'w') as f:
-        json.dump(links, f)
+GENLINK_TIMEOUT = 60
 
-# Encode file ID to base64
-def encode_file_id(file_id):
-    encoded = base64.urlsafe_b64encode(file_id.encode()).decode()
-    # Remove padding to make URL shorter
-    return encoded.rstrip('=')
-
-# Decode base64 to file ID
-def decode_file_id(encoded_id):
-    # Add padding back if needed
-    padding = 4 - (len(encoded_id) % 4)
-    if padding != 4:
-        encoded_id += '=' * padding
-    try:
-        return base64.urlsafe_b64decode(encoded_id.encode()).decode()
-    except:
-        return None
-        
 @check_ban_and_register
 @CheckBotAdmin()
 async def genlink_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
 
     # Set waiting mode
-    context.user_data["waiting_for_genlink"] = True
-    context.user_data["stop_timer"] = False
+    begin_conversation(context.user_data, "waiting_for_genlink")
 
     # Send initial message
     sent = await update.message.reply_text(
-         f"> ᴘʟᴇᴀsᴇ sᴇɴᴅ ᴏʀ ғᴏʀᴡᴀʀᴅ ᴀ ᴍᴇssᴀɢᴇ ᴛᴏ ɢᴇɴᴇʀᴀᴛᴇ ᴀ ʟɪɴᴋ\\.\n"
-         f"ᴛɪᴍᴇᴏᴜᴛ\\: 60s ʀᴇᴍᴀɪɴɪɴɢ",
+         genlink_prompt_text(GENLINK_TIMEOUT),
         parse_mode="MarkdownV2"
      )
 
     # Save message for editing
     context.user_data["genlink_wait_msg"] = sent
 
-    # Start countdown
-    context.user_data["timer_task"] = asyncio.create_task(
-        genlink_countdown(context)
-        )
-
-async def genlink_countdown(context):
-    msg = context.user_data.get("genlink_wait_msg")
-
-    for seconds in range(60, 0, -1):
-
-        # Stop instantly if user sends message
-        if context.user_data.get("stop_timer"):
-            return
-
-        text = (
-            f"> ᴘʟᴇᴀsᴇ sᴇɴᴅ ᴏʀ ғᴏʀᴡᴀʀᴅ ᴀ ᴍᴇssᴀɢᴇ ᴛᴏ ɢᴇɴᴇʀᴀᴛᴇ ᴀ ʟɪɴᴋ\\.\n"
-            f"ᴛɪᴍᴇᴏᴜᴛ\\: {seconds}s ʀᴇᴍᴀɪɴɪɴɢ"
+    # Start countdown (edited at a few marks, see countdown.py)
+    async def on_timeout():
+        context.user_data["waiting_for_genlink"] = False
+        timeout_text = (
+            "ᴛɪᴍᴇᴏᴜᴛ ❌"
+            "ᴘʟᴇᴀsᴇ ᴜsᴇ /genlink ᴀɢᴀɪɴ\\."
         )
+        await sent.edit_text(timeout_text, parse_mode="MarkdownV2")
 
-        try:
-            await msg.edit_text(text, parse_mode="MarkdownV2")
-        except:
-            pass
-
-        await asyncio.sleep(1)
-
-    # Timer finished → timeout
-    context.user_data["waiting_for_genlink"] = False
-
-    timeout_text = (
-        "ᴛɪᴍᴇᴏᴜᴛ ❌"
-        "ᴘʟᴇᴀsᴇ ᴜsᴇ /genlink ᴀɢᴀɪɴ\\."
+    countdown.start(
+        ("genlink", user_id),
+        GENLINK_TIMEOUT,
+        lambda seconds: sent.edit_text(genlink_prompt_text(seconds), parse_mode="MarkdownV2"),
+        on_timeout
     )
 
-    try:
-        await msg.edit_text(timeout_text, parse_mode="MarkdownV2")
-    except:
-        pass
+def genlink_prompt_text(seconds):
+    return (
+        f"> ᴘʟᴇᴀsᴇ sᴇɴᴅ ᴏʀ ғᴏʀᴡᴀʀᴅ ᴀ ᴍᴇssᴀɢᴇ ᴛᴏ ɢᴇɴᴇʀᴀᴛᴇ ᴀ ʟɪɴᴋ\\.\n"
+        f"ᴛɪᴍᴇᴏᴜᴛ\\: {seconds}s ʀᴇᴍᴀɪɴɪɴɢ"
+    )
 
 @check_ban_and_register
 async def genlink_next_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -119,11 +64,7 @@ async def genlink_next_message(update: Update, context: ContextTypes.DEFAULT_TYP
 
     # Stop waiting + stop countdown
     context.user_data["waiting_for_genlink"] = False
-    context.user_data["stop_timer"] = True
-
-    timer = context.user_data.get("timer_task")
-    if timer:
-        timer.cancel()
+    countdown.cancel(("genlink", update.effective_user.id))
 
     # Update waiting message to show progress
     wait_msg = context.user_data.get("genlink_wait_msg")
@@ -135,21 +76,18 @@ async def genlink_next_message(update: Update, context: ContextTypes.DEFAULT_TYP
     msg = update.message
     user_id = update.effective_user.id
 
-    # Create encoded ID
-    file_id = f"{msg.chat_id}:{msg.message_id}"
-    encoded_id = encode_file_id(file_id)
+    # Create signed link payload
+    encoded_id = encode_link(msg.chat_id, msg.message_id)
     bot_username = context.bot.username
     link = f"https://t.me/{bot_username}?start={encoded_id}"
 
-    # Save link
-    links = load_links()
-    links[encoded_id] = {
+    # Keep a record of the link (the payload itself resolves without it)
+    await put_link(encoded_id, {
         "chat_id": msg.chat_id,
         "message_id": msg.message_id,
         "created_at": datetime.utcnow().isoformat(),
         "created_by": user_id
-    }
-    save_links(links)
+    })
 
     # Show generated link
     share_url = f"https://telegram.me/share/url?url={link}"
@@ -194,37 +132,27 @@ async def start_link_handler(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def process_link_after_force_sub(update: Update, context: ContextTypes.DEFAULT_TYPE, encoded_id):
     """Process the link after user passes force subscription check"""
     user_id = update.effective_user.id
-    
-    # Check if it's a batch link
-    is_batch = await handle_batch_start(update, context, encoded_id)
-    
-    if is_batch:
-        return  # Batch link handled
-        
-    file_id = decode_file_id(encoded_id)
-    
-    if not file_id:
-        await update.message.reply_text("❌ Invalid link!")
-        return
 
-        # Check if it's a batch link
-    is_batch = await handle_batch_start(update, context, encoded_id)
-    
-    if is_batch:
-        return  # Batch link handled
-    
-    links = load_links()
-    if encoded_id not in links:
+    # Signed payloads decode locally; only pre-codec links hit storage
+    link_data = await resolve_link(encoded_id)
+    if not link_data:
         await update.message.reply_text("❌ Link expired or not found!")
         return
+
+    # "opened a link" segment for /broadcast
+    await touch_user(user_id, opened_link=True)
+
+    # Check if it's a batch link
+    if link_data.get("type") == "batch":
+        await handle_batch_start(update, context, encoded_id, link_data)
+        return
     
-    link_data = links[encoded_id]
     chat_id = link_data["chat_id"]
     message_id = link_data["message_id"]
     
     try:
         # Forward the original message
-        settings = load_settings()
+        settings = await load_settings()
         protect_content = settings.get("protect_content", False)
         
         forwarded_msg = await context.bot.copy_message(
@@ -238,39 +166,20 @@ async def process_link_after_force_sub(update: Update, context: ContextTypes.DEF
         auto_delete_time = settings.get("auto_delete_time", 10)
         warning_msg = await update.message.reply_text(f"> *⚠️ ɪᴍᴘᴏʀᴛᴀɴᴛ\\:*\n\n> *ᴛʜɪs ғɪʟᴇ ᴡɪʟʟ ʙᴇ ᴅᴇʟᴇᴛᴇᴅ ɪɴ {auto_delete_time} ᴍɪɴᴜᴛᴇs\\. ᴘʟᴇᴀsᴇ sᴀᴠᴇ ᴏʀ ғᴏʀᴡᴀʀᴅ ɪᴛ ᴛᴏ ʏᴏᴜʀ sᴀᴠᴇᴅ ᴍᴇssᴀɢᴇs ʙᴇғᴏʀᴇ ɪᴛ ɢᴇᴛs ʀᴇᴍᴏᴠᴇᴅ\\.*",
         parse_mode = "MarkdownV2")
-        # Schedule deletion without sending warning message first
-        asyncio.create_task(
-            delete_and_notify(
-                context, 
-                update.effective_chat.id, 
-                forwarded_msg.message_id,
-                warning_msg.message_id,
-                auto_delete_time,
-                encoded_id
-            )
+        # Schedule deletion (persisted, survives restarts)
+        auto_delete.schedule(
+            update.effective_chat.id,
+            [forwarded_msg.message_id, warning_msg.message_id],
+            auto_delete_time * 60,
+            kind="file",
+            encoded_id=encoded_id
         )
         
     except Exception as e:
         await update.message.reply_text("❌ Error retrieving file. It may have been deleted.")
 
-async def delete_and_notify(context, chat_id, file_msg_id, warning_msg_id, delay_minutes, encoded_id):
-    """Delete file after delay and send retrieval message"""
-    
-    # Wait for the specified time
-    await asyncio.sleep(delay_minutes * 60)
-    
-    try:
-        # Delete the file message
-        await context.bot.delete_message(chat_id, file_msg_id)
-    except Exception as e:
-        print(f"Error deleting file message: {e}")
-        
-    try:
-        await context.bot.delete_message(chat_id, warning_msg_id)
-    except Exception as e:
-        print(f"Error deleting warning message: {e}")
-        
-    # Send retrieval message after deletion
+async def send_file_retrieval_message(bot, chat_id, encoded_id):
+    """Sent by the auto-delete scheduler once the file is gone"""
     completion_text = (
         "*✅ ʏᴏᴜʀ ғɪʟᴇ/ᴠɪᴅᴇᴏ ʜᴀs ʙᴇᴇɴ sᴜᴄᴄᴇssғᴜʟʟʏ ᴅᴇʟᴇᴛᴇᴅ\\!*\n\n"
         "> *ɪғ ʏᴏᴜ ᴡᴀɴᴛ ᴛᴏ ʀᴇᴛʀɪᴇᴠᴇ ɪᴛ ᴀɢᴀɪɴ, ᴄʟɪᴄᴋ ᴛʜᴇ \"♻️ ᴄʟɪᴄᴋ ʜᴇʀᴇ\" ʙᴜᴛᴛᴏɴ\\. ɪғ ɴᴏᴛ, sɪᴍᴘʟʏ ᴄʟᴏsᴇ ᴛʜɪs ᴍᴇssᴀɢᴇ\\.*"
@@ -278,13 +187,13 @@ async def delete_and_notify(context, chat_id, file_msg_id, warning_msg_id, delay
     
     keyboard = InlineKeyboardMarkup([
         [
-            InlineKeyboardButton("♻️ ᴄʟɪᴄᴋ ʜᴇʀᴇ", url=f"https://t.me/{context.bot.username}?start={encoded_id}"),
+            InlineKeyboardButton("♻️ ᴄʟɪᴄᴋ ʜᴇʀᴇ", url=f"https://t.me/{bot.username}?start={encoded_id}"),
             InlineKeyboardButton("✖︎ ᴄʟᴏsᴇ", callback_data=f"link_close")
         ]
     ])
     
     try:
-        retrieval_msg = await context.bot.send_message(
+        retrieval_msg = await bot.send_message(
             chat_id=chat_id,
             text=completion_text,
             reply_markup=keyboard,
@@ -325,14 +234,6 @@ async def link_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
             parse_mode="Markdown"
         )
     
-# Load admin data
-def load_admins():
-    try:
-        with open('admins.json', 'r') as f:
-            return json.load(f)
-    except:
-        return [5373577888]
-
 # Import regular start handler from start.py
 async def regular_start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     from start import start_handler
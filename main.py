@@ -1,27 +1,41 @@
 import os
 import json
 import logging
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
+from telegram import Update
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ChatMemberHandler, ChatJoinRequestHandler
 from dotenv import load_dotenv
+# Load environment (bot token, storage backend, tuning knobs) before the
+# modules below read their settings at import time
+load_dotenv("Bot_Token.env")
 # Import handlers from all modules
 from start import start_handler, button_handler as start_button_handler
 from help import help_handler, button_handler as help_button_handler
-from links import genlink_handler, start_link_handler, link_button_handler, genlink_next_message
-from settings import settings_handler, settings_button_handler, settings_message_handler
-from batch_link import batchlink_handler, batch_message_handler, batch_button_handler
-from force_sub import force_sub_handler, force_sub_button_handler, forwarded_channel_handler, check_force_subscription
-from broadcast import broadcast_handler, broadcast_status_handler, broadcast_button_handler
+from links import genlink_handler, start_link_handler, link_button_handler
+from settings import settings_handler, settings_button_handler
+from batch_link import batchlink_handler, batch_button_handler
+from force_sub import force_sub_handler, force_sub_button_handler, check_force_subscription, fsub_member_update_handler, fsub_join_request_handler
+from broadcast import broadcast_handler, broadcast_status_handler, broadcast_button_handler, resume_broadcast
 from ban import ban_handler, unban_handler, ban_button_handler
 from users import users_handler, users_button_handler
 from admins import admins_handler, admins_button_handler
 from restart import restart_bot
 from update import update_bot
-from shortened import shortener_handler, shortlink_handler, shortener_button_handler, shortener_api_handler, shortlink_button_handler, shortlink_wait_handler 
+from shortened import shortener_handler, shortlink_handler, shortener_button_handler, shortlink_button_handler
 from ping import ping_command
 from stats import stats_command
 from alive import alive_command
 from mkadmin import register_mkadmin_handlers
-from shared_functions import ensure_admin_files_exist
+from conversation_router import register_conversation_router
+from middleware import register_middleware
+from webhook import webhook_enabled, run_webhook
+from update_processor import update_processor
+from shared_functions import ensure_admin_files_exist, load_id_sets
+from storage import init_storage
+from flush import flush_all
+from async_storage import shutdown_io, run_io
+from settings_store import DEFAULT_SETTINGS
+from rate_limiter import rate_limiter
+from auto_delete import auto_delete
 
 # Set up logging
 logging.basicConfig(
@@ -29,14 +43,6 @@ logging.basicConfig(
     level=logging.INFO
 )
 
-# Load admin data for verification
-def load_admins():
-    try:
-        with open('admins.json', 'r') as f:
-            return json.load(f)
-    except:
-        return [5373577888]
-
 # Load or create JSON files
 def load_json_files():
     json_files = ['links.json', 'files.json', 'admins.json', 'users.json', 'settings.json']
@@ -54,29 +60,36 @@ def load_json_files():
                     print(f"Created {file}")
                 
                 elif file == 'settings.json':
-                    default_settings = {
-                        "start_image": "img.jpg",
-                        "help_image": "",
-                        "start_text": "Hi {mention} welcome to File Store Bot",
-                        "help_text": "Available Commands:\n\n/start - Start the bot\n/help - Show this help message\n/genlink - Generate link\n/batchlink - Generate batch links\n/custombatch - Custom batch processing\n/fsub - Force subscribe\n/settings - Bot settings\n/promote - Promote user to admin\n/demote - Demote admin\n/ban - Ban user\n/unban - Unban user\n/users - Show users\n/admins - Show admins\n/update - Update bot\n/restart - Restart bot",
-                        "auto_delete_time": 10,
-                        "protect_content": False
-                    }
-                    json.dump(default_settings, f, indent=4)
+                    json.dump(DEFAULT_SETTINGS, f, indent=4)
                     print(f"Created {file} with default settings")
                 
                 else:
                     json.dump({}, f)  # Empty dict for links and files
                     print(f"Created {file}")
 
+# Reload pending auto-deletes and start their timer loop, pick up an
+# interrupted broadcast
+async def on_startup(application):
+    # user / ban / inactive id sets, so the update gate never loads them on the loop
+    await run_io(load_id_sets)
+    auto_delete.start(application.bot)
+    await resume_broadcast(application.bot)
+
+# Finish queued storage calls and write any debounced JSON state before exit
+async def on_shutdown(application):
+    await auto_delete.stop()
+    shutdown_io()
+    flush_all()
+
 def main():
     # Load JSON files
     print("Initializing JSON files...")
     load_json_files()
     # Ensure admin-related files exist
     ensure_admin_files_exist()
+    # Open links/users/bans storage
+    init_storage()
     # Get bot token from environment variable
-    load_dotenv("Bot_Token.env")
     TOKEN = os.getenv('BOT_TOKEN')
     if not TOKEN:
         print("❌ ERROR: Please set BOT_TOKEN environment variable")
@@ -96,7 +109,10 @@ def main():
     .write_timeout(20)
     .connect_timeout(10)
     .pool_timeout(10)
-    .concurrent_updates(True)
+    .concurrent_updates(update_processor)
+    .rate_limiter(rate_limiter)
+    .post_init(on_startup)
+    .post_shutdown(on_shutdown)
     .build())
 
     if hasattr(application.updater, 'job_queue') and hasattr(application.updater.job_queue, 'scheduler'):
@@ -104,6 +120,9 @@ def main():
                 timezone="UTC",
                 max_workers=5 # Reduce worker threads for Termux
             )
+    # Ban check + user registration, once per update before everything else
+    register_middleware(application)
+
     # Add command handlers
     print("📝 Adding command handlers...")
     
@@ -134,23 +153,18 @@ def main():
     application.add_handler(CallbackQueryHandler(start_button_handler, pattern="^start_"))
 
     # Batch_Link module callbacks
-    # Message handlers - order matters!
-    application.add_handler(MessageHandler(filters.FORWARDED, forwarded_channel_handler),
-    group=0)  # Force sub first
-    application.add_handler(MessageHandler(filters.TEXT | filters.FORWARDED, batch_message_handler),
-    group=2)  # Batch second
     application.add_handler(CallbackQueryHandler(batch_button_handler, pattern="^copy_batch_"))
     application.add_handler(CallbackQueryHandler(force_sub_button_handler, pattern="^fsub_"))
+    # Joins/leaves/kicks in force-sub channels update the membership cache
+    application.add_handler(ChatMemberHandler(fsub_member_update_handler, ChatMemberHandler.CHAT_MEMBER))
+    # Join requests to request-mode channels are recorded (and optionally approved)
+    application.add_handler(ChatJoinRequestHandler(fsub_join_request_handler))
     # Help module callbacks  
     application.add_handler(CallbackQueryHandler(help_button_handler, pattern="^help_"))
 
     application.add_handler(CallbackQueryHandler(broadcast_button_handler, pattern="^broadcast_"))
     # Links module callbacks
     application.add_handler(CallbackQueryHandler(link_button_handler, pattern="^link_"))
-    application.add_handler(
-    MessageHandler(~filters.COMMAND, genlink_next_message),
-    group=3
-    )
     application.add_handler(CallbackQueryHandler(link_button_handler, pattern="^copy_original_"))
     
     # Settings module callbacks - multiple patterns
@@ -163,24 +177,14 @@ def main():
     application.add_handler(CallbackQueryHandler(users_button_handler, pattern="^users_"))
     application.add_handler(CallbackQueryHandler(admins_button_handler, pattern="^admins_"))
 
-    # Add message handler for API input
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, shortener_api_handler),
-    group=1)
-
     # Add callback query handlers
     application.add_handler(CallbackQueryHandler(shortener_button_handler, pattern="^shortener_"))
     application.add_handler(CallbackQueryHandler(shortlink_button_handler, pattern="^shortlink_"))
-    application.add_handler(MessageHandler(filters.ALL & ~filters.COMMAND, shortlink_wait_handler), 
-    group=4)
-    # Message handlers for settings (image and text input)
-    print("📨 Adding message handlers...")
-    # For handling images (start/help/force sub)
-    application.add_handler(MessageHandler(filters.PHOTO, settings_message_handler),
-    group=0)
 
-    # For handling text updates (start/help/db channel)
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, settings_message_handler),
-    group=0)
+    # Replies to multi-step commands (fsub, settings, shortener, batch, genlink,
+    # shortlink, feedback) - one handler dispatches on the user's waiting state
+    print("📨 Adding message handlers...")
+    register_conversation_router(application)
 
     register_mkadmin_handlers(application)
 
@@ -207,7 +211,7 @@ def main():
     print("   - Customizable start/help messages and images")
     print("   - Protect content (forwarding restrictions)")
     print("   - Permanent links with base64 encoding")
-    print("   - JSON-based data storage")
+    print("   - JSON or SQLite data storage (STORAGE_BACKEND)")
     print("   - Batch_Link checked ✅")
     print("   - Force_Sub checked ✅")
     # Get bot info
@@ -233,7 +237,11 @@ def main():
     print("Press Ctrl+C to stop the bot")
     
     try:
-        application.run_polling()
+        if webhook_enabled():
+            run_webhook(application)
+        else:
+            # chat_member updates are only delivered when asked for explicitly
+            application.run_polling(allowed_updates=Update.ALL_TYPES)
     except KeyboardInterrupt:
         print("\n🛑 Bot stopped by user")
     except Exception as e:
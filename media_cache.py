@@ -0,0 +1,111 @@
+# media_cache.py
+import os
+import hashlib
+
+from telegram.error import BadRequest
+
+from flush import document
+
+MEDIA_CACHE_FILE = "media_cache.json"
+
+# ============================================================
+# MEDIA FILE_ID CACHE
+# ============================================================
+#
+# The start/help/force-sub/settings/alive images are local files. Uploading
+# them on every /start costs a multipart upload; Telegram hands back a
+# file_id that can be sent again for free. media_cache.json remembers it:
+#
+#   "<path>": {"sha256": ..., "size": ..., "mtime_ns": ..., "file_id": ...}
+#
+# A lookup is one os.stat(); the file is only hashed again when its size or
+# mtime changed, and only re-uploaded when the content actually differs
+# (e.g. a new image set through /settings).
+
+
+class MediaCache:
+    def __init__(self, path=MEDIA_CACHE_FILE):
+        self._doc = document(path, {}, indent=4)
+
+    @staticmethod
+    def _hash(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(65536), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _fingerprint(self, path):
+        """(sha256, size, mtime_ns) of path, reusing the stored hash if the file is untouched."""
+        st = os.stat(path)
+        with self._doc.lock:
+            entry = self._doc.get().get(path)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            return entry["sha256"], st.st_size, st.st_mtime_ns
+        return self._hash(path), st.st_size, st.st_mtime_ns
+
+    def file_id(self, path):
+        """Cached file_id for the current content of path, or None."""
+        sha256, size, mtime_ns = self._fingerprint(path)
+        with self._doc.lock:
+            entries = self._doc.get()
+            entry = entries.get(path)
+            if not entry or entry.get("sha256") != sha256:
+                return None
+            if entry.get("mtime_ns") != mtime_ns or entry.get("size") != size:
+                # touched but identical: refresh the stamp so we stop re-hashing
+                entry["size"], entry["mtime_ns"] = size, mtime_ns
+                self._doc.mark_dirty()
+            return entry.get("file_id")
+
+    def remember(self, path, file_id):
+        """Store file_id as the upload of path's current content."""
+        if not file_id:
+            return
+        sha256, size, mtime_ns = self._fingerprint(path)
+        with self._doc.lock:
+            self._doc.get()[path] = {
+                "sha256": sha256,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "file_id": file_id
+            }
+            self._doc.mark_dirty()
+
+    def forget(self, path):
+        with self._doc.lock:
+            if self._doc.get().pop(path, None) is not None:
+                self._doc.mark_dirty()
+
+
+def _photo_file_id(message):
+    photo = getattr(message, "photo", None)
+    return photo[-1].file_id if photo else None
+
+
+async def send_cached_photo(path, send):
+    """Send the image at path through send(photo) by cached file_id, uploading once.
+
+    send is any coroutine function taking the photo argument, e.g.
+    lambda photo: bot.send_photo(chat_id, photo=photo, caption=...).
+    Raises FileNotFoundError if path does not exist.
+    """
+    file_id = media_cache.file_id(path)
+    if file_id:
+        try:
+            return await send(file_id)
+        except BadRequest as e:
+            if "file" not in str(e).lower():
+                raise
+            # file_id no longer usable (e.g. other bot token): upload again
+            print(f"⚠️ Cached file_id for {path} rejected, re-uploading: {e}")
+            media_cache.forget(path)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    message = await send(data)
+    media_cache.remember(path, _photo_file_id(message))
+    return message
+
+
+media_cache = MediaCache()
@@ -0,0 +1,90 @@
+# membership_cache.py
+import os
+import time
+import threading
+
+# ============================================================
+# FORCE-SUB MEMBERSHIP CACHE
+# ============================================================
+#
+# Remembers get_chat_member results per (user, channel) so a user who opens
+# several links in a row is not re-checked against every force-sub channel
+# each time. Joined statuses live FSUB_CACHE_TTL seconds, left/kicked ones
+# only FSUB_NEGATIVE_TTL seconds so a user who just joined is not held back
+# for long. chat_member updates for the force-sub channels overwrite the
+# entry as soon as someone joins, leaves or is kicked.
+
+FSUB_CACHE_TTL = float(os.getenv("FSUB_CACHE_TTL", "600"))
+FSUB_NEGATIVE_TTL = float(os.getenv("FSUB_NEGATIVE_TTL", "15"))
+FSUB_CACHE_MAX = int(os.getenv("FSUB_CACHE_MAX", "100000"))
+
+JOINED_STATUSES = ("member", "administrator", "creator", "restricted")
+
+
+class MembershipCache:
+    def __init__(self, ttl=FSUB_CACHE_TTL, negative_ttl=FSUB_NEGATIVE_TTL, max_entries=FSUB_CACHE_MAX):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, channel_id):
+        """Cached status, or None if unknown/expired."""
+        key = (user_id, channel_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            status, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return status
+
+    def set(self, user_id, channel_id, status):
+        if status is None:
+            return
+        status = str(status)
+        ttl = self.ttl if status in JOINED_STATUSES else self.negative_ttl
+        if ttl <= 0:
+            self.invalidate(user_id, channel_id)
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[(user_id, channel_id)] = (status, time.monotonic() + ttl)
+
+    def invalidate(self, user_id, channel_id=None):
+        with self._lock:
+            if channel_id is not None:
+                self._entries.pop((user_id, channel_id), None)
+                return
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+
+    def _evict(self):
+        # drop expired entries first; if still full, the oldest half by expiry
+        now = time.monotonic()
+        for key in [k for k, (_, exp) in self._entries.items() if exp <= now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            ordered = sorted(self._entries.items(), key=lambda item: item[1][1])
+            for key, _ in ordered[:len(ordered) // 2]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+membership_cache = MembershipCache()
@@ -1,40 +1,92 @@
 # decorators.py
 from functools import wraps
 from telegram import Update
-from telegram.ext import ContextTypes
+from telegram.ext import ContextTypes, TypeHandler, ApplicationHandlerStop
 
-from shared_functions import is_user_banned, auto_add_user
+from shared_functions import is_user_banned
+from async_storage import auto_add_user, touch_user
+
+BAN_MESSAGE = (
+    "🚫 **You have been banned from using this bot!**\n\n"
+    "If you think this is a mistake, please contact the administrator."
+)
 
 def check_ban_and_register(func):
     """
     Decorator that:
-    1. Automatically adds users to users.json
+    1. Automatically adds users to the user store
     2. Checks if user is banned before executing any command
+       (in-memory set lookups; writes run on the storage executor)
     3. If banned, sends ban message and stops execution
     4. If not banned, continues with the original command
+
+    When ban_and_register_gate already ran for this update (the normal
+    case, see register_middleware) the checks are skipped.
     """
     @wraps(func)
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
         # Only process if it's a message (not callback queries, etc.)
-        if not update.message:
+        if not update.message or getattr(context, "ban_checked", False):
             return await func(update, context, *args, **kwargs)
         
         user_id = update.effective_user.id
         user = update.effective_user
         
         # 1. Auto-add user to users.json
-        auto_add_user(user_id, user.username, user.first_name, user.last_name)
+        await auto_add_user(user_id, user.username, user.first_name, user.last_name)
         
         # 2. Check if user is banned
         if is_user_banned(user_id):
-            await update.message.reply_text(
-                "🚫 **You have been banned from using this bot!**\n\n"
-                "If you think this is a mistake, please contact the administrator.",
-                parse_mode="Markdown"
-            )
+            await update.message.reply_text(BAN_MESSAGE, parse_mode="Markdown")
             return  # Stop execution here
         
         # 3. If not banned, continue with the original function
         return await func(update, context, *args, **kwargs)
     
     return wrapper
+
+
+# ============================================================
+# UPDATE GATE (handler group -1)
+# ============================================================
+#
+# Runs once per update before any other handler. Users who talk to the bot
+# (messages and button presses) are registered, and updates from banned
+# users stop here with ApplicationHandlerStop, so no later group sees them.
+# The outcome is left on the context (shared by every handler of the same
+# update) as context.ban_checked, which lets check_ban_and_register skip
+# its own checks.
+#
+# chat_member / chat_join_request updates from the force-sub channels are
+# not registrations and must keep flowing so the membership cache stays
+# right, so they pass through untouched.
+
+async def ban_and_register_gate(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    if not user or not (update.message or update.callback_query):
+        return
+
+    # storage writes (new / returning users, daily activity) run on the
+    # storage executor; everyone else is answered from the in-memory sets
+    await auto_add_user(user.id, user.username, user.first_name, user.last_name)
+    await touch_user(user.id)
+    context.ban_checked = True
+
+    if not is_user_banned(user.id):
+        return
+
+    try:
+        if update.callback_query:
+            await update.callback_query.answer(
+                "🚫 You have been banned from using this bot!", show_alert=True
+            )
+        elif update.message.chat.type == "private" or (update.message.text or "").startswith("/"):
+            await update.message.reply_text(BAN_MESSAGE, parse_mode="Markdown")
+    except Exception as e:
+        print(f"Error notifying banned user {user.id}: {e}")
+
+    raise ApplicationHandlerStop
+
+
+def register_middleware(application):
+    application.add_handler(TypeHandler(Update, ban_and_register_gate), group=-1)
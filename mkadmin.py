@@ -1,17 +1,15 @@
 # mkadmin.py
 
 import os
-import json
 from datetime import datetime, timedelta
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
-from telegram.ext import MessageHandler, filters
 import asyncio 
-OWNER_ID = 5373577888
+from async_storage import run_io
+from admin_registry import admin_registry, is_admin, OWNER_ID
+from shared_functions import begin_conversation
 
-ADMINS_FILE = "admins.json"
 LOG_FILE = "admin_logs.txt"
-NOTIFIED_FILE = "expiry_notified.json"
 
 # uid → {"24h": job, "12h": job, ..., "final": job}
 SCHEDULED_JOBS = {}
@@ -20,30 +18,12 @@ SCHEDULED_JOBS = {}
 # FILE I/O HELPERS
 # ============================================================
 
-def load_admins_full():
+def read_log_lines():
     try:
-        with open(ADMINS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            data.setdefault("admins", [OWNER_ID])
-            data.setdefault("expiry", {})
-            return data
-    except:
-        return {"admins": [OWNER_ID], "expiry": {}}
-
-def save_admins_full(data):
-    with open(ADMINS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-
-def load_notified():
-    try:
-        with open(NOTIFIED_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(LOG_FILE, "r", encoding="utf-8") as f:
+            return f.readlines()
     except:
-        return {}
-
-def save_notified(data):
-    with open(NOTIFIED_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+        return []
 
 def log_action(text):
     try:
@@ -139,13 +119,10 @@ async def warning_callback(context: ContextTypes.DEFAULT_TYPE):
     uid = job.data["uid"]
     label = job.data["label"]
 
-    data = load_admins_full()
-    expiry = data["expiry"]
-
-    if str(uid) not in expiry:
+    exp_dt = admin_registry.get_expiry(uid)
+    if not exp_dt:
         return
 
-    exp_dt = datetime.fromisoformat(expiry[str(uid)])
     remain = (exp_dt - utcnow()).total_seconds()
     hrs = int(remain // 3600)
     mins = int((remain % 3600) // 60)
@@ -163,7 +140,7 @@ async def warning_callback(context: ContextTypes.DEFAULT_TYPE):
     except:
         pass
 
-    log_action(f"WARNING {label} → {uid}")
+    await run_io(log_action, f"WARNING {label} → {uid}")
 
 
 # ============================================================
@@ -174,14 +151,7 @@ async def expiry_callback(context: ContextTypes.DEFAULT_TYPE):
     job = context.job
     uid = job.data["uid"]
 
-    data = load_admins_full()
-    admins = data["admins"]
-    expiry = data["expiry"]
-
-    if uid in admins:
-        admins.remove(uid)
-    expiry.pop(str(uid), None)
-    save_admins_full(data)
+    admin_registry.remove(uid)
 
     cancel_admin_jobs(context.application, uid)
 
@@ -206,7 +176,7 @@ async def expiry_callback(context: ContextTypes.DEFAULT_TYPE):
     except:
         pass
 
-    log_action(f"EXPIRED → {uid}")
+    await run_io(log_action, f"EXPIRED → {uid}")
 
 
 # ============================================================
@@ -270,9 +240,8 @@ def parse_duration(s):
 
 async def promote_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    data = load_admins_full()
 
-    if user.id not in data["admins"] and user.id != OWNER_ID:
+    if not is_admin(user.id):
         return
 
     if len(context.args) == 0:
@@ -292,27 +261,19 @@ async def promote_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     duration = parse_duration(duration_str)
     now = utcnow()
 
-    admins = data["admins"]
-    expiry = data["expiry"]
-
     # if already admin re-promote (reset timer)
     cancel_admin_jobs(context.application, target_id)
 
-    if target_id not in admins:
-        admins.append(target_id)
-
     if duration:
         exp_dt = now + duration
-        expiry[str(target_id)] = exp_dt.isoformat()
         duration_text = format_ist(exp_dt)
     else:
-        expiry.pop(str(target_id), None)
         exp_dt = None
         duration_text = "Permanent"
 
-    save_admins_full(data)
+    admin_registry.add(target_id, exp_dt)
 
-    log_action(f"PROMOTED → {target_id} by {user.id} duration={duration_text}")
+    await run_io(log_action, f"PROMOTED → {target_id} by {user.id} duration={duration_text}")
 
     # fetch user
     try:
@@ -376,9 +337,8 @@ async def promote_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def demote_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    data = load_admins_full()
 
-    if user.id not in data["admins"] and user.id != OWNER_ID:
+    if not is_admin(user.id):
         return
 
     if len(context.args) == 0:
@@ -391,23 +351,17 @@ async def demote_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Invalid ID.")
         return
 
-    admins = data["admins"]
-    expiry = data["expiry"]
-
-    if target_id not in admins:
-        await update.message.reply_text("This user is not admin.")
-        return
-
     if target_id == OWNER_ID:
         await update.message.reply_text("Cannot demote owner.")
         return
 
-    admins.remove(target_id)
-    expiry.pop(str(target_id), None)
-    save_admins_full(data)
+    if not admin_registry.remove(target_id):
+        await update.message.reply_text("This user is not admin.")
+        return
+
     cancel_admin_jobs(context.application, target_id)
 
-    log_action(f"DEMOTED → {target_id} by {user.id}")
+    await run_io(log_action, f"DEMOTED → {target_id} by {user.id}")
 
     # mention
     try:
@@ -457,8 +411,7 @@ def build_admin_panel_kb():
 
 
 async def admin_panel(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    data = load_admins_full()
-    if update.effective_user.id not in data["admins"] and update.effective_user.id != OWNER_ID:
+    if not is_admin(update.effective_user.id):
         return
     await update.message.reply_html(
         "<b>🛠 Admin Control Panel</b>",
@@ -474,9 +427,8 @@ async def admin_panel_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query
     data = query.data
 
-    d = load_admins_full()
-    admins = d["admins"]
-    expiry = d["expiry"]
+    admins = admin_registry.admin_ids()
+    expiry = admin_registry.expiries()
 
     # --------------------
     # ADMIN LIST
@@ -489,9 +441,8 @@ async def admin_panel_callback(update: Update, context: ContextTypes.DEFAULT_TYP
                 mention = u.mention_html()
             except:
                 mention = f'<a href="tg://user?id={uid}">{uid}</a>'
-            if str(uid) in expiry:
-                exp_dt = datetime.fromisoformat(expiry[str(uid)])
-                e = format_ist(exp_dt)
+            if uid in expiry:
+                e = format_ist(expiry[uid])
             else:
                 e = "Permanent"
 
@@ -541,8 +492,7 @@ async def admin_panel_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         soon = []
         long = []
 
-        for uid, ts in expiry.items():
-            exp_dt = datetime.fromisoformat(ts)
+        for uid, exp_dt in expiry.items():
             rem = (exp_dt - now).total_seconds()
 
             try:
@@ -605,7 +555,7 @@ async def admin_panel_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     # Expiry: Feedback
     # --------------------
     if data == "expired_feedback":
-        context.user_data["awaiting_feedback"] = True
+        begin_conversation(context.user_data, "awaiting_feedback")
         await query.message.reply_html("💬 <b>Please type your feedback.</b>")
         return
 
@@ -626,15 +576,10 @@ async def admin_panel_callback(update: Update, context: ContextTypes.DEFAULT_TYP
 
 async def admin_logs_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    data = load_admins_full()
-    if user.id not in data["admins"] and user.id != OWNER_ID:
+    if not is_admin(user.id):
         return
 
-    try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-    except:
-        lines = []
+    lines = await run_io(read_log_lines)
 
     if not lines:
         await update.message.reply_text("No logs.")
@@ -662,6 +607,4 @@ def register_mkadmin_handlers(app):
     app.add_handler(CallbackQueryHandler(admin_panel_callback, pattern="^expired_.*"))
     app.add_handler(CallbackQueryHandler(admin_panel_callback, pattern="^close_msg$"))
 
-    # feedback messages
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, feedback_text_handler), 
-    group=4)
+    # feedback messages are dispatched by conversation_router
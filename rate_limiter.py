@@ -0,0 +1,206 @@
+# rate_limiter.py
+import os
+import time
+import asyncio
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+# ============================================================
+# OUTBOUND RATE LIMITER
+# ============================================================
+#
+# Plugged into the Application with .rate_limiter(), so every context.bot
+# call passes through process_request() - handlers, batches, deletions,
+# force-sub checks and broadcasts alike.
+#
+# Requests that put a message into a chat (send*, copy*, forward*) take a
+# token from the global bucket (RATE_LIMIT_GLOBAL, ~30/s) and from that
+# chat's own bucket: ~1/s for private chats, 20/min for groups/channels.
+# Other calls (getChatMember, deleteMessages, answerCallbackQuery, ...) are
+# not counted but still wait out an active flood pause.
+#
+# A 429 RetryAfter pauses the bucket it came from for the time Telegram
+# asks for and the request is retried (RATE_LIMIT_MAX_RETRIES times) instead
+# of surfacing as a failure.
+
+RATE_LIMIT_GLOBAL = float(os.getenv("RATE_LIMIT_GLOBAL", "30"))
+RATE_LIMIT_PRIVATE = float(os.getenv("RATE_LIMIT_PRIVATE", "1"))
+RATE_LIMIT_GROUP_PER_MIN = float(os.getenv("RATE_LIMIT_GROUP_PER_MIN", "20"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+
+# a private chat may burst a few messages (file + warning) before the 1/s pace
+PRIVATE_BURST = 3
+
+# chat buckets that are full and unused for this long are dropped
+IDLE_BUCKET_SECONDS = 300
+
+MESSAGE_ENDPOINT_PREFIXES = ("send", "copyMessage", "forwardMessage")
+
+
+def retry_after_seconds(error):
+    """RetryAfter.retry_after is an int on older PTB, a timedelta on newer."""
+    value = error.retry_after
+    if hasattr(value, "total_seconds"):
+        return value.total_seconds()
+    return float(value)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    Waiters are served in arrival order. pause() empties the bucket and
+    blocks it until the pause is over (used for RetryAfter).
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds):
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self._refill(now)
+        self.tokens = 0
+
+    async def wait_unpaused(self):
+        while True:
+            delay = self.paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def acquire(self, tokens=1):
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.paused_until:
+                        await asyncio.sleep(self.paused_until - now)
+                        continue
+                    self._refill(now)
+                    if self.tokens >= tokens:
+                        self.tokens -= tokens
+                        return
+                    await asyncio.sleep((tokens - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def is_idle(self, now):
+        self._refill(now)
+        return not self.waiting and self.tokens >= self.capacity and now >= self.paused_until
+
+
+class BotRateLimiter(BaseRateLimiter):
+    """Global + per-chat token buckets in front of every Bot API request."""
+
+    def __init__(self, global_rate=RATE_LIMIT_GLOBAL, private_rate=RATE_LIMIT_PRIVATE,
+                 group_per_minute=RATE_LIMIT_GROUP_PER_MIN, max_retries=RATE_LIMIT_MAX_RETRIES):
+        self.global_bucket = TokenBucket(global_rate)
+        self.private_rate = private_rate
+        self.group_rate = group_per_minute / 60
+        self.group_capacity = group_per_minute
+        self.max_retries = max_retries
+        self._chats = {}
+        self._last_prune = time.monotonic()
+
+        # metrics
+        self.in_flight = 0
+        self.retries = 0
+        self.flood_waits = 0
+        self.failed = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    # ---------------- buckets ----------------
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # private chats have positive ids; groups, channels and @usernames don't
+            if isinstance(chat_id, int) and chat_id > 0:
+                bucket = TokenBucket(self.private_rate, PRIVATE_BURST)
+            else:
+                bucket = TokenBucket(self.group_rate, self.group_capacity)
+            self._chats[chat_id] = bucket
+        self._maybe_prune()
+        return bucket
+
+    def _maybe_prune(self):
+        now = time.monotonic()
+        if now - self._last_prune < IDLE_BUCKET_SECONDS:
+            return
+        self._last_prune = now
+        for chat_id in [c for c, b in self._chats.items() if b.is_idle(now)]:
+            del self._chats[chat_id]
+
+    @staticmethod
+    def _chat_id(data):
+        chat_id = data.get("chat_id") if data else None
+        if isinstance(chat_id, str) and chat_id.lstrip("-").isdigit():
+            return int(chat_id)
+        return chat_id
+
+    # ---------------- requests ----------------
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        counted = endpoint.startswith(MESSAGE_ENDPOINT_PREFIXES)
+        chat_id = self._chat_id(data) if counted else None
+        chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+        attempts = 0
+
+        self.in_flight += 1
+        try:
+            while True:
+                if chat_bucket is not None:
+                    await chat_bucket.acquire()
+                if counted:
+                    await self.global_bucket.acquire()
+                else:
+                    await self.global_bucket.wait_unpaused()
+
+                try:
+                    return await callback(*args, **kwargs)
+                except RetryAfter as e:
+                    delay = retry_after_seconds(e)
+                    self.flood_waits += 1
+                    (chat_bucket or self.global_bucket).pause(delay)
+                    if attempts >= self.max_retries:
+                        self.failed += 1
+                        raise
+                    attempts += 1
+                    self.retries += 1
+                    print(f"⏳ Flood wait on {endpoint} ({chat_id}): retrying in {delay:.0f}s")
+        finally:
+            self.in_flight -= 1
+
+    # ---------------- metrics ----------------
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "global_queue": self.global_bucket.waiting,
+            "chat_queue": sum(b.waiting for b in self._chats.values()),
+            "chats_tracked": len(self._chats),
+            "chats_paused": sum(1 for b in self._chats.values() if b.paused_until > time.monotonic()),
+            "retries": self.retries,
+            "flood_waits": self.flood_waits,
+            "failed": self.failed
+        }
+
+
+rate_limiter = BotRateLimiter()
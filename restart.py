@@ -5,6 +5,7 @@ import asyncio
 from datetime import datetime
 from telegram import Update
 from telegram.ext import ContextTypes
+from flush import flush_all
 
 OWNER_ID = 5373577888  # Your owner ID
 
@@ -51,5 +52,6 @@ async def restart_bot(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await asyncio.sleep(2)
     await status_msg.edit_text("🤖 ʙᴏᴛ ʀᴇsᴛᴀʀᴛᴇᴅ ")
 
-    # Actual restart
+    # Actual restart (execl skips atexit, so write pending state first)
+    flush_all()
     os.execl(sys.executable, sys.executable, *sys.argv)
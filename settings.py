@@ -1,38 +1,11 @@
 import os
-import json
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 import asyncio
-# Load settings
-def load_settings():
-    try:
-        with open('settings.json', 'r') as f:
-            return json.load(f)
-    except:
-        return {
-            "start_image": "img.jpg",
-            "help_image": "",
-            "force_sub_image": "",
-            "start_text": "Hi {mention} welcome to File Store Bot",
-            "help_text": "Available Commands:\\n\\n/start - Start the bot\\n/help - Show this help message\\n/genlink - Generate link\\n/batchlink - Generate batch links\\n/custombatch - Custom batch processing\\n/fsub - Force subscribe\\n/settings - Bot settings\\n/promote - Promote user to admin\\n/demote - Demote admin\\n/ban - Ban user\\n/unban - Unban user\\n/users - Show users\\n/admins - Show admins\\n/update - Update bot\\n/restart - Restart bot",
-            "auto_delete_time": 10,
-            "protect_content": False,
-            "settings_image": "",
-            "alive_image": ""
-        }
-
-# Save settings
-def save_settings(settings):
-    with open('settings.json', 'w') as f:
-        json.dump(settings, f, indent=4)
-
-# Load admin data
-def load_admins():
-    try:
-        with open('admins.json', 'r') as f:
-            return json.load(f)
-    except:
-        return [5373577888]
+from admin_registry import is_admin
+from shared_functions import begin_conversation
+from settings_store import load_settings, save_settings
+from media_cache import media_cache, send_cached_photo
 
 async def show_updated_auto_delete_menu(query, selected):
     def btn(label, value):
@@ -106,10 +79,9 @@ async def show_updated_protect_menu(query, is_enabled):
 
 async def settings_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    admins = load_admins()
 
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         await update.message.reply_text("You are not authorized to use this command!")
         return
 
@@ -158,20 +130,13 @@ async def settings_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Try sending with image if available
     if settings_image and os.path.exists(settings_image):
         try:
-            if update.callback_query:
-                await update.callback_query.message.reply_photo(
-                    photo=open(settings_image, "rb"),
-                    caption=settings_text,
-                    reply_markup=reply_markup,
-                    parse_mode="Markdown",
-                )
-            else:
-                await update.message.reply_photo(
-                    photo=open(settings_image, "rb"),
-                    caption=settings_text,
-                    reply_markup=reply_markup,
-                    parse_mode="Markdown",
-                )
+            message = update.callback_query.message if update.callback_query else update.message
+            await send_cached_photo(settings_image, lambda photo: message.reply_photo(
+                photo=photo,
+                caption=settings_text,
+                reply_markup=reply_markup,
+                parse_mode="Markdown",
+            ))
             return  # ✅ Prevent sending text again
         except Exception as e:
             print(f"Error sending settings image: {e}")
@@ -191,10 +156,9 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
 
     data = query.data
     user_id = query.from_user.id
-    admins = load_admins()
 
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         await query.answer("You are not authorized!", show_alert=True)
         return
 
@@ -214,7 +178,7 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
             ]),
             parse_mode="MarkdownV2"
         )
-        context.user_data['waiting_for'] = 'start_image'
+        begin_conversation(context.user_data, 'waiting_for', 'start_image')
 
     # HELP IMAGE
     elif data == "settings_help_img":
@@ -230,7 +194,7 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
             ]),
             parse_mode="MarkdownV2"
         )
-        context.user_data['waiting_for'] = 'help_image'
+        begin_conversation(context.user_data, 'waiting_for', 'help_image')
 
     # SETTINGS IMAGE
     elif data == "settings_settings_image":
@@ -246,7 +210,7 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
             ]),
             parse_mode="MarkdownV2"
         )
-        context.user_data['waiting_for'] = 'settings_image'
+        begin_conversation(context.user_data, 'waiting_for', 'settings_image')
     # ALIVE IMAGE
     elif data == "settings_alive_image":
         await query.edit_message_caption(
@@ -261,7 +225,7 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
             ]),
             parse_mode="MarkdownV2"
         )
-        context.user_data['waiting_for'] = 'alive_image'
+        begin_conversation(context.user_data, 'waiting_for', 'alive_image')
 
     # FORCE SUBSCRIBE IMAGE
     elif data == "settings_force_sub_image":
@@ -277,7 +241,7 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
             ]),
             parse_mode="MarkdownV2"
         )
-        context.user_data['waiting_for'] = 'force_sub_image'
+        begin_conversation(context.user_data, 'waiting_for', 'force_sub_image')
 
     # AUTO DELETE
     elif data == "settings_auto_delete":
@@ -362,7 +326,7 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
             ]),
             parse_mode="MarkdownV2"
         )
-        context.user_data['waiting_for'] = 'start_text'
+        begin_conversation(context.user_data, 'waiting_for', 'start_text')
 
     # HELP TEXT
     elif data == "settings_help_text":
@@ -378,7 +342,7 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
             ]),
             parse_mode="MarkdownV2"
         )
-        context.user_data['waiting_for'] = 'help_text'
+        begin_conversation(context.user_data, 'waiting_for', 'help_text')
 
     # AUTO DELETE TIME SELECTION
     elif data.startswith("auto_delete_"):
@@ -477,10 +441,9 @@ async def settings_button_handler(update: Update, context: ContextTypes.DEFAULT_
         
 async def settings_message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    admins = load_admins()
     
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         return
     
     waiting_for = context.user_data.get('waiting_for')
@@ -497,6 +460,8 @@ async def settings_message_handler(update: Update, context: ContextTypes.DEFAULT
             photo_file = await photo.get_file()
             filename = f"{waiting_for}.jpg"
             await photo_file.download_to_drive(filename)
+            # the admin's upload already has a file_id: no re-upload needed
+            media_cache.remember(filename, photo.file_id)
             
             settings[waiting_for] = filename
             save_settings(settings)
@@ -528,6 +493,7 @@ async def settings_message_handler(update: Update, context: ContextTypes.DEFAULT
             photo_file = await photo.get_file()
             filename = "force_sub_image.jpg"
             await photo_file.download_to_drive(filename)
+            media_cache.remember(filename, photo.file_id)
             
             settings[waiting_for] = filename
             save_settings(settings)
@@ -0,0 +1,114 @@
+# settings_store.py
+import os
+import json
+import threading
+
+from flush import atomic_write_json
+
+SETTINGS_FILE = "settings.json"
+
+# ============================================================
+# SETTINGS SERVICE
+# ============================================================
+#
+# settings.json is read on every file delivery, batch, /start, /help,
+# /alive and force-sub prompt. It is parsed once here and kept in memory;
+# the cache is dropped when save_settings() runs or when the file's mtime
+# changes (e.g. someone edits it by hand), so a lookup normally costs one
+# os.stat() instead of an open + json.load.
+
+DEFAULT_HELP_TEXT = (
+    "Available Commands:\n\n"
+    "/start - Start the bot\n"
+    "/help - Show this help message\n"
+    "/genlink - Generate link\n"
+    "/batchlink - Generate batch links\n"
+    "/custombatch - Custom batch processing\n"
+    "/fsub - Force subscribe\n"
+    "/settings - Bot settings\n"
+    "/promote - Promote user to admin\n"
+    "/demote - Demote admin\n"
+    "/ban - Ban user\n"
+    "/unban - Unban user\n"
+    "/users - Show users\n"
+    "/admins - Show admins\n"
+    "/update - Update bot\n"
+    "/restart - Restart bot"
+)
+
+DEFAULT_SETTINGS = {
+    "start_image": "img.jpg",
+    "help_image": "",
+    "force_sub_image": "",
+    "settings_image": "",
+    "alive_image": "",
+    "start_text": "Hi {mention} welcome to File Store Bot",
+    "help_text": DEFAULT_HELP_TEXT,
+    "auto_delete_time": 10,
+    "protect_content": False
+}
+
+_lock = threading.Lock()
+_cache = None
+_cache_stamp = None
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _typed(raw):
+    """Merge raw file data over the defaults, coercing known keys to their types."""
+    settings = dict(DEFAULT_SETTINGS)
+    if not isinstance(raw, dict):
+        return settings
+
+    for key, value in raw.items():
+        default = DEFAULT_SETTINGS.get(key)
+        try:
+            if isinstance(default, bool):
+                value = value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes", "on")
+            elif isinstance(default, int):
+                value = int(value)
+            elif isinstance(default, str) and value is None:
+                value = default
+        except (TypeError, ValueError):
+            value = default
+        settings[key] = value
+    return settings
+
+
+def load_settings(path=SETTINGS_FILE):
+    """Current settings with defaults filled in. The caller owns the returned dict."""
+    global _cache, _cache_stamp
+    stamp = _file_stamp(path)
+    with _lock:
+        if _cache is None or stamp != _cache_stamp:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+            except:
+                raw = {}
+            _cache = _typed(raw)
+            _cache_stamp = stamp
+        return dict(_cache)
+
+
+def save_settings(settings, path=SETTINGS_FILE):
+    """Write settings atomically and refresh the cache."""
+    global _cache, _cache_stamp
+    with _lock:
+        atomic_write_json(path, settings, indent=4)
+        _cache = _typed(settings)
+        _cache_stamp = _file_stamp(path)
+
+
+def invalidate_settings():
+    global _cache, _cache_stamp
+    with _lock:
+        _cache = None
+        _cache_stamp = None
@@ -1,59 +1,54 @@
 # shared_functions.py
-import json
 import base64
 import os
 from datetime import datetime, timedelta
-# Load admin data
+from storage import get_storage
+from flush import document, load_json
+from admin_registry import admin_registry
+# user_data keys of the multi-step commands, see conversation_router.py
+CONVERSATION_KEYS = (
+    "waiting_fsub", "waiting_for", "waiting_for_api", "batch_state",
+    "waiting_for_genlink", "waiting_for_shortlink", "awaiting_feedback"
+)
+
+# Start a multi-step command. Any other one still open is abandoned, so
+# the next message always goes to the command started last.
+def begin_conversation(user_data, key, value=True):
+    for other in CONVERSATION_KEYS:
+        if other != key:
+            user_data.pop(other, None)
+    user_data[key] = value
+
+# Load admin ids (owner is always allowed through is_admin)
 def load_admins():
-    try:
-        with open('admins.json', 'r') as f:
-            return json.load(f)
-    except:
-        return [5373577888]
-
-# Load settings
-def load_settings():
-    try:
-        with open('settings.json', 'r') as f:
-            return json.load(f)
-    except:
-        return {
-            "start_image": "img.jpg",
-            "help_image": "",
-            "force_sub_image": "",
-            "start_text": "Hi {mention} welcome to File Store Bot",
-            "help_text": "Available Commands:\n\n/start - Start the bot\n/help - Show this help message\n/genlink - Generate link\n/batchlink - Generate batch links\n/custombatch - Custom batch processing\n/fsub - Force subscribe\n/settings - Bot settings\n/promote - Promote user to admin\n/demote - Demote admin\n/ban - Ban user\n/unban - Unban user\n/users - Show users\n/admins - Show admins\n/update - Update bot\n/restart - Restart bot",
-            "auto_delete_time": 10,
-            "protect_content": False
-        }
+    return admin_registry.admin_ids()
 
         
 # Load links data
 def load_links():
-    try:
-        with open('links.json', 'r') as f:
-            return json.load(f)
-    except:
-        return {}
+    return get_storage().load_links()
 
 # Save links data
 def save_links(links):
-    with open('links.json', 'w') as f:
-        json.dump(links, f)
+    get_storage().save_links(links)
+
+# Get a single link by its encoded id
+def get_link(encoded_id):
+    return get_storage().get_link(encoded_id)
+
+# Save a single link
+def put_link(encoded_id, link_data):
+    get_storage().put_link(encoded_id, link_data)
 
 # Load force sub channels
 def load_force_sub():
-    try:
-        with open('force_sub.json', 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    return document('force_sub.json', [], indent=4).snapshot()
 
 # Save force sub channels
 def save_force_sub(channels):
-    with open('force_sub.json', 'w') as f:
-        json.dump(channels, f, indent=4)
+    document('force_sub.json', [], indent=4).set(channels)
 
+# Legacy link payloads (pre link_codec): base64 of "chat_id:message_id"
 # Encode file ID to base64
 def encode_file_id(file_id):
     encoded = base64.urlsafe_b64encode(file_id.encode()).decode()
@@ -69,73 +64,171 @@ def decode_file_id(encoded_id):
     except:
         return None
 
+# Pending join requests for request-mode force-sub channels
+def add_join_request(user_id, chat_id):
+    get_storage().add_join_request(user_id, chat_id, datetime.utcnow().isoformat())
+
+def remove_join_request(user_id, chat_id):
+    return get_storage().remove_join_request(user_id, chat_id)
+
+def join_request_chats(user_id):
+    return get_storage().join_request_chats(user_id)
+
 # Add these functions to shared_functions.py
 
+# In-memory id sets so the per-update ban/registration check never reads
+# from disk. Loaded on first use and kept in sync by the writers below.
+_user_ids = None
+_banned_ids = None
+_inactive_ids = None
+# user_id -> (last_seen day, last link day) already written this run
+_touched = {}
+
+
+def _known_user_ids():
+    global _user_ids
+    if _user_ids is None:
+        _user_ids = get_storage().user_ids()
+    return _user_ids
+
+
+def _known_banned_ids():
+    global _banned_ids
+    if _banned_ids is None:
+        _banned_ids = get_storage().banned_ids()
+    return _banned_ids
+
+
+def _known_inactive_ids():
+    global _inactive_ids
+    if _inactive_ids is None:
+        _inactive_ids = get_storage().inactive_ids()
+    return _inactive_ids
+
+# Load the id sets now (blocking); call off the event loop at startup
+def load_id_sets():
+    _known_user_ids()
+    _known_banned_ids()
+    _known_inactive_ids()
+
+# Whether auto_add_user would write: new or inactive user
+def needs_registration(user_id):
+    return user_id not in _known_user_ids() or user_id in _known_inactive_ids()
+
 # Load users data
 def load_users():
-    try:
-        with open('users.json', 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    return get_storage().load_users()
 
 # Save users data
 def save_users(users):
-    with open('users.json', 'w') as f:
-        json.dump(users, f, indent=4)
+    global _user_ids, _inactive_ids
+    get_storage().save_users(users)
+    _user_ids = {user["id"] for user in users}
+    _inactive_ids = {user["id"] for user in users if user.get("inactive")}
+
+# Broadcast segment, see find_user_ids in storage.py
+def find_user_ids(**filters):
+    return get_storage().find_user_ids(**filters)
+
+# Record that a user was active today / opened a link today. Written at
+# most once per user and day, so calling it on every update is cheap.
+def touch_user(user_id, opened_link=False):
+    today = datetime.utcnow().date().isoformat()
+    seen_day, link_day = _touched.get(user_id, (None, None))
+    seen_at = today if seen_day != today else None
+    link_at = today if opened_link and link_day != today else None
+    if not seen_at and not link_at:
+        return
+    get_storage().touch_user(user_id, seen_at, link_at)
+    _touched[user_id] = (today, today if opened_link else link_day)
+
+# Whether touch_user would write today
+def touch_due(user_id, opened_link=False):
+    today = datetime.utcnow().date().isoformat()
+    seen_day, link_day = _touched.get(user_id, (None, None))
+    return seen_day != today or (opened_link and link_day != today)
+
+# Mark users a broadcast could not reach ("blocked" / "deactivated")
+def mark_users_inactive(user_ids, reason):
+    user_ids = [uid for uid in user_ids if uid not in _known_inactive_ids()]
+    if not user_ids:
+        return 0
+    changed = get_storage().set_users_inactive(user_ids, reason, datetime.utcnow().isoformat())
+    _known_inactive_ids().update(user_ids)
+    return changed
+
+# Get a single user record
+def get_user(user_id):
+    return get_storage().get_user(user_id)
 
 # Load banned users
 def load_banned_users():
-    try:
-        with open('banned_users.json', 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    return get_storage().load_banned_users()
 
 # Save banned users
 def save_banned_users(banned_users):
-    with open('banned_users.json', 'w') as f:
-        json.dump(banned_users, f, indent=4)
+    global _banned_ids
+    get_storage().save_banned_users(banned_users)
+    _banned_ids = {user["id"] for user in banned_users}
+
+# Ban a user, returns False if already banned
+def ban_user(entry):
+    if entry["id"] in _known_banned_ids():
+        return False
+    added = get_storage().ban_user(entry)
+    _known_banned_ids().add(entry["id"])
+    return added
+
+# Unban a user, returns the removed ban entry or None
+def unban_user(user_id):
+    if user_id not in _known_banned_ids():
+        return None
+    entry = get_storage().unban_user(user_id)
+    _known_banned_ids().discard(user_id)
+    return entry
 
-# Auto-add user to users.json
+# Auto-add user to the user store (O(1) for known users)
 def auto_add_user(user_id, username, first_name, last_name=None):
-    users = load_users()
-    
-    # Check if user already exists
-    user_exists = any(user['id'] == user_id for user in users)
-    
-    if not user_exists:
-        user_data = {
-            "id": user_id,
-            "username": username,
-            "first_name": first_name,
-            "last_name": last_name,
-            "joined_at": datetime.utcnow().isoformat()
-        }
-        users.append(user_data)
-        save_users(users)
-        print(f"✅ Added new user: {first_name} (ID: {user_id})")
+    user_ids = _known_user_ids()
+    if user_id in user_ids:
+        # talking to the bot again: reachable, include in broadcasts
+        if user_id in _known_inactive_ids():
+            get_storage().set_user_active(user_id)
+            _known_inactive_ids().discard(user_id)
+        return
+
+    now = datetime.utcnow()
+    today = now.date().isoformat()
+    user_data = {
+        "id": user_id,
+        "username": username,
+        "first_name": first_name,
+        "last_name": last_name,
+        "joined_at": now.isoformat(),
+        "last_seen": today
+    }
+    user_ids.add(user_id)
+    get_storage().add_user(user_data)
+    # last_seen is already written, touch_user has nothing to do today
+    _touched[user_id] = (today, _touched.get(user_id, (None, None))[1])
+    print(f"✅ Added new user: {first_name} (ID: {user_id})")
 
 # Check if user is banned
 def is_user_banned(user_id):
-    banned_users = load_banned_users()
-    return any(user['id'] == user_id for user in banned_users)
+    return user_id in _known_banned_ids()
 
 ADMINS_FILE = "admins.json"
 NOTIFIED_FILE = "expiry_notified.json"
 
 
 def read_json(path, default):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return default
+    return load_json(path, default)
 
 
+# Admin files change rarely, so they are written through immediately
+# (atomically) instead of being debounced.
 def write_json(path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
+    document(path, data, indent=4, delay_ms=0).set(data)
 
 
 def ensure_admin_system():
@@ -147,19 +240,11 @@ def ensure_admin_system():
 
 
 def load_admins_full():
-    data = read_json(ADMINS_FILE, {"admins": [5373577888], "expiry": {}})
-
-    if "admins" not in data:
-        data["admins"] = [5373577888]
-
-    if "expiry" not in data:
-        data["expiry"] = {}
-
-    return data
+    return admin_registry.as_dict()
 
 
 def save_admins_full(data):
-    write_json(ADMINS_FILE, data)
+    admin_registry.replace(data)
 
 
 def load_notified():
@@ -170,66 +255,19 @@ def save_notified(data):
     write_json(NOTIFIED_FILE, data)
 
 
-def is_admin(user_id):
-    data = load_admins_full()
-    return user_id in data["admins"]
-
-
 def add_admin(user_id, duration):
-    data = load_admins_full()
-
-    if user_id not in data["admins"]:
-        data["admins"].append(user_id)
-
-    if duration:
-        expiry_time = (datetime.utcnow() + duration).isoformat()
-        data["expiry"][str(user_id)] = expiry_time
-    else:
-        if str(user_id) in data["expiry"]:
-            data["expiry"].pop(str(user_id))
-
-    save_admins_full(data)
+    expires_at = datetime.utcnow() + duration if duration else None
+    admin_registry.add(user_id, expires_at)
     return True
 
 
 def remove_admin(user_id):
-    data = load_admins_full()
-
-    if user_id in data["admins"]:
-        data["admins"].remove(user_id)
-
-    if str(user_id) in data["expiry"]:
-        data["expiry"].pop(str(user_id))
-
-    save_admins_full(data)
+    admin_registry.remove(user_id)
     return True
 
 
 def cleanup_expired_admins():
-    data = load_admins_full()
-    expiry = data["expiry"]
-    notified = load_notified()
-
-    now = datetime.utcnow()
-    expired = []
-
-    for uid, timestamp in list(expiry.items()):
-        exp_time = datetime.fromisoformat(timestamp)
-
-        if now >= exp_time:
-            expired.append(int(uid))
-
-            if int(uid) in data["admins"]:
-                data["admins"].remove(int(uid))
-
-            expiry.pop(uid, None)
-            notified.pop(uid, None)
-
-    data["expiry"] = expiry
-    save_admins_full(data)
-    save_notified(notified)
-
-    return expired
+    return admin_registry.cleanup_expired()
 
 
 def parse_duration(duration_str):
@@ -260,14 +298,7 @@ def parse_duration(duration_str):
 
 
 def get_expiry(user_id):
-    data = load_admins_full()
-    expiry_map = data["expiry"]
-
-    timestamp = expiry_map.get(str(user_id))
-    if not timestamp:
-        return None
-
-    return datetime.fromisoformat(timestamp)
+    return admin_registry.get_expiry(user_id)
 
 
 def get_remaining(user_id):
@@ -297,9 +328,7 @@ def clear_notification(user_id):
 # Ensure admin-related JSON files exist (needed by main.py)
 def ensure_admin_files_exist():
     if not os.path.exists("admins.json"):
-        with open("admins.json", "w") as f:
-            json.dump([5373577888], f)
+        write_json("admins.json", [5373577888])
 
     if not os.path.exists("expiry_notified.json"):
-        with open("expiry_notified.json", "w") as f:
-            json.dump({}, f)
+        write_json("expiry_notified.json", {})
@@ -4,10 +4,16 @@ import asyncio
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters
 
-from shared_functions import load_admins, load_settings
+from admin_registry import is_admin
+from async_storage import put_link
+from shared_functions import begin_conversation
+from link_codec import encode_link
 from middleware import check_ban_and_register
+from countdown import countdown
 from datetime import datetime
 
+SHORTLINK_TIMEOUT = 60
+
 # Load shortener settings
 def load_shortener():
     try:
@@ -29,10 +35,9 @@ def save_shortener(settings):
 @check_ban_and_register
 async def shortener_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    admins = load_admins()
     
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         await update.message.reply_text("You are not authorized to use this command!")
         return
     
@@ -74,10 +79,9 @@ async def shortener_button_handler(update: Update, context: ContextTypes.DEFAULT
     
     data = query.data
     user_id = query.from_user.id
-    admins = load_admins()
     
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         await query.answer("You are not authorized!", show_alert=True)
         return
     
@@ -95,7 +99,7 @@ async def shortener_button_handler(update: Update, context: ContextTypes.DEFAULT
         )
         
         # Set waiting state for API input
-        context.user_data['waiting_for_api'] = True
+        begin_conversation(context.user_data, 'waiting_for_api')
         context.user_data['original_message_id'] = query.message.message_id
         context.user_data['original_chat_id'] = query.message.chat.id
         
@@ -114,7 +118,7 @@ async def shortener_button_handler(update: Update, context: ContextTypes.DEFAULT
             parse_mode="Markdown"
         )
         
-        context.user_data['waiting_for_api'] = True
+        begin_conversation(context.user_data, 'waiting_for_api')
         context.user_data['original_message_id'] = query.message.message_id
         context.user_data['original_chat_id'] = query.message.chat.id
         
@@ -174,10 +178,9 @@ async def shortener_timeout(context: ContextTypes.DEFAULT_TYPE, timeout: int):
 async def shortener_api_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle API token input"""
     user_id = update.effective_user.id
-    admins = load_admins()
     
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         return
     
     if not context.user_data.get('waiting_for_api'):
@@ -296,9 +299,8 @@ async def detect_shortener_service(api_token: str):
 @check_ban_and_register
 async def shortlink_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    admins = load_admins()
 
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         await update.message.reply_text("You are not authorized!")
         return
 
@@ -308,50 +310,34 @@ async def shortlink_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Set waiting state
-    context.user_data["waiting_for_shortlink"] = True
-    context.user_data["stop_shortlink_timer"] = False
+    begin_conversation(context.user_data, "waiting_for_shortlink")
 
     msg = await update.message.reply_text(
-        "> ᴘʟᴇᴀsᴇ sᴇɴᴅ ᴏʀ ғᴏʀᴡᴀʀᴅ ᴀ ᴍᴇssᴀɢᴇ ᴛᴏ ɢᴇɴᴇʀᴀᴛᴇ ᴀ ʟɪɴᴋ\\.\n"
-        "ᴛɪᴍᴇᴏᴜᴛ\\: 60s ʀᴇᴍᴀɪɴɪɴɢ",
+        shortlink_prompt_text(SHORTLINK_TIMEOUT),
         parse_mode="MarkdownV2"
     )
 
     context.user_data["shortlink_wait_msg"] = msg
 
-    context.user_data["sl_timer"] = asyncio.create_task(
-        shortlink_countdown(context)
-    )
-
-#countdown shortener
-async def shortlink_countdown(context):
-    msg = context.user_data.get("shortlink_wait_msg")
-
-    for sec in range(60, 0, -1):
-        if context.user_data.get("stop_shortlink_timer"):
-            return
-
-        try:
-            await msg.edit_text(
-                f"> ᴘʟᴇᴀsᴇ sᴇɴᴅ ᴏʀ ғᴏʀᴡᴀʀᴅ ᴀ ᴍᴇssᴀɢᴇ ᴛᴏ ɢᴇɴᴇʀᴀᴛᴇ ᴀ ʟɪɴᴋ\\.\n"
-                f"ᴛɪᴍᴇᴏᴜᴛ\\: {sec}s ʀᴇᴍᴀɪɴɪɴɢ",
-                parse_mode="MarkdownV2"
-            )
-        except:
-            pass
-
-        await asyncio.sleep(1)
-
-    context.user_data["waiting_for_shortlink"] = False
-
-    try:
+    async def on_timeout():
+        context.user_data["waiting_for_shortlink"] = False
         await msg.edit_text("*ᴛɪᴍᴇᴏᴜᴛ ❌* \n ᴘʟᴇᴀsᴇ ᴜsᴇ /shortlink ᴀɢᴀɪɴ.", parse_mode="Markdown")
         await asyncio.sleep(5)
         await msg.delete()
-    except:
-        pass
 
-    return
+    countdown.start(
+        ("shortlink", user_id),
+        SHORTLINK_TIMEOUT,
+        lambda sec: msg.edit_text(shortlink_prompt_text(sec), parse_mode="MarkdownV2"),
+        on_timeout
+    )
+
+#countdown shortener
+def shortlink_prompt_text(sec):
+    return (
+        f"> ᴘʟᴇᴀsᴇ sᴇɴᴅ ᴏʀ ғᴏʀᴡᴀʀᴅ ᴀ ᴍᴇssᴀɢᴇ ᴛᴏ ɢᴇɴᴇʀᴀᴛᴇ ᴀ ʟɪɴᴋ\\.\n"
+        f"ᴛɪᴍᴇᴏᴜᴛ\\: {sec}s ʀᴇᴍᴀɪɴɪɴɢ"
+    )
 
 #main function   
 async def shortlink_wait_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -360,11 +346,7 @@ async def shortlink_wait_handler(update: Update, context: ContextTypes.DEFAULT_T
 
     # Stop countdown
     context.user_data["waiting_for_shortlink"] = False
-    context.user_data["stop_shortlink_timer"] = True
-
-    timer = context.user_data.get("sl_timer")
-    if timer:
-        timer.cancel()
+    countdown.cancel(("shortlink", update.effective_user.id))
 
     wait_msg = context.user_data.get("shortlink_wait_msg")
 
@@ -375,18 +357,15 @@ async def shortlink_wait_handler(update: Update, context: ContextTypes.DEFAULT_T
 
     # Build encoded link
     msg = update.message
-    from links import encode_file_id, load_links, save_links
-    encoded = encode_file_id(f"{msg.chat_id}:{msg.message_id}")
+    encoded = encode_link(msg.chat_id, msg.message_id)
 
     # Save link
-    links = load_links()
-    links[encoded] = {
+    await put_link(encoded, {
         "chat_id": msg.chat_id,
         "message_id": msg.message_id,
         "created_at": datetime.utcnow().isoformat(),
         "created_by": update.effective_user.id
-    }
-    save_links(links)
+    })
 
     # Shorten
     settings = load_shortener()
@@ -1,29 +1,12 @@
-import json
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from middleware import check_ban_and_register
 import asyncio
+from admin_registry import is_admin
+from settings_store import load_settings
+from media_cache import send_cached_photo
 
 OWNER_ID = 5373577888
-# Load admin data
-def load_admins():
-    try:
-        with open('admins.json', 'r') as f:
-            return json.load(f)
-    except:
-        return []
-
-# Load settings
-def load_settings():
-    try:
-        with open('settings.json', 'r') as f:
-            return json.load(f)
-    except:
-        return {
-            "start_image": "img.jpg",
-            "start_text": "Hi {mention} welcome to File Store Bot",
-            "help_text": "Available Commands:\\n\\n/start - Start the bot\\n/help - Show this help message\\n/genlink - Generate link\\n/batchlink - Generate batch links\\n/custombatch - Custom batch processing\\n/fsub - Force subscribe\\n/settings - Bot settings\\n/promote - Promote user to admin\\n/demote - Demote admin\\n/ban - Ban user\\n/unban - Unban user\\n/users - Show users\\n/admins - Show admins\\n/update - Update bot\\n/restart - Restart bot"
-        }
 @check_ban_and_register
 async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
@@ -47,14 +30,13 @@ async def start_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Send message with image
     try:
-        with open(start_image, 'rb') as photo:
-            await context.bot.send_photo(
-                chat_id=update.effective_chat.id,
-                photo=photo,
-                caption=start_text,
-                reply_markup=reply_markup,
-                parse_mode='HTML'
-            )
+        await send_cached_photo(start_image, lambda photo: context.bot.send_photo(
+            chat_id=update.effective_chat.id,
+            photo=photo,
+            caption=start_text,
+            reply_markup=reply_markup,
+            parse_mode='HTML'
+        ))
     except FileNotFoundError:
         # If image not found, send text only
         await context.bot.send_message(
@@ -116,8 +98,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
     
     elif data == "start_help":
-        admins = load_admins()
-        if user_id not in admins and user_id != OWNER_ID:
+        if not is_admin(user_id):
             await query.answer("You are not authorized to use this bot", show_alert=True)
             return
         
@@ -26,6 +26,9 @@ except Exception:
 
 from telegram import Update
 from telegram.ext import ContextTypes, CommandHandler
+from rate_limiter import rate_limiter
+from webhook import BOT_MODE, update_queue_depth
+from update_processor import update_processor
 
 # Bot start timestamp (resets on restart)
 BOT_START = time.time()
@@ -508,6 +511,12 @@ async def stats_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         ul_speed, ul_bytes = "N/A", "N/A"
 
+    # Outbound request queue (rate_limiter.py)
+    rl = rate_limiter.stats()
+    # Incoming updates waiting for a handler (webhook.py)
+    update_queue = update_queue_depth(context.application)
+    up = update_processor.stats()
+
     # Final assembly of message (Markdown)
     final = (
         "**📊 System Stats**\n\n"
@@ -526,6 +535,11 @@ async def stats_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"🌐 **Download Speed:** `{dl_speed} MB/s` `{dl_bytes}`\n"
         f"🌐 **Upload Speed:** `{ul_speed} MB/s` `{ul_bytes}`\n\n"
 
+        f"🚦 **API Queue:** `{rl['global_queue']} global / {rl['chat_queue']} per-chat` ({rl['in_flight']} in flight)\n"
+        f"🚦 **Flood Waits:** `{rl['flood_waits']}` (retried {rl['retries']}, failed {rl['failed']})\n"
+        f"📥 **Update Queue:** `{update_queue}` ({BOT_MODE})\n"
+        f"👥 **Handlers:** `{up['running']} running / {up['queued']} queued behind same user` (dropped {up['dropped']})\n\n"
+
         "_Tip:_ If CPU stays flat even during stress-test, your device may keep cores in deep idle or cap background workloads. Running this system-level test uses native processes (yes/openssl) which should cause an observable spike. The test is short and cleaned up automatically."
     )
 
@@ -0,0 +1,715 @@
+# storage.py
+import os
+import json
+import sqlite3
+import bisect
+import threading
+
+from flush import document, flush_all
+
+# ============================================================
+# STORAGE ENGINE
+# ============================================================
+#
+# Links, users and bans live behind a small engine interface so the
+# handlers never care where the data is kept:
+#
+#   STORAGE_BACKEND=json    (default) the original links.json / users.json /
+#                           banned_users.json files
+#   STORAGE_BACKEND=sqlite  one SQLite database in WAL mode with indexed
+#                           per-key lookups (STORAGE_DB, default bot.db)
+#
+# Both engines expose the same methods, see JsonStorage below.
+
+LINKS_FILE = "links.json"
+USERS_FILE = "users.json"
+USER_ACTIVITY_FILE = "user_activity.json"
+# activity is day-granular, losing the last minute of it in a crash is harmless
+USER_ACTIVITY_FLUSH_MS = int(os.getenv("USER_ACTIVITY_FLUSH_MS", "60000"))
+BANNED_FILE = "banned_users.json"
+JOIN_REQUESTS_FILE = "join_requests.json"
+DEFAULT_DB_FILE = "bot.db"
+
+
+# ============================================================
+# JSON BACKEND
+# ============================================================
+
+class JsonStorage:
+    """The original file layout: one JSON document per collection.
+
+    The documents are held in memory and written back through the flush
+    layer (flush.py), so a burst of writes becomes a handful of atomic
+    file replacements.
+    """
+
+    name = "json"
+
+    def __init__(self, links_file=LINKS_FILE, users_file=USERS_FILE, banned_file=BANNED_FILE,
+                 join_requests_file=JOIN_REQUESTS_FILE, activity_file=USER_ACTIVITY_FILE):
+        self.links = document(links_file, {})
+        self.users = document(users_file, [])
+        self.banned = document(banned_file, [])
+        # {"<user_id>": {"<chat_id>": requested_at}}
+        self.join_requests = document(join_requests_file, {})
+        # {"<user_id>": [last_seen, last_link_at]}, kept out of users.json so
+        # daily activity does not rewrite every user record
+        self.activity = document(activity_file, {}, delay_ms=USER_ACTIVITY_FLUSH_MS)
+        self._users_by_id = None
+        self._segments = None
+
+    # ---------------- links ----------------
+
+    def load_links(self):
+        with self.links.lock:
+            return dict(self.links.get())
+
+    def save_links(self, links):
+        self.links.set(dict(links))
+
+    def get_link(self, key):
+        with self.links.lock:
+            return self.links.get().get(key)
+
+    def put_link(self, key, data):
+        with self.links.lock:
+            self.links.get()[key] = data
+            self.links.mark_dirty()
+
+    # ---------------- users ----------------
+
+    def _index(self):
+        if self._users_by_id is None:
+            self._users_by_id = {user["id"]: user for user in self.users.get()}
+        return self._users_by_id
+
+    def _segment_index(self):
+        """In-memory indexes behind find_user_ids, built on first use."""
+        if self._segments is None:
+            with self.activity.lock:
+                self._fold_record_activity()
+                self._segments = _UserSegments(self.users.get(), self.activity.get())
+        return self._segments
+
+    def _fold_record_activity(self, users=None):
+        # activity written into user records (older versions, save_users)
+        # moves to the activity document
+        activity = self.activity.get()
+        moved = False
+        for user in self.users.get() if users is None else users:
+            if "last_seen" not in user and "last_link_at" not in user:
+                continue
+            seen, link = activity.get(str(user["id"]), (None, None))
+            activity[str(user["id"])] = [
+                max(filter(None, (seen, user.pop("last_seen", None))), default=None),
+                max(filter(None, (link, user.pop("last_link_at", None))), default=None)
+            ]
+            moved = True
+        if moved:
+            self.activity.mark_dirty()
+            self.users.mark_dirty()
+
+    def _with_activity(self, user):
+        seen, link = self.activity.get().get(str(user["id"]), (None, None))
+        if not seen and not link:
+            return user
+        user = dict(user)
+        if seen:
+            user["last_seen"] = seen
+        if link:
+            user["last_link_at"] = link
+        return user
+
+    def load_users(self):
+        with self.users.lock, self.activity.lock:
+            self._segment_index()
+            return [self._with_activity(user) for user in self.users.get()]
+
+    def save_users(self, users):
+        users = [dict(user) for user in users]
+        with self.users.lock, self.activity.lock:
+            self.users.set(users)
+            self._fold_record_activity(users)
+            self._users_by_id = None
+            self._segments = None
+
+    def user_ids(self):
+        with self.users.lock:
+            return set(self._index())
+
+    def get_user(self, user_id):
+        with self.users.lock, self.activity.lock:
+            self._segment_index()
+            user = self._index().get(user_id)
+            return self._with_activity(user) if user is not None else None
+
+    def add_user(self, user_data):
+        with self.users.lock, self.activity.lock:
+            index = self._index()
+            if user_data["id"] in index:
+                return False
+            user_data = dict(user_data)
+            seen_at = user_data.pop("last_seen", None)
+            link_at = user_data.pop("last_link_at", None)
+            self.users.get().append(user_data)
+            index[user_data["id"]] = user_data
+            if self._segments is not None:
+                self._segments.add(user_data)
+            self.users.mark_dirty()
+            if seen_at or link_at:
+                self.touch_user(user_data["id"], seen_at, link_at)
+            return True
+
+    def count_users(self):
+        with self.users.lock:
+            return len(self.users.get())
+
+    def inactive_ids(self):
+        with self.users.lock:
+            return set(self._segment_index().inactive)
+
+    def set_users_inactive(self, user_ids, reason, at):
+        """Mark users the bot can no longer reach. Returns how many changed."""
+        changed = 0
+        with self.users.lock:
+            index = self._index()
+            segments = self._segment_index()
+            for user_id in user_ids:
+                user = index.get(user_id)
+                if user is None or user.get("inactive"):
+                    continue
+                user["inactive"] = reason
+                user["inactive_at"] = at
+                segments.inactive.add(user_id)
+                changed += 1
+            if changed:
+                self.users.mark_dirty()
+        return changed
+
+    def set_user_active(self, user_id):
+        with self.users.lock:
+            user = self._index().get(user_id)
+            if user is None or not user.get("inactive"):
+                return False
+            user.pop("inactive", None)
+            user.pop("inactive_at", None)
+            self._segment_index().inactive.discard(user_id)
+            self.users.mark_dirty()
+            return True
+
+    def touch_user(self, user_id, seen_at=None, link_at=None):
+        """Record activity: last_seen and/or last_link_at (a link was opened)."""
+        with self.users.lock, self.activity.lock:
+            if user_id not in self._index():
+                return
+            segments = self._segment_index()
+            activity = self.activity.get()
+            seen, link = activity.get(str(user_id), (None, None))
+            activity[str(user_id)] = [seen_at or seen, link_at or link]
+            segments.touch(user_id, seen, seen_at, link_at)
+            self.activity.mark_dirty()
+
+    def find_user_ids(self, joined_after=None, joined_before=None, seen_since=None,
+                      opened_link=None, include_inactive=False, exclude_banned=True):
+        """Ids matching a broadcast segment, in user-list order.
+
+        Answered from in-memory indexes (see _UserSegments); the SQLite
+        engine uses column indexes for the same query.
+        """
+        banned = self.banned_ids() if exclude_banned else ()
+        with self.users.lock, self.activity.lock:
+            return self._segment_index().find(
+                joined_after, joined_before, seen_since, opened_link, include_inactive, banned
+            )
+
+    # ---------------- bans ----------------
+
+    def load_banned_users(self):
+        with self.banned.lock:
+            return list(self.banned.get())
+
+    def save_banned_users(self, banned_users):
+        self.banned.set(list(banned_users))
+
+    def banned_ids(self):
+        with self.banned.lock:
+            return {user["id"] for user in self.banned.get()}
+
+    def get_banned(self, user_id):
+        with self.banned.lock:
+            for user in self.banned.get():
+                if user["id"] == user_id:
+                    return user
+            return None
+
+    def ban_user(self, entry):
+        with self.banned.lock:
+            banned_users = self.banned.get()
+            if any(user["id"] == entry["id"] for user in banned_users):
+                return False
+            banned_users.append(entry)
+            self.banned.mark_dirty()
+            return True
+
+    def unban_user(self, user_id):
+        """Remove a ban. Returns the removed entry or None."""
+        with self.banned.lock:
+            found = self.get_banned(user_id)
+            if found is None:
+                return None
+            self.banned.set([u for u in self.banned.get() if u["id"] != user_id])
+            return found
+
+    # ---------------- join requests ----------------
+
+    def add_join_request(self, user_id, chat_id, requested_at):
+        with self.join_requests.lock:
+            self.join_requests.get().setdefault(str(user_id), {})[str(chat_id)] = requested_at
+            self.join_requests.mark_dirty()
+
+    def remove_join_request(self, user_id, chat_id):
+        with self.join_requests.lock:
+            chats = self.join_requests.get().get(str(user_id))
+            if not chats or chats.pop(str(chat_id), None) is None:
+                return False
+            if not chats:
+                del self.join_requests.get()[str(user_id)]
+            self.join_requests.mark_dirty()
+            return True
+
+    def join_request_chats(self, user_id):
+        """Chat ids the user has a pending join request in."""
+        with self.join_requests.lock:
+            return {int(chat_id) for chat_id in self.join_requests.get().get(str(user_id), {})}
+
+    def close(self):
+        flush_all()
+
+
+class _UserSegments:
+    """Indexes over the JSON user list for broadcast segments.
+
+    joined   - (joined_at, position, id) sorted, range lookups with bisect
+    seen     - last_seen day -> ids, with the days kept sorted
+    linked   - ids that opened a link at least once
+    inactive - ids a broadcast could not reach
+    """
+
+    def __init__(self, users, activity):
+        self.position = {}
+        self.joined = []
+        self.seen = {}
+        self.seen_days = []
+        self.linked = set()
+        self.inactive = set()
+        for user in users:
+            self.add(user, keep_sorted=False)
+        self.joined.sort()
+        for key, (seen_at, link_at) in activity.items():
+            if int(key) in self.position:
+                self.touch(int(key), None, seen_at, link_at)
+
+    def add(self, user, keep_sorted=True):
+        user_id = user["id"]
+        if user_id in self.position:
+            return
+        position = self.position[user_id] = len(self.position)
+        if user.get("joined_at"):
+            entry = (user["joined_at"], position, user_id)
+            # users join in order, so this is nearly always an append
+            if keep_sorted and self.joined and entry < self.joined[-1]:
+                bisect.insort(self.joined, entry)
+            else:
+                self.joined.append(entry)
+        if user.get("inactive"):
+            self.inactive.add(user_id)
+
+    def touch(self, user_id, old_seen, seen_at=None, link_at=None):
+        if seen_at and seen_at != old_seen:
+            if old_seen in self.seen:
+                bucket = self.seen[old_seen]
+                bucket.discard(user_id)
+                if not bucket:
+                    del self.seen[old_seen]
+                    self.seen_days.pop(bisect.bisect_left(self.seen_days, old_seen))
+            if seen_at not in self.seen:
+                self.seen[seen_at] = set()
+                bisect.insort(self.seen_days, seen_at)
+            self.seen[seen_at].add(user_id)
+        if link_at:
+            self.linked.add(user_id)
+
+    def find(self, joined_after, joined_before, seen_since, opened_link, include_inactive, banned):
+        # start from the narrowest index, then test the rest per id
+        candidates = None
+        if joined_after or joined_before:
+            lo = bisect.bisect_left(self.joined, (joined_after,)) if joined_after else 0
+            hi = bisect.bisect_left(self.joined, (joined_before,)) if joined_before else len(self.joined)
+            candidates = [entry[2] for entry in self.joined[lo:hi]]
+        if seen_since:
+            start = bisect.bisect_left(self.seen_days, seen_since)
+            seen = set().union(*(self.seen[day] for day in self.seen_days[start:]))
+            candidates = seen if candidates is None else [u for u in candidates if u in seen]
+        if candidates is None:
+            candidates = self.linked if opened_link else self.position
+
+        ids = [
+            user_id for user_id in candidates
+            if (opened_link is None or (user_id in self.linked) == opened_link)
+            and (include_inactive or user_id not in self.inactive)
+            and user_id not in banned
+        ]
+        ids.sort(key=self.position.__getitem__)
+        return ids
+
+
+# ============================================================
+# SQLITE BACKEND
+# ============================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    key        TEXT PRIMARY KEY,
+    data       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    id           INTEGER PRIMARY KEY,
+    joined_at    TEXT,
+    inactive_at  TEXT,
+    last_seen    TEXT,
+    last_link_at TEXT,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_joined_at ON users (joined_at);
+CREATE TABLE IF NOT EXISTS banned_users (
+    id         INTEGER PRIMARY KEY,
+    data       TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS join_requests (
+    user_id      INTEGER NOT NULL,
+    chat_id      INTEGER NOT NULL,
+    requested_at TEXT,
+    PRIMARY KEY (user_id, chat_id)
+);
+"""
+
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+# user fields mirrored into their own indexed columns (the full record is `data`)
+USER_INDEXED_FIELDS = ("inactive_at", "last_seen", "last_link_at")
+USER_ROW_SQL = "(id, joined_at, inactive_at, last_seen, last_link_at, data) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def _user_row(user):
+    return (
+        user["id"],
+        user.get("joined_at"),
+        user.get("inactive_at") if user.get("inactive") else None,
+        user.get("last_seen"),
+        user.get("last_link_at"),
+        json.dumps(user)
+    )
+
+
+class SqliteStorage:
+    """Single-file SQLite store. Every lookup is a primary-key probe."""
+
+    name = "sqlite"
+
+    def __init__(self, path=DEFAULT_DB_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._import_json_files()
+
+    def _migrate(self):
+        """Columns added after the first release of the schema."""
+        with self._lock:
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(users)")}
+            for column in USER_INDEXED_FIELDS:
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE users ADD COLUMN {column} TEXT")
+                    # backfill from the JSON copy of the record
+                    self._conn.execute(f"UPDATE users SET {column} = json_extract(data, '$.{column}')")
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_users_{column} ON users ({column})")
+
+    def _import_json_files(self):
+        """First start on SQLite: pull in whatever the JSON files hold."""
+        with self._lock:
+            if self._conn.execute("SELECT EXISTS (SELECT 1 FROM links)").fetchone()[0]:
+                return
+            if self._conn.execute("SELECT EXISTS (SELECT 1 FROM users)").fetchone()[0]:
+                return
+
+            # plain reads: a JsonStorage would keep the old data registered
+            # with the flush layer (and in memory) for the life of the process
+            links = _read_json(LINKS_FILE, {})
+            users = _read_json(USERS_FILE, [])
+            banned_users = _read_json(BANNED_FILE, [])
+            if not (links or users or banned_users):
+                return
+
+            activity = _read_json(USER_ACTIVITY_FILE, {})
+            for user in users:
+                seen_at, link_at = activity.get(str(user.get("id")), (None, None))
+                if seen_at:
+                    user["last_seen"] = max(seen_at, user.get("last_seen") or "")
+                if link_at:
+                    user["last_link_at"] = max(link_at, user.get("last_link_at") or "")
+
+            self._conn.execute("BEGIN")
+            try:
+                if isinstance(links, dict):
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO links (key, data) VALUES (?, ?)",
+                        ((k, json.dumps(v)) for k, v in links.items())
+                    )
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO users {USER_ROW_SQL}",
+                    (_user_row(u) for u in users if "id" in u)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO banned_users (id, data) VALUES (?, ?)",
+                    ((u["id"], json.dumps(u)) for u in banned_users if "id" in u)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            print(f"📥 Imported {len(links)} links, {len(users)} users and "
+                  f"{len(banned_users)} bans into {self.path}")
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _replace_all(self, table, rows, insert_sql):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(f"DELETE FROM {table}")
+                self._conn.executemany(insert_sql, rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # ---------------- links ----------------
+
+    def load_links(self):
+        return {key: json.loads(data) for key, data in self._query("SELECT key, data FROM links")}
+
+    def save_links(self, links):
+        self._replace_all(
+            "links",
+            ((k, json.dumps(v)) for k, v in links.items()),
+            "INSERT INTO links (key, data) VALUES (?, ?)"
+        )
+
+    def get_link(self, key):
+        rows = self._query("SELECT data FROM links WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def put_link(self, key, data):
+        self._execute(
+            "INSERT OR REPLACE INTO links (key, data) VALUES (?, ?)",
+            (key, json.dumps(data))
+        )
+
+    # ---------------- users ----------------
+
+    def load_users(self):
+        return [json.loads(data) for (data,) in self._query("SELECT data FROM users ORDER BY rowid")]
+
+    def save_users(self, users):
+        self._replace_all(
+            "users",
+            (_user_row(u) for u in users),
+            f"INSERT OR REPLACE INTO users {USER_ROW_SQL}"
+        )
+
+    def user_ids(self):
+        return {user_id for (user_id,) in self._query("SELECT id FROM users")}
+
+    def get_user(self, user_id):
+        rows = self._query("SELECT data FROM users WHERE id = ?", (user_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def add_user(self, user_data):
+        cur = self._execute(
+            f"INSERT OR IGNORE INTO users {USER_ROW_SQL}",
+            _user_row(user_data)
+        )
+        return cur.rowcount > 0
+
+    def count_users(self):
+        return self._query("SELECT COUNT(*) FROM users")[0][0]
+
+    def inactive_ids(self):
+        return {user_id for (user_id,) in self._query(
+            "SELECT id FROM users WHERE inactive_at IS NOT NULL"
+        )}
+
+    def set_users_inactive(self, user_ids, reason, at):
+        """Mark users the bot can no longer reach. Returns how many changed."""
+        with self._lock:
+            cur = self._conn.executemany(
+                "UPDATE users SET inactive_at = ?, "
+                "data = json_set(data, '$.inactive', ?, '$.inactive_at', ?) "
+                "WHERE id = ? AND inactive_at IS NULL",
+                ((at, reason, at, user_id) for user_id in user_ids)
+            )
+            return cur.rowcount
+
+    def set_user_active(self, user_id):
+        cur = self._execute(
+            "UPDATE users SET inactive_at = NULL, "
+            "data = json_remove(data, '$.inactive', '$.inactive_at') "
+            "WHERE id = ? AND inactive_at IS NOT NULL",
+            (user_id,)
+        )
+        return cur.rowcount > 0
+
+    def touch_user(self, user_id, seen_at=None, link_at=None):
+        """Record activity: last_seen and/or last_link_at (a link was opened)."""
+        for column, value in (("last_seen", seen_at), ("last_link_at", link_at)):
+            if value:
+                self._execute(
+                    f"UPDATE users SET {column} = ?, data = json_set(data, '$.{column}', ?) WHERE id = ?",
+                    (value, value, user_id)
+                )
+
+    def find_user_ids(self, joined_after=None, joined_before=None, seen_since=None,
+                      opened_link=None, include_inactive=False, exclude_banned=True):
+        """Ids matching a broadcast segment, in user-list order. Each filter is an indexed column."""
+        clauses, params = [], []
+        if not include_inactive:
+            # most users are active: the unary + keeps the planner on the
+            # more selective joined_at / last_seen / last_link_at indexes
+            clauses.append("+inactive_at IS NULL")
+        if joined_after:
+            clauses.append("joined_at >= ?")
+            params.append(joined_after)
+        if joined_before:
+            clauses.append("joined_at < ?")
+            params.append(joined_before)
+        if seen_since:
+            clauses.append("last_seen >= ?")
+            params.append(seen_since)
+        if opened_link is not None:
+            clauses.append("last_link_at IS NOT NULL" if opened_link else "last_link_at IS NULL")
+        if exclude_banned:
+            clauses.append("id NOT IN (SELECT id FROM banned_users)")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # "+rowid": sort only the matching rows instead of walking the table in rowid order
+        return [user_id for (user_id,) in self._query(f"SELECT id FROM users {where} ORDER BY +rowid", params)]
+
+    # ---------------- bans ----------------
+
+    def load_banned_users(self):
+        return [json.loads(data) for (data,) in self._query("SELECT data FROM banned_users ORDER BY rowid")]
+
+    def save_banned_users(self, banned_users):
+        self._replace_all(
+            "banned_users",
+            ((u["id"], json.dumps(u)) for u in banned_users),
+            "INSERT OR REPLACE INTO banned_users (id, data) VALUES (?, ?)"
+        )
+
+    def banned_ids(self):
+        return {user_id for (user_id,) in self._query("SELECT id FROM banned_users")}
+
+    def get_banned(self, user_id):
+        rows = self._query("SELECT data FROM banned_users WHERE id = ?", (user_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def ban_user(self, entry):
+        cur = self._execute(
+            "INSERT OR IGNORE INTO banned_users (id, data) VALUES (?, ?)",
+            (entry["id"], json.dumps(entry))
+        )
+        return cur.rowcount > 0
+
+    def unban_user(self, user_id):
+        with self._lock:
+            entry = self.get_banned(user_id)
+            if entry is None:
+                return None
+            self._execute("DELETE FROM banned_users WHERE id = ?", (user_id,))
+            return entry
+
+    # ---------------- join requests ----------------
+
+    def add_join_request(self, user_id, chat_id, requested_at):
+        self._execute(
+            "INSERT OR REPLACE INTO join_requests (user_id, chat_id, requested_at) VALUES (?, ?, ?)",
+            (user_id, chat_id, requested_at)
+        )
+
+    def remove_join_request(self, user_id, chat_id):
+        cur = self._execute(
+            "DELETE FROM join_requests WHERE user_id = ? AND chat_id = ?",
+            (user_id, chat_id)
+        )
+        return cur.rowcount > 0
+
+    def join_request_chats(self, user_id):
+        """Chat ids the user has a pending join request in."""
+        return {chat_id for (chat_id,) in self._query(
+            "SELECT chat_id FROM join_requests WHERE user_id = ?", (user_id,)
+        )}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ============================================================
+# ENGINE SELECTION
+# ============================================================
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def init_storage(backend=None):
+    """Create the configured engine. Called once from main, lazily otherwise."""
+    global _storage
+    with _storage_lock:
+        if _storage is not None:
+            return _storage
+
+        backend = (backend or os.getenv("STORAGE_BACKEND", "json")).strip().lower()
+
+        if backend == "sqlite":
+            _storage = SqliteStorage(os.getenv("STORAGE_DB", DEFAULT_DB_FILE))
+        else:
+            if backend != "json":
+                print(f"⚠️ Unknown STORAGE_BACKEND '{backend}', falling back to json")
+            _storage = JsonStorage()
+
+        print(f"💾 Storage backend: {_storage.name}")
+        return _storage
+
+
+def get_storage():
+    if _storage is None:
+        return init_storage()
+    return _storage
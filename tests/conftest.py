@@ -0,0 +1,37 @@
+# The bot's modules live flat in the repository root.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flush  # noqa: E402
+from storage import JsonStorage, SqliteStorage  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # state files are relative and shared per path; every test starts empty
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(flush, "_documents", {})
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    def open_store(backend):
+        if backend == "json":
+            return JsonStorage()
+        return SqliteStorage(str(tmp_path / "bot.db"))
+    return open_store
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, open_store):
+    store = open_store(request.param)
+    yield store
+    store.close()
+
+
+def make_user(user_id, joined_at="2026-10-01T12:00:00", **fields):
+    return dict({"id": user_id, "username": f"u{user_id}", "first_name": "x", "joined_at": joined_at}, **fields)
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+from shared_functions import CONVERSATION_KEYS, begin_conversation
+
+
+def test_starting_a_flow_abandons_the_others():
+    user_data = {"original_encoded_id": "abc"}
+    begin_conversation(user_data, "batch_state", "waiting_first_message")
+    begin_conversation(user_data, "waiting_for_genlink")
+
+    assert user_data == {"original_encoded_id": "abc", "waiting_for_genlink": True}
+
+
+def test_restarting_the_same_flow_keeps_its_new_value():
+    user_data = {}
+    begin_conversation(user_data, "waiting_for", "start_image")
+    begin_conversation(user_data, "waiting_for", "help_text")
+    assert user_data == {"waiting_for": "help_text"}
+
+
+def _text_update(text):
+    from telegram import Chat, Message, Update, User
+
+    user = User(id=1, first_name="admin", is_bot=False)
+    message = Message(
+        message_id=1,
+        date=datetime.utcnow(),
+        chat=Chat(id=1, type="private"),
+        from_user=user,
+        text=text
+    )
+    return Update(update_id=1, message=message)
+
+
+def test_genlink_reply_after_an_abandoned_batchlink():
+    pytest.importorskip("telegram")
+    from conversation_router import CONVERSATION_STATES, active_state
+    from links import genlink_next_message
+
+    assert tuple(key for key, _, _ in CONVERSATION_STATES) == CONVERSATION_KEYS
+
+    user_data = {}
+    # /batchlink, never finished
+    begin_conversation(user_data, "batch_state", "waiting_first_message")
+    # /genlink
+    begin_conversation(user_data, "waiting_for_genlink")
+
+    key, handler = active_state(_text_update("file"), user_data)
+    assert key == "waiting_for_genlink"
+    assert handler is genlink_next_message
@@ -0,0 +1,47 @@
+import json
+import time
+
+import flush
+from flush import JsonDocument, flush_all
+
+
+def test_burst_of_changes_is_one_write(tmp_path):
+    doc = JsonDocument(str(tmp_path / "state.json"), {}, delay_ms=50)
+    for i in range(200):
+        with doc.lock:
+            doc.get()[str(i)] = i
+            doc.mark_dirty()
+    time.sleep(0.3)
+
+    assert doc.writes == 1
+    assert len(json.loads((tmp_path / "state.json").read_text())) == 200
+
+
+def test_no_temp_files_are_left_behind(tmp_path):
+    doc = JsonDocument(str(tmp_path / "state.json"), [], delay_ms=0)
+    doc.set([1, 2, 3])
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_flush_all_writes_pending_documents(tmp_path):
+    doc = flush.document(str(tmp_path / "slow.json"), {}, delay_ms=60000)
+    doc.set({"a": 1})
+    assert not (tmp_path / "slow.json").exists()
+    flush_all()
+    assert json.loads((tmp_path / "slow.json").read_text()) == {"a": 1}
+
+
+def test_chunked_dumps_match_json_dumps():
+    users = [{"id": i, "name": f"u{i}"} for i in range(flush.DUMPS_CHUNK * 2 + 7)]
+    links = {str(i): {"chat_id": -i} for i in range(flush.DUMPS_CHUNK + 1)}
+    for data in (users, links, [], {}, [1]):
+        assert json.loads(flush._dumps(data)) == data
+
+
+def test_later_change_is_written_after_an_earlier_flush(tmp_path):
+    doc = JsonDocument(str(tmp_path / "state.json"), [], delay_ms=0)
+    doc.set([{"id": 1}])
+    with doc.lock:
+        doc.get()[0]["seen"] = "today"
+        doc.mark_dirty()
+    assert json.loads((tmp_path / "state.json").read_text()) == [{"id": 1, "seen": "today"}]
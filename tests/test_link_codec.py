@@ -0,0 +1,82 @@
+import base64
+
+import pytest
+
+import link_codec
+from link_codec import encode_link, encode_batch_link, decode_link
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setenv("LINK_SECRET", "test-secret")
+    monkeypatch.setattr(link_codec, "_secret", None)
+
+
+def _raw(payload):
+    return bytearray(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+def _encode(raw):
+    return base64.urlsafe_b64encode(bytes(raw)).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("chat_id, message_id", [
+    (-1001234567890, 1),
+    (-1001234567890, 2 ** 31),
+    (5373577888, 42),
+    (0, 0),
+])
+def test_single_round_trip(chat_id, message_id):
+    assert decode_link(encode_link(chat_id, message_id)) == {
+        "chat_id": chat_id,
+        "message_id": message_id
+    }
+
+
+def test_batch_round_trip():
+    assert decode_link(encode_batch_link(-1009876543210, 100, 250)) == {
+        "type": "batch",
+        "chat_id": -1009876543210,
+        "first_message_id": 100,
+        "last_message_id": 250,
+        "total_messages": 151
+    }
+
+
+def test_payload_is_shorter_than_legacy_base64():
+    legacy = base64.urlsafe_b64encode(b"-1001234567890:123456").decode()
+    assert len(encode_link(-1001234567890, 123456)) < len(legacy)
+
+
+def test_flipped_body_bit_is_rejected():
+    raw = _raw(encode_link(-1001234567890, 77))
+    raw[2] ^= 0x01
+    assert decode_link(_encode(raw)) is None
+
+
+def test_flipped_tag_bit_is_rejected():
+    raw = _raw(encode_link(-1001234567890, 77))
+    raw[-1] ^= 0x01
+    assert decode_link(_encode(raw)) is None
+
+
+def test_other_secret_is_rejected(monkeypatch):
+    payload = encode_batch_link(-1001234567890, 1, 5)
+    monkeypatch.setenv("LINK_SECRET", "another-secret")
+    monkeypatch.setattr(link_codec, "_secret", None)
+    assert decode_link(payload) is None
+
+
+def test_truncated_payload_is_rejected():
+    payload = encode_link(-1001234567890, 77)
+    assert decode_link(payload[:-3]) is None
+    assert decode_link(payload[:4]) is None
+
+
+@pytest.mark.parametrize("payload", [
+    base64.urlsafe_b64encode(b"-1001234567890:55").decode(),
+    "",
+    "not base64 !!",
+])
+def test_legacy_and_garbage_payloads_are_not_links(payload):
+    assert decode_link(payload) is None
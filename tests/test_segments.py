@@ -0,0 +1,125 @@
+import json
+import itertools
+import sqlite3
+
+import flush
+from conftest import make_user
+
+
+def test_touch_user_shows_up_in_the_record(store):
+    store.add_user(make_user(1))
+    store.touch_user(1, seen_at="2026-10-10")
+    store.touch_user(1, link_at="2026-10-11")
+    store.touch_user(404, seen_at="2026-10-10")
+    user = store.get_user(1)
+    assert user["last_seen"] == "2026-10-10"
+    assert user["last_link_at"] == "2026-10-11"
+
+
+# ---------------- broadcast segments ----------------
+
+def _populate(store):
+    for user_id in range(1, 61):
+        store.add_user(make_user(user_id, joined_at=f"2026-10-{user_id % 28 + 1:02d}T08:00:00"))
+    for user_id in range(1, 61, 3):
+        store.touch_user(user_id, seen_at=f"2026-10-{user_id % 18 + 1:02d}")
+    for user_id in range(1, 61, 4):
+        store.touch_user(user_id, link_at="2026-10-12")
+    store.set_users_inactive([5, 10, 15, 20], "blocked", "2026-10-15T00:00:00")
+    store.ban_user({"id": 9})
+    store.ban_user({"id": 13})
+
+
+SEGMENTS = [
+    dict(zip(("joined_after", "joined_before", "seen_since", "opened_link", "include_inactive", "exclude_banned"), combo))
+    for combo in itertools.product(
+        (None, "2026-10-08"), (None, "2026-10-20"), (None, "2026-10-09"),
+        (None, True, False), (False, True), (True, False)
+    )
+]
+
+
+def test_segments_match_on_both_engines(open_store):
+    json_store = open_store("json")
+    sqlite_store = open_store("sqlite")
+    _populate(json_store)
+    _populate(sqlite_store)
+
+    for filters in SEGMENTS:
+        assert json_store.find_user_ids(**filters) == sqlite_store.find_user_ids(**filters), filters
+
+
+def test_segment_filters(store):
+    _populate(store)
+    everyone = store.find_user_ids()
+    assert 5 not in everyone and 9 not in everyone
+    assert len(everyone) == 60 - 4 - 2
+    assert 5 in store.find_user_ids(include_inactive=True)
+    assert 9 in store.find_user_ids(exclude_banned=False)
+
+    recent = store.find_user_ids(seen_since="2026-10-15")
+    assert recent and all(store.get_user(u)["last_seen"] >= "2026-10-15" for u in recent)
+    assert all("last_link_at" in store.get_user(u) for u in store.find_user_ids(opened_link=True))
+    assert all(store.get_user(u)["joined_at"] < "2026-10-05"
+               for u in store.find_user_ids(joined_before="2026-10-05"))
+
+
+def test_segments_follow_later_changes(store):
+    _populate(store)
+    store.find_user_ids()
+    store.add_user(make_user(100, joined_at="2026-10-30T00:00:00"))
+    store.touch_user(100, seen_at="2026-10-30", link_at="2026-10-30")
+    store.set_user_active(5)
+
+    assert store.find_user_ids(joined_after="2026-10-29") == [100]
+    assert store.find_user_ids(seen_since="2026-10-30", opened_link=True) == [100]
+    assert 5 in store.find_user_ids()
+
+
+# ---------------- engine specifics ----------------
+
+def test_json_activity_is_kept_out_of_users_json(tmp_path, monkeypatch, open_store):
+    store = open_store("json")
+    store.add_user(make_user(1, last_seen="2026-10-01"))
+    store.touch_user(1, link_at="2026-10-02")
+    store.close()
+
+    assert "last_seen" not in (tmp_path / "users.json").read_text()
+    assert json.loads((tmp_path / "user_activity.json").read_text()) == {"1": ["2026-10-01", "2026-10-02"]}
+
+    monkeypatch.setattr(flush, "_documents", {})
+    reopened = open_store("json")
+    assert reopened.get_user(1)["last_link_at"] == "2026-10-02"
+    assert reopened.find_user_ids(seen_since="2026-10-01") == [1]
+
+
+def test_sqlite_migrates_an_old_schema(tmp_path, open_store):
+    conn = sqlite3.connect(tmp_path / "bot.db")
+    conn.executescript("""
+        CREATE TABLE users (id INTEGER PRIMARY KEY, joined_at TEXT, data TEXT NOT NULL);
+        CREATE TABLE links (key TEXT PRIMARY KEY, data TEXT NOT NULL);
+    """)
+    conn.execute("INSERT INTO links VALUES ('k', '{}')")
+    conn.execute("INSERT INTO users VALUES (1, '2026-10-01', ?)",
+                 (json.dumps(make_user(1, last_seen="2026-10-09", inactive="blocked", inactive_at="2026-10-03")),))
+    conn.execute("INSERT INTO users VALUES (2, '2026-10-02', ?)", (json.dumps(make_user(2)),))
+    conn.commit()
+    conn.close()
+
+    store = open_store("sqlite")
+    columns = {row[1] for row in store._conn.execute("PRAGMA table_info(users)")}
+    assert {"inactive_at", "last_seen", "last_link_at"} <= columns
+    assert store.find_user_ids(seen_since="2026-10-09", include_inactive=True) == [1]
+    assert store.inactive_ids() == {1}
+    store.close()
+
+
+def test_sqlite_import_carries_json_activity(open_store):
+    legacy = open_store("json")
+    legacy.add_user(make_user(1))
+    legacy.touch_user(1, seen_at="2026-10-09", link_at="2026-10-10")
+    legacy.close()
+
+    store = open_store("sqlite")
+    assert store.find_user_ids(seen_since="2026-10-09", opened_link=True) == [1]
+    store.close()
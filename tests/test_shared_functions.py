@@ -0,0 +1,36 @@
+import pytest
+
+import storage
+import shared_functions
+
+
+@pytest.fixture
+def bot_store(store, monkeypatch):
+    monkeypatch.setattr(storage, "_storage", store)
+    monkeypatch.setattr(shared_functions, "_user_ids", None)
+    monkeypatch.setattr(shared_functions, "_banned_ids", None)
+    monkeypatch.setattr(shared_functions, "_inactive_ids", None)
+    monkeypatch.setattr(shared_functions, "_touched", {})
+    return store
+
+
+def test_new_user_is_not_touched_again_the_same_day(bot_store, monkeypatch):
+    shared_functions.auto_add_user(1, "u1", "x")
+    assert bot_store.get_user(1)["last_seen"]
+
+    writes = []
+    monkeypatch.setattr(bot_store, "touch_user", lambda *args: writes.append(args))
+    assert not shared_functions.touch_due(1)
+    shared_functions.touch_user(1)
+    assert writes == []
+
+    # opening a link is still recorded
+    assert shared_functions.touch_due(1, opened_link=True)
+    shared_functions.touch_user(1, opened_link=True)
+    assert len(writes) == 1
+
+
+def test_known_user_is_not_registered_again(bot_store):
+    shared_functions.auto_add_user(1, "u1", "x")
+    assert not shared_functions.needs_registration(1)
+    assert shared_functions.needs_registration(2)
@@ -0,0 +1,105 @@
+import flush
+from conftest import make_user
+
+
+def test_links(store):
+    store.put_link("abc", {"chat_id": -100, "message_id": 5})
+    assert store.get_link("abc") == {"chat_id": -100, "message_id": 5}
+    assert store.get_link("missing") is None
+    store.save_links({"x": {"n": 1}})
+    assert store.load_links() == {"x": {"n": 1}}
+
+
+def test_users(store):
+    assert store.add_user(make_user(1))
+    assert store.add_user(make_user(2))
+    assert not store.add_user(make_user(1, first_name="again"))
+    assert store.user_ids() == {1, 2}
+    assert store.count_users() == 2
+    assert store.get_user(1)["first_name"] == "x"
+    assert store.get_user(3) is None
+    assert [u["id"] for u in store.load_users()] == [1, 2]
+
+
+def test_save_users_replaces_everything(store):
+    store.add_user(make_user(1))
+    store.save_users([make_user(5), make_user(6)])
+    assert store.user_ids() == {5, 6}
+    assert store.get_user(1) is None
+
+
+def test_inactive_round_trip(store):
+    for user_id in (1, 2, 3):
+        store.add_user(make_user(user_id))
+    assert store.set_users_inactive([1, 2, 99], "blocked", "2026-10-05T00:00:00") == 2
+    assert store.set_users_inactive([1], "blocked", "2026-10-06T00:00:00") == 0
+    assert store.inactive_ids() == {1, 2}
+    assert store.get_user(1)["inactive"] == "blocked"
+
+    assert store.set_user_active(1)
+    assert not store.set_user_active(3)
+    assert store.inactive_ids() == {2}
+    assert "inactive" not in store.get_user(1)
+
+
+def test_bans(store):
+    assert store.ban_user({"id": 7, "reason": "spam"})
+    assert not store.ban_user({"id": 7})
+    assert store.banned_ids() == {7}
+    assert store.get_banned(7)["reason"] == "spam"
+    assert store.unban_user(7)["id"] == 7
+    assert store.unban_user(7) is None
+    assert store.banned_ids() == set()
+
+
+def test_json_data_survives_a_restart(tmp_path, monkeypatch, open_store):
+    store = open_store("json")
+    store.put_link("k", {"chat_id": 1, "message_id": 2})
+    store.add_user(make_user(1))
+    store.close()
+
+    monkeypatch.setattr(flush, "_documents", {})
+    reopened = open_store("json")
+    assert reopened.get_link("k") == {"chat_id": 1, "message_id": 2}
+    assert reopened.user_ids() == {1}
+
+
+def test_sqlite_imports_the_json_files(monkeypatch, open_store):
+    legacy = open_store("json")
+    legacy.put_link("k", {"chat_id": 1, "message_id": 2})
+    legacy.add_user(make_user(1))
+    legacy.ban_user({"id": 1})
+    legacy.close()
+    monkeypatch.setattr(flush, "_documents", {})
+
+    store = open_store("sqlite")
+    assert store.get_link("k") == {"chat_id": 1, "message_id": 2}
+    assert store.get_user(1)["username"] == "u1"
+    assert store.banned_ids() == {1}
+    # the import reads the files once and leaves nothing behind in memory
+    assert flush._documents == {}
+    store.close()
+
+
+def test_sqlite_import_runs_only_into_an_empty_database(monkeypatch, open_store):
+    first = open_store("sqlite")
+    first.add_user(make_user(1))
+    first.close()
+    legacy = open_store("json")
+    legacy.add_user(make_user(2))
+    legacy.close()
+    monkeypatch.setattr(flush, "_documents", {})
+
+    store = open_store("sqlite")
+    assert store.user_ids() == {1}
+    store.close()
+
+
+def test_join_requests(store):
+    store.add_join_request(1, -100, "2026-10-10T00:00:00")
+    store.add_join_request(1, -200, "2026-10-10T00:00:00")
+    assert store.join_request_chats(1) == {-100, -200}
+    assert store.remove_join_request(1, -100)
+    assert not store.remove_join_request(1, -100)
+    assert store.join_request_chats(1) == {-200}
+    assert store.join_request_chats(2) == set()
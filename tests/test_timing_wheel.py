@@ -0,0 +1,61 @@
+import random
+
+from timing_wheel import TimingWheel
+
+
+def _drain(wheel, until):
+    """Advance one tick at a time, returning (tick, item) for every expiry."""
+    fired = []
+    while wheel.current < until:
+        tick = wheel.current + 1
+        fired.extend((tick, item) for item in wheel.advance(tick))
+    return fired
+
+
+def test_items_expire_exactly_on_their_tick_in_order():
+    wheel = TimingWheel(current=1000)
+    random.seed(7)
+    dues = sorted(random.sample(range(1001, 1000 + 64 ** 3), 500))
+    shuffled = dues[:]
+    random.shuffle(shuffled)
+    for due in shuffled:
+        assert wheel.add((due, "chat", due))
+
+    fired = _drain(wheel, dues[-1])
+    assert [tick for tick, _ in fired] == dues
+    assert all(tick == item[0] for tick, item in fired)
+    assert wheel.count == 0
+
+
+def test_items_beyond_every_level_go_through_the_overflow_list():
+    wheel = TimingWheel(current=0, bits=2, levels=2)   # 16 ticks of wheel
+    dues = [3, 15, 16, 17, 40, 100]
+    for due in reversed(dues):
+        wheel.add((due,))
+    assert wheel.overflow
+
+    fired = _drain(wheel, 100)
+    assert [tick for tick, _ in fired] == dues
+
+
+def test_big_jump_returns_everything_due():
+    wheel = TimingWheel(current=0)
+    for due in (5, 70, 5000, 300000):
+        wheel.add((due,))
+
+    assert sorted(item[0] for item in wheel.advance(6000)) == [5, 70, 5000]
+    assert wheel.count == 1
+    assert [item[0] for item in wheel.advance(300000)] == [300000]
+
+
+def test_due_items_are_refused():
+    wheel = TimingWheel(current=50)
+    assert not wheel.add((50,))
+    assert not wheel.add((10,))
+    assert wheel.count == 0
+
+
+def test_empty_wheel_jumps_straight_to_the_target():
+    wheel = TimingWheel(current=0)
+    assert wheel.advance(10 ** 9) == []
+    assert wheel.current == 10 ** 9
@@ -0,0 +1,82 @@
+# timing_wheel.py
+
+# ============================================================
+# HIERARCHICAL TIMING WHEEL
+# ============================================================
+#
+# Used by auto_delete.py: inserting is O(1) and every tick only looks at one
+# slot, however many deletions are pending.
+
+WHEEL_BITS = 6          # 64 slots per level
+WHEEL_LEVELS = 4        # 64^4 ticks ~ 194 days before the overflow list
+
+
+class TimingWheel:
+    """Hierarchical timing wheel over integer ticks.
+
+    Level 0 has one slot per tick, each level above covers 64 times the
+    span of the one below. An item sits on the lowest level whose span
+    still contains its due tick and trickles down as the wheel turns.
+    """
+
+    def __init__(self, current, bits=WHEEL_BITS, levels=WHEEL_LEVELS):
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.levels = levels
+        self.current = current
+        self.wheels = [[[] for _ in range(1 << bits)] for _ in range(levels)]
+        self.overflow = []
+        self.count = 0
+
+    def add(self, item):
+        """item[0] is the due tick. Returns False if it is already due."""
+        due = item[0]
+        if due <= self.current:
+            return False
+        self._place(item)
+        self.count += 1
+        return True
+
+    def _place(self, item):
+        due = item[0]
+        for level in range(self.levels):
+            shift = self.bits * (level + 1)
+            # same higher digits as now: it belongs on this level
+            if due >> shift == self.current >> shift:
+                self.wheels[level][(due >> (self.bits * level)) & self.mask].append(item)
+                return
+        self.overflow.append(item)
+
+    def advance(self, to_tick):
+        """Turn the wheel up to to_tick and return every item that fell due."""
+        expired = []
+        if not self.count:
+            self.current = max(self.current, to_tick)
+            return expired
+
+        while self.current < to_tick:
+            self.current += 1
+            self._cascade()
+            slot = self.wheels[0][self.current & self.mask]
+            if slot:
+                expired.extend(slot)
+                slot.clear()
+        self.count -= len(expired)
+        return expired
+
+    def _cascade(self):
+        # when a level's digit rolls over, spread the next slot of the level
+        # above over the lower levels (top-down, so items can fall all the way)
+        for level in range(self.levels - 1, 0, -1):
+            if self.current & ((1 << (self.bits * level)) - 1):
+                continue
+            if level == self.levels - 1 and self.current & ((1 << (self.bits * self.levels)) - 1) == 0:
+                pending, self.overflow = self.overflow, []
+                for item in pending:
+                    self._place(item)
+            slot = self.wheels[level][(self.current >> (self.bits * level)) & self.mask]
+            if slot:
+                items = list(slot)
+                slot.clear()
+                for item in items:
+                    self._place(item)
@@ -4,6 +4,7 @@ import subprocess
 import asyncio
 from telegram import Update
 from telegram.ext import ContextTypes
+from flush import flush_all
 
 OWNER_ID = 5373577888  # Replace with your actual owner ID
 
@@ -45,7 +46,8 @@ async def update_bot(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await status_msg.edit_text("✦ ʀᴇꜱᴛᴀʀᴛᴇᴅ ꜱᴜᴄᴄᴇꜱꜱꜰᴜʟʟy!")
             await asyncio.sleep(3)
             
-            # Restart the bot
+            # Restart the bot (execl skips atexit, so write pending state first)
+            flush_all()
             os.execl(sys.executable, sys.executable, *sys.argv)
         else:
             await status_msg.edit_text(f"❌ ꜰᴀɪʟᴇᴅ ᴛᴏ ᴜᴩᴅᴀᴛᴇ: {result.stderr}")
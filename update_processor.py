@@ -0,0 +1,119 @@
+# update_processor.py
+import os
+import asyncio
+import logging
+
+from telegram.ext import BaseUpdateProcessor
+
+# ============================================================
+# PER-USER ORDERED UPDATE PROCESSING
+# ============================================================
+#
+# concurrent_updates(True) runs up to 256 updates at once in no particular
+# order, so two quick messages from the same admin could both see
+# waiting_for_genlink / batch_state / waiting_for_api set and race each
+# other. This processor keeps the global concurrency but runs the updates
+# of one user strictly one after another, in arrival order.
+#
+# PTB's process_update() takes one of max_concurrent_updates slots and then
+# calls do_process_update(), where the user's updates wait for their turn.
+# A waiting update keeps its slot, so beyond UPDATE_USER_MAX_PENDING queued
+# updates for one user further updates from that user are dropped: a user
+# flooding the bot holds at most that many slots while everybody else keeps
+# being served. A dropped button press is still answered, so the button
+# stops spinning and the user sees that the bot is busy.
+
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "256"))
+UPDATE_USER_MAX_PENDING = int(os.getenv("UPDATE_USER_MAX_PENDING", "20"))
+BUSY_TEXT = "⏳ Still working on your previous requests, please try again in a moment."
+
+logger = logging.getLogger(__name__)
+
+
+class _UserQueue:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()   # FIFO: waiters are served in arrival order
+        self.pending = 0             # running + waiting updates of this user
+
+
+class KeyedUpdateProcessor(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates=UPDATE_CONCURRENCY, max_pending_per_user=UPDATE_USER_MAX_PENDING):
+        super().__init__(max_concurrent_updates)
+        self.max_pending_per_user = max_pending_per_user
+        self._users = {}
+        self.running = 0
+        self.dropped = 0
+
+    @staticmethod
+    def update_key(update):
+        """Updates are ordered per user; ones without a user per chat."""
+        user = getattr(update, "effective_user", None)
+        if user is not None:
+            return user.id
+        chat = getattr(update, "effective_chat", None)
+        return chat.id if chat is not None else None
+
+    async def do_process_update(self, update, coroutine):
+        # called by BaseUpdateProcessor.process_update holding a global slot
+        key = self.update_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        queue = self._users.get(key)
+        if queue is None:
+            queue = self._users[key] = _UserQueue()
+        if queue.pending >= self.max_pending_per_user:
+            self.dropped += 1
+            coroutine.close()
+            logger.warning("Dropped update %s from %s: %s already pending",
+                           getattr(update, "update_id", None), key, queue.pending)
+            await self._answer_dropped(update)
+            return
+
+        queue.pending += 1
+        try:
+            async with queue.lock:
+                await self._run(coroutine)
+        finally:
+            queue.pending -= 1
+            if not queue.pending:
+                self._users.pop(key, None)
+
+    @staticmethod
+    async def _answer_dropped(update):
+        query = getattr(update, "callback_query", None)
+        if query is None:
+            return
+        try:
+            await query.answer(BUSY_TEXT)
+        except Exception as e:
+            logger.warning("Could not answer dropped callback query: %s", e)
+
+    async def _run(self, coroutine):
+        self.running += 1
+        try:
+            await coroutine
+        finally:
+            self.running -= 1
+
+    async def initialize(self):
+        self._users.clear()
+
+    async def shutdown(self):
+        if self._users:
+            print(f"⚠️ Shutting down with updates from {len(self._users)} users still queued")
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "users": len(self._users),
+            # at most one update per user runs, the rest wait for it
+            "queued": sum(q.pending - 1 for q in self._users.values()),
+            "dropped": self.dropped
+        }
+
+
+update_processor = KeyedUpdateProcessor()
@@ -2,7 +2,9 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler
 
-from shared_functions import load_admins, load_users, auto_add_user as add_user
+from shared_functions import load_users
+from async_storage import auto_add_user as add_user
+from admin_registry import is_admin
 
 from datetime import datetime, timedelta
 async def auto_add_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -12,14 +14,13 @@ async def auto_add_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     user = update.effective_user
     
-    add_user(user_id, user.username, user.first_name, user.last_name)
+    await add_user(user_id, user.username, user.first_name, user.last_name)
     
 async def users_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    admins = load_admins()
     
     # Check if user is admin or owner
-    if user_id not in admins and user_id != 5373577888:
+    if not is_admin(user_id):
         await update.message.reply_text("You are not authorized to use this command!")
         return
     
@@ -28,9 +29,13 @@ async def users_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Get recent users (last 7 days)
     recent_users = 0
+    inactive_users = 0
     week_ago = datetime.utcnow() - timedelta(days=7)
     
     for user in users:
+        # blocked the bot / deleted account, found by a broadcast
+        if user.get('inactive'):
+            inactive_users += 1
         joined_at = datetime.fromisoformat(user.get('joined_at', datetime.utcnow().isoformat()))
         if joined_at > week_ago:
             recent_users += 1
@@ -38,6 +43,8 @@ async def users_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message_text = (
         f"📊 **Users Statistics**\n\n"
         f"👥 **Total Users:** `{total_users}`\n"
+        f"✅ **Active:** `{total_users - inactive_users}`\n"
+        f"💤 **Inactive:** `{inactive_users}` (blocked the bot or deleted)\n"
         f"🆕 **Recent Users (7 days):** `{recent_users}`\n"
         f"📈 **Growth Rate:** `{recent_users/total_users*100:.1f}%`\n\n"
         f"💡 *Note: Users are automatically added when they interact with the bot.*"
@@ -0,0 +1,71 @@
+# webhook.py
+import os
+import secrets
+
+from telegram import Update
+
+# ============================================================
+# WEBHOOK MODE
+# ============================================================
+#
+# By default the bot long-polls getUpdates. With BOT_MODE=webhook it runs
+# PTB's built-in webhook server instead. Telegram then pushes updates over
+# up to WEBHOOK_MAX_CONNECTIONS parallel HTTPS connections, which takes the
+# polling round trip off /start link latency during spikes.
+#
+# Every request must carry the X-Telegram-Bot-Api-Secret-Token header equal
+# to WEBHOOK_SECRET. PTB answers 403 to anything else, so a guessed URL
+# cannot inject updates.
+#
+# Local test (WEBHOOK_URL can point anywhere reachable or be a tunnel):
+#
+#   curl -X POST http://127.0.0.1:8443/<WEBHOOK_PATH> \
+#        -H "Content-Type: application/json" \
+#        -H "X-Telegram-Bot-Api-Secret-Token: $WEBHOOK_SECRET" \
+#        -d @recorded_update.json
+
+BOT_MODE = os.getenv("BOT_MODE", "polling").strip().lower()
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram").strip("/")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# Telegram allows 1-100 (its own default is 40)
+WEBHOOK_MAX_CONNECTIONS = max(1, min(100, int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "100"))))
+
+
+def webhook_enabled():
+    return BOT_MODE == "webhook"
+
+
+def update_queue_depth(application):
+    """Updates received but not yet picked up by a handler."""
+    try:
+        return application.update_queue.qsize()
+    except Exception:
+        return 0
+
+
+def run_webhook(application):
+    if not WEBHOOK_URL:
+        raise ValueError("BOT_MODE=webhook needs WEBHOOK_URL (public https base URL)")
+
+    secret = WEBHOOK_SECRET
+    if not secret:
+        # valid for this run only; set WEBHOOK_SECRET to test with curl
+        secret = secrets.token_urlsafe(32)
+        print("⚠️ WEBHOOK_SECRET not set, using a random secret for this run")
+
+    print(f"🌐 Webhook: {WEBHOOK_URL}/{WEBHOOK_PATH} -> {WEBHOOK_LISTEN}:{WEBHOOK_PORT} "
+          f"(max_connections={WEBHOOK_MAX_CONNECTIONS})")
+
+    application.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH,
+        webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+        secret_token=secret,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        # chat_member updates are only delivered when asked for explicitly
+        allowed_updates=Update.ALL_TYPES
+    )